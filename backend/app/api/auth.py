@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, func, select
 from datetime import timedelta
 from app.core.auth import (
     verify_password,
@@ -11,16 +11,16 @@ from app.core.auth import (
     get_current_active_user,
     SECRET_KEY
 )
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db.models import User
 from app.schemas.auth import UserCreate, Token, User as UserSchema
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=UserSchema)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if username exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = (await db.execute(select(User).where(User.username == user.username))).scalar_one_or_none()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,7 +28,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if email exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalar_one_or_none()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,19 +43,19 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     print("Login attempt:", form_data.username)
-    user = db.query(User).filter(
+    user = (await db.execute(select(User).where(
         or_(
             User.username == form_data.username,
             func.lower(User.email) == form_data.username.lower()
         )
-    ).first()
+    ))).scalars().first()
     print("User found:", user)
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
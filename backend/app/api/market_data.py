@@ -20,7 +20,7 @@ def get_market_data_service() -> MarketDataService:
     exchange = get_exchange()
     return MarketDataService(exchange)
 
-@router.get("/ticker/{symbol}")
+@router.get("/ticker/{symbol:path}")
 async def get_ticker(
     symbol: str,
     market_data_service: MarketDataService = Depends(get_market_data_service),
@@ -29,7 +29,19 @@ async def get_ticker(
     """Get current ticker data for a symbol."""
     return await market_data_service.get_ticker(symbol)
 
-@router.get("/ohlcv/{symbol}")
+@router.get("/tickers")
+async def get_tickers(
+    symbols: str = Query(..., description="Comma-separated trading pairs, e.g. BTC/USDT,ETH/USDT"),
+    market_data_service: MarketDataService = Depends(get_market_data_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get current ticker data for multiple symbols."""
+    symbol_list = [symbol.strip() for symbol in symbols.split(',') if symbol.strip()]
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    return await market_data_service.get_tickers(symbol_list)
+
+@router.get("/ohlcv/{symbol:path}")
 async def get_ohlcv(
     symbol: str,
     timeframe: str = Query('1h', description="Timeframe for OHLCV data"),
@@ -41,7 +53,18 @@ async def get_ohlcv(
     """Get OHLCV data for a symbol."""
     return await market_data_service.get_ohlcv(symbol, timeframe, limit, since)
 
-@router.get("/order-book/{symbol}")
+@router.get("/indicators/{symbol:path}")
+async def get_indicators(
+    symbol: str,
+    timeframe: str = Query('1h', description="Timeframe of the candles the indicators are computed on"),
+    limit: int = Query(100, ge=1, le=settings.INDICATOR_HISTORY, description="Number of candles to return"),
+    market_data_service: MarketDataService = Depends(get_market_data_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get technical indicators (SMA, EMA, RSI, MACD, Bollinger bands, VWAP, ATR) for a symbol."""
+    return await market_data_service.get_indicators(symbol, timeframe, limit)
+
+@router.get("/order-book/{symbol:path}")
 async def get_order_book(
     symbol: str,
     limit: int = Query(20, description="Number of orders to return"),
@@ -67,11 +90,7 @@ async def get_market_summary(
 ):
     """Get comprehensive market summary for a symbol."""
     try:
-        logger.info(f"Fetching ticker for {symbol}")
-        ticker = await market_data_service.exchange.fetch_ticker(symbol)
-        logger.info(f"Ticker for {symbol}: {ticker}")
-        order_book = await market_data_service.exchange.fetch_order_book(symbol, limit=5)
-        logger.info(f"Order book for {symbol}: {order_book}")
+        return await market_data_service.get_market_summary(symbol)
     except Exception as e:
         logger.error(f"Error fetching market summary for {symbol}: {str(e)}")
         return {
@@ -84,60 +103,28 @@ async def get_market_summary(
             'ask': 0,
             'timestamp': datetime.utcnow().isoformat()
         }
-    return await market_data_service.get_market_summary(symbol)
 
-@router.get("/cached/{symbol}")
+# Declared before /cached/{symbol:path}, which would otherwise take the /rollups suffix as part of the symbol
+@router.get("/cached/{symbol:path}/rollups")
+async def get_market_data_rollups(
+    symbol: str,
+    since: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=10000, description="Number of buckets to return, newest first"),
+    market_data_service: MarketDataService = Depends(get_market_data_service),
+    current_user: User = Depends(get_current_active_user),
+    db = Depends(get_db)
+):
+    """Get OHLC buckets of cached market data older than the retention window."""
+    return await market_data_service.get_market_data_rollups(db, symbol, since, limit)
+
+@router.get("/cached/{symbol:path}")
 async def get_cached_market_data(
     symbol: str,
     since: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=10000, description="Number of rows to return, newest first"),
     market_data_service: MarketDataService = Depends(get_market_data_service),
     current_user: User = Depends(get_current_active_user),
     db = Depends(get_db)
 ):
     """Get cached market data from the database."""
-    return await market_data_service.get_cached_market_data(db, symbol, since)
-
-async def get_market_summary(self, symbol: str) -> Dict:
-    """Get only the fields used by the frontend from MEXC."""
-    try:
-        ticker = await self.exchange.fetch_ticker(symbol)
-        order_book = await self.exchange.fetch_order_book(symbol, limit=5)
-
-        return {
-            'symbol': symbol,
-            'last_price': ticker.get('last', 0.0),
-            '24h_high': ticker.get('high', 0.0),
-            '24h_low': ticker.get('low', 0.0),
-            '24h_volume': ticker.get('quoteVolume', 0.0),
-            'bid': order_book['bids'][0][0] if order_book.get('bids') else None,
-            'ask': order_book['asks'][0][0] if order_book.get('asks') else None,
-            'timestamp': datetime.utcnow().isoformat(),
-            'order_book': {
-                'symbol': order_book.get('symbol', symbol),
-                'bids': order_book.get('bids', []),
-                'asks': order_book.get('asks', []),
-                'timestamp': order_book.get('timestamp'),
-                'datetime': order_book.get('datetime'),
-                'nonce': order_book.get('nonce'),
-            }
-        }
-    except Exception as e:
-        logger.error(f"Error fetching market summary for {symbol}: {str(e)}")
-        return {
-            'symbol': symbol,
-            'last_price': 0.0,
-            '24h_high': 0.0,
-            '24h_low': 0.0,
-            '24h_volume': 0.0,
-            'bid': None,
-            'ask': None,
-            'timestamp': datetime.utcnow().isoformat(),
-            'order_book': {
-                'symbol': symbol,
-                'bids': [],
-                'asks': [],
-                'timestamp': None,
-                'datetime': None,
-                'nonce': None,
-            }
-        }
\ No newline at end of file
+    return await market_data_service.get_cached_market_data(db, symbol, since, limit)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
-from app.core.deps import get_db, get_current_user
+from app.core.deps import get_async_db, get_current_user
 from app.services.portfolio import PortfolioService
 from app.core.exchange import get_exchange
 from app.db.models import User
@@ -10,7 +10,7 @@ router = APIRouter(prefix="/trades", tags=["trades"])
 
 @router.get("/portfolio", response_model=Dict[str, Any], summary="Get current portfolio value and asset allocation")
 async def get_portfolio(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     exchange = Depends(get_exchange)
 ):
@@ -18,8 +18,8 @@ async def get_portfolio(
     Returns the current user's total portfolio value, value history, and asset allocation.
     """
     portfolio_service = PortfolioService(db, exchange)
-    portfolio_data = portfolio_service.get_portfolio_value(current_user.id)
-    history = portfolio_service.get_portfolio_history(current_user.id)
+    portfolio_data = await portfolio_service.get_portfolio_value(current_user.id)
+    history = await portfolio_service.get_portfolio_history(current_user.id)
     return {
         "totalValue": portfolio_data["totalValue"],
         "history": history,
@@ -28,7 +28,7 @@ async def get_portfolio(
 
 @router.get("/metrics", response_model=Dict[str, Any], summary="Get trading performance metrics")
 async def get_trade_metrics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     exchange = Depends(get_exchange)
 ):
@@ -36,11 +36,11 @@ async def get_trade_metrics(
     Returns trading performance metrics for the current user.
     """
     portfolio_service = PortfolioService(db, exchange)
-    return portfolio_service.get_trade_metrics(current_user.id)
+    return await portfolio_service.get_trade_metrics(current_user.id)
 
 @router.get("/recent", response_model=List[Dict[str, Any]], summary="Get recent trades")
 async def get_recent_trades(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     exchange = Depends(get_exchange)
 ):
@@ -48,4 +48,4 @@ async def get_recent_trades(
     Returns a list of the current user's most recent trades.
     """
     portfolio_service = PortfolioService(db, exchange)
-    return portfolio_service.get_recent_trades(current_user.id)
\ No newline at end of file
+    return await portfolio_service.get_recent_trades(current_user.id)
\ No newline at end of file
@@ -1,11 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 from datetime import datetime
 from app.core.auth import get_current_active_user
-from app.db.database import get_db
-from app.db.models import User, ScheduledTrade, Trade, TradeStatus
+from app.core.recurrence import next_occurrence
+from app.core.trading_engine import notify_rule_saved, notify_trade_removed, notify_trade_saved
+from app.db.database import get_async_db
+from app.db.models import User, RecurringTradeRule, ScheduledTrade, Trade, TradeLegClaim, TradeStatus
 from app.schemas.trade import (
+    RecurringTradeRuleCreate,
+    RecurringTradeRuleUpdate,
+    RecurringTradeRule as RecurringTradeRuleSchema,
     ScheduledTradeCreate,
     ScheduledTradeUpdate,
     ScheduledTrade as ScheduledTradeSchema,
@@ -14,11 +21,20 @@ from app.schemas.trade import (
 
 router = APIRouter(prefix="/trades", tags=["trades"])
 
+async def _get_user_trade(db: AsyncSession, trade_id: int, user_id: int) -> Optional[ScheduledTrade]:
+    # Eager-load fills: lazy loading isn't available on async sessions
+    result = await db.execute(
+        select(ScheduledTrade)
+        .options(selectinload(ScheduledTrade.trades))
+        .where(ScheduledTrade.id == trade_id, ScheduledTrade.user_id == user_id)
+    )
+    return result.scalar_one_or_none()
+
 @router.post("/scheduled", response_model=ScheduledTradeSchema)
 async def create_scheduled_trade(
     trade: ScheduledTradeCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Validate times
     if trade.buy_time >= trade.sell_time:
@@ -43,27 +59,29 @@ async def create_scheduled_trade(
         status=TradeStatus.PENDING
     )
     db.add(db_trade)
-    db.commit()
-    db.refresh(db_trade)
-    return db_trade
+    await db.commit()
+    await notify_trade_saved(db_trade)
+    return await _get_user_trade(db, db_trade.id, current_user.id)
 
 @router.get("/scheduled", response_model=List[ScheduledTradeSchema])
 async def get_scheduled_trades(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(ScheduledTrade).filter(ScheduledTrade.user_id == current_user.id).all()
+    result = await db.execute(
+        select(ScheduledTrade)
+        .options(selectinload(ScheduledTrade.trades))
+        .where(ScheduledTrade.user_id == current_user.id)
+    )
+    return result.scalars().all()
 
 @router.get("/scheduled/{trade_id}", response_model=ScheduledTradeSchema)
 async def get_scheduled_trade(
     trade_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    trade = db.query(ScheduledTrade).filter(
-        ScheduledTrade.id == trade_id,
-        ScheduledTrade.user_id == current_user.id
-    ).first()
+    trade = await _get_user_trade(db, trade_id, current_user.id)
     if not trade:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,12 +94,9 @@ async def update_scheduled_trade(
     trade_id: int,
     trade_update: ScheduledTradeUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_trade = db.query(ScheduledTrade).filter(
-        ScheduledTrade.id == trade_id,
-        ScheduledTrade.user_id == current_user.id
-    ).first()
+    db_trade = await _get_user_trade(db, trade_id, current_user.id)
     if not db_trade:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,35 +107,184 @@ async def update_scheduled_trade(
     for field, value in trade_update.dict(exclude_unset=True).items():
         setattr(db_trade, field, value)
     
-    db.commit()
-    db.refresh(db_trade)
+    await db.commit()
+    await notify_trade_saved(db_trade)
     return db_trade
 
 @router.delete("/scheduled/{trade_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_scheduled_trade(
     trade_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_trade = db.query(ScheduledTrade).filter(
-        ScheduledTrade.id == trade_id,
-        ScheduledTrade.user_id == current_user.id
-    ).first()
+    db_trade = await _get_user_trade(db, trade_id, current_user.id)
     if not db_trade:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Scheduled trade not found"
         )
     
-    db.delete(db_trade)
-    db.commit()
+    await db.delete(db_trade)
+    await db.commit()
+    await notify_trade_removed(trade_id)
     return None
 
 @router.get("/history", response_model=List[TradeSchema])
 async def get_trade_history(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(Trade).join(ScheduledTrade).filter(
-        ScheduledTrade.user_id == current_user.id
-    ).all() 
\ No newline at end of file
+    result = await db.execute(
+        select(Trade).join(ScheduledTrade).where(ScheduledTrade.user_id == current_user.id)
+    )
+    return result.scalars().all() 
+
+async def _get_user_rule(db: AsyncSession, rule_id: int, user_id: int) -> Optional[RecurringTradeRule]:
+    result = await db.execute(
+        select(RecurringTradeRule).where(RecurringTradeRule.id == rule_id, RecurringTradeRule.user_id == user_id)
+    )
+    return result.scalar_one_or_none()
+
+def _first_occurrence(schedule: str, end_at: Optional[datetime]) -> datetime:
+    try:
+        occurrence = next_occurrence(schedule, datetime.utcnow(), end_at)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid schedule: {str(e)}"
+        )
+    if occurrence is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Schedule has no occurrences before its end time"
+        )
+    return occurrence
+
+@router.post("/recurring", response_model=RecurringTradeRuleSchema)
+async def create_recurring_rule(
+    rule: RecurringTradeRuleCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Only the next occurrence is stored; the engine expands each one as its horizon reaches it
+    db_rule = RecurringTradeRule(
+        user_id=current_user.id,
+        trading_pair=rule.trading_pair,
+        amount=rule.amount,
+        schedule=rule.schedule,
+        hold_seconds=rule.hold_seconds,
+        end_at=rule.end_at,
+        next_occurrence_at=_first_occurrence(rule.schedule, rule.end_at),
+        status=TradeStatus.PENDING
+    )
+    db.add(db_rule)
+    await db.commit()
+    await notify_rule_saved(db_rule)
+    return db_rule
+
+@router.get("/recurring", response_model=List[RecurringTradeRuleSchema])
+async def get_recurring_rules(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(select(RecurringTradeRule).where(RecurringTradeRule.user_id == current_user.id))
+    return result.scalars().all()
+
+@router.get("/recurring/{rule_id}", response_model=RecurringTradeRuleSchema)
+async def get_recurring_rule(
+    rule_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    rule = await _get_user_rule(db, rule_id, current_user.id)
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recurring rule not found"
+        )
+    return rule
+
+@router.get("/recurring/{rule_id}/occurrences", response_model=List[ScheduledTradeSchema])
+async def get_recurring_rule_occurrences(
+    rule_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(
+        select(ScheduledTrade)
+        .options(selectinload(ScheduledTrade.trades))
+        .where(ScheduledTrade.recurring_rule_id == rule_id, ScheduledTrade.user_id == current_user.id)
+        .order_by(ScheduledTrade.occurrence_at)
+    )
+    return result.scalars().all()
+
+@router.put("/recurring/{rule_id}", response_model=RecurringTradeRuleSchema)
+async def update_recurring_rule(
+    rule_id: int,
+    rule_update: RecurringTradeRuleUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_rule = await _get_user_rule(db, rule_id, current_user.id)
+    if not db_rule or db_rule.status != TradeStatus.PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Active recurring rule not found"
+        )
+
+    changes = rule_update.dict(exclude_unset=True)
+    for field, value in changes.items():
+        setattr(db_rule, field, value)
+    # Occurrences already expanded keep their times; the new schedule applies from now on
+    if 'schedule' in changes or 'end_at' in changes:
+        db_rule.next_occurrence_at = _first_occurrence(db_rule.schedule, db_rule.end_at)
+
+    await db.commit()
+    await notify_rule_saved(db_rule)
+    return db_rule
+
+@router.delete("/recurring/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_recurring_rule(
+    rule_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_rule = await _get_user_rule(db, rule_id, current_user.id)
+    if not db_rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recurring rule not found"
+        )
+
+    # Kept as cancelled so its executed occurrences still point at it
+    db_rule.status = TradeStatus.CANCELLED
+    db_rule.next_occurrence_at = None
+    # Occurrences whose buy already went out are in their hold period; they keep their sell so
+    # the position gets closed
+    bought = or_(
+        select(Trade.id).where(
+            Trade.scheduled_trade_id == ScheduledTrade.id,
+            Trade.side == 'buy',
+            Trade.status != TradeStatus.FAILED
+        ).exists(),
+        select(TradeLegClaim.id).where(
+            TradeLegClaim.scheduled_trade_id == ScheduledTrade.id,
+            TradeLegClaim.side == 'buy'
+        ).exists()
+    )
+    result = await db.execute(
+        select(ScheduledTrade.id).where(
+            ScheduledTrade.recurring_rule_id == rule_id,
+            ScheduledTrade.status == TradeStatus.PENDING,
+            ~bought
+        )
+    )
+    pending = result.scalars().all()
+    if pending:
+        await db.execute(
+            update(ScheduledTrade).where(ScheduledTrade.id.in_(pending)).values(status=TradeStatus.CANCELLED)
+        )
+    await db.commit()
+    for trade_id in pending:
+        await notify_trade_removed(trade_id)
+    return None
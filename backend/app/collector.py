@@ -0,0 +1,141 @@
+"""Market data collector sidecar.
+
+Streams tickers and order books from MEXC once per host and publishes them into shared
+memory for every API worker to read. Run it next to the API:
+
+    python -m app.collector
+
+Workers fall back to fetching from MEXC directly whenever the collector is not running.
+The collector also refreshes the markets index snapshot (app.core.markets) the workers read,
+records a market_data row per symbol every COLLECTOR_MARKET_DATA_INTERVAL seconds,
+committed in batches by the write-behind queue, and applies market_data retention.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.exchange import MEXCExchange
+from app.core.exchange_stream import ExchangeStreamClient
+from app.core.markets import markets_catalog
+from app.core.order_book import order_book_manager
+from app.core.retention import market_data_retention
+from app.core.shared_market_data import SharedMarketDataWriter
+from app.db.database import async_engine
+from app.db.write_behind import write_behind
+from app.services.indicators import indicator_engine
+from app.services.market_data import MarketDataService
+
+logger = logging.getLogger(__name__)
+
+class MarketDataCollector:
+    def __init__(self, exchange: MEXCExchange, writer: SharedMarketDataWriter, symbols: Optional[List[str]] = None):
+        """Initialize the collector for the given symbols (defaults to the top trading pairs)."""
+        self.exchange = exchange
+        self.writer = writer
+        self.symbols = symbols or settings.MARKET_DATA_SYMBOLS
+        self.market_data = MarketDataService(exchange)
+        self.stream: Optional[ExchangeStreamClient] = None
+
+    async def run(self):
+        """Publish market data until cancelled."""
+        if not self.symbols:
+            self.symbols = await self.exchange.get_available_trading_pairs()
+
+        self.writer.open()
+        order_book_manager.set_exchange(self.exchange)
+        self.stream = ExchangeStreamClient(self.symbols)
+        self.stream.add_handler(order_book_manager.handle_update)
+        self.stream.add_handler(self._publish_update)
+        self.stream.add_disconnect_handler(self._invalidate_books)
+        logger.info(f"Collecting market data for {len(self.symbols)} symbols into {self.writer.path}")
+
+        await asyncio.gather(
+            self.stream.run_forever(),
+            self._refresh_tickers(),
+            self._record_market_data(),
+            self._heartbeat()
+        )
+
+    async def _publish_update(self, update: Dict):
+        symbol = update['symbol']
+        if update['type'] == 'ticker':
+            self.writer.write_ticker(symbol, {
+                'last': update['price'],
+                'high': update['high'],
+                'low': update['low'],
+                'quoteVolume': update['volume'],
+                'timestamp': update['timestamp']
+            })
+        elif update['type'] == 'depth':
+            book = order_book_manager.get(symbol)
+            if book is not None:
+                depth = self.writer.depth
+                self.writer.write_order_book(symbol, book.bids.top(depth), book.asks.top(depth), book.version)
+
+    def _invalidate_books(self, symbols: List[str]):
+        order_book_manager.invalidate(symbols)
+        for symbol in symbols:
+            self.writer.invalidate_order_book(symbol)
+
+    async def _refresh_tickers(self):
+        """Periodically fill in full ticker fields (bid/ask, base volume) the stream doesn't carry."""
+        while True:
+            try:
+                tickers = await self.exchange.fetch_tickers(self.symbols)
+                for symbol, ticker in tickers.items():
+                    self.writer.write_ticker(symbol, ticker)
+            except Exception as e:
+                logger.error(f"Error refreshing tickers: {str(e)}")
+            await asyncio.sleep(settings.COLLECTOR_TICKER_REFRESH_INTERVAL)
+
+    async def _record_market_data(self):
+        """Periodically record every symbol's price, volume and indicators as market_data rows."""
+        interval = settings.COLLECTOR_MARKET_DATA_INTERVAL
+        if interval <= 0:
+            return
+        while True:
+            try:
+                await self.market_data.update_market_data_cache(self.symbols)
+            except Exception as e:
+                logger.error(f"Error recording market data: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def _heartbeat(self):
+        while True:
+            self.writer.heartbeat()
+            await asyncio.sleep(1)
+
+async def main():
+    exchange = MEXCExchange(
+        api_key=settings.MEXC_API_KEY,
+        api_secret=settings.MEXC_API_SECRET,
+        use_shared_feed=False
+    )
+    writer = SharedMarketDataWriter(
+        path=settings.SHARED_MARKET_DATA_PATH,
+        slot_count=settings.SHARED_MARKET_DATA_SLOTS,
+        depth=settings.SHARED_MARKET_DATA_DEPTH
+    )
+    # The only process that refreshes the markets index; API workers and engines reload its snapshot
+    await markets_catalog.start(exchange, refresh=True)
+    # Likewise the only process applying market_data retention, unless MARKET_DATA_RETENTION_IN_API is set
+    if settings.MARKET_DATA_RETENTION_ENABLED:
+        market_data_retention.start()
+    try:
+        await MarketDataCollector(exchange, writer).run()
+    finally:
+        await market_data_retention.stop()
+        await markets_catalog.stop()
+        writer.close()
+        await exchange.close()
+        # Commit the last batch of market_data rows before the connections go
+        await write_behind.close()
+        indicator_engine.close()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+from decimal import Decimal, ROUND_DOWN
+from typing import Dict, List, Optional
+
+# Used when a market's amount precision is unknown
+DEFAULT_AMOUNT_STEP = Decimal('0.00000001')
+
+def to_decimal(value) -> Decimal:
+    """Convert a float/str amount to Decimal via its shortest repr, so 0.1 stays 0.1."""
+    return Decimal(str(value))
+
+def amount_step(market: Optional[Dict]) -> Decimal:
+    """Return the order amount step for a market; ccxt reports MEXC precision as tick sizes."""
+    precision = ((market or {}).get('precision') or {}).get('amount')
+    if not precision:
+        return DEFAULT_AMOUNT_STEP
+    return to_decimal(precision)
+
+def floor_to_step(value: Decimal, step: Decimal) -> Decimal:
+    return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+def allocate_pro_rata(total: Decimal, weights: List[Decimal], step: Decimal) -> List[Decimal]:
+    """Split `total` across `weights` in multiples of `step` using largest-remainder rounding.
+
+    Shares sum exactly to `total` floored to `step`, and no share exceeds its weight.
+    """
+    weight_sum = sum(weights)
+    units = int(floor_to_step(min(total, weight_sum), step) / step) if total > 0 else 0
+    if units == 0 or weight_sum <= 0:
+        return [Decimal(0)] * len(weights)
+
+    exact = [units * weight / weight_sum for weight in weights]
+    shares = [int(value) for value in exact]
+    remaining = units - sum(shares)
+    # Largest fractional remainder first; ties go to the earlier entry so allocation is deterministic
+    for i in sorted(range(len(weights)), key=lambda i: (shares[i] - exact[i], i)):
+        if remaining == 0:
+            break
+        if (shares[i] + 1) * step <= weights[i]:
+            shares[i] += 1
+            remaining -= 1
+    return [share * step for share in shares]
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from app.core.config import settings
+
+class TTLCache:
+    def __init__(self, max_entries: int = 1024):
+        """Initialize an LRU-bounded cache whose entries expire after a per-entry TTL."""
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        """Return a cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if not allow_stale and expires_at < time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get_many(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """Return the fresh cached values among `keys`, counting each as a hit."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        self.hits += len(found)
+        return found
+
+    def get_many_stale(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """Return cached values among `keys` regardless of expiry."""
+        found = {}
+        for key in keys:
+            value = self.get(key, allow_stale=True)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """Store a value for `ttl` seconds, evicting least recently used entries when full."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry."""
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key: Hashable, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a fresh cached value or fetch it, sharing one in-flight fetch between concurrent callers."""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            # Shield so one cancelled waiter doesn't cancel the fetch for everyone else
+            return await asyncio.shield(in_flight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            if ttl > 0:
+                self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    def get_stats(self) -> Dict:
+        """Return hit/miss/coalesce statistics."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'in_flight': len(self._in_flight),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'hit_ratio': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+# Shared by every MarketDataService and MEXCExchange in the process
+market_data_cache = TTLCache(max_entries=settings.MARKET_DATA_CACHE_MAX_ENTRIES)
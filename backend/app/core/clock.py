@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.core.exchange import MEXCExchange
+
+logger = logging.getLogger(__name__)
+
+class ExchangeClock:
+    def __init__(self, samples: int = 5, sync_interval: float = 300.0):
+        """Initialize an estimate of the exchange clock relative to the local clock."""
+        self.samples = samples
+        self.sync_interval = sync_interval
+        self.offset = 0.0  # Exchange time minus local time, in seconds
+        self.rtt: Optional[float] = None
+        self.synced_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def sync(self, exchange: "MEXCExchange"):
+        """Sample the server time and keep the offset from the lowest-RTT sample, assuming symmetric latency."""
+        best = None
+        for _ in range(self.samples):
+            # Wait for the rate limiter outside the timed window
+            await exchange.reserve_rate_limit('fetch_time')
+            sent = time.time()
+            server_ms = await exchange.fetch_time(rate_limit_acquired=True)
+            received = time.time()
+            rtt = received - sent
+            if best is None or rtt < best[0]:
+                best = (rtt, server_ms / 1000 - (sent + received) / 2)
+        self.rtt, self.offset = best
+        self.synced_at = time.time()
+        logger.info(f"Exchange clock offset {self.offset * 1000:.1f}ms (rtt {self.rtt * 1000:.1f}ms)")
+
+    def now(self) -> float:
+        """Return the current exchange time in epoch seconds."""
+        return time.time() + self.offset
+
+    def to_local(self, exchange_time: float) -> float:
+        """Convert an exchange epoch timestamp to the local clock."""
+        return exchange_time - self.offset
+
+    def one_way_latency(self) -> float:
+        return (self.rtt or 0.0) / 2
+
+    async def _sync_loop(self, exchange: "MEXCExchange"):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync(exchange)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error syncing exchange clock: {str(e)}")
+
+    def start(self, exchange: "MEXCExchange"):
+        """Resync periodically in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop(exchange))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        return {
+            'offset_ms': round(self.offset * 1000, 3),
+            'rtt_ms': round(self.rtt * 1000, 3) if self.rtt is not None else None,
+            'synced_at': self.synced_at,
+        }
+
+exchange_clock = ExchangeClock(samples=settings.CLOCK_SYNC_SAMPLES, sync_interval=settings.CLOCK_SYNC_INTERVAL)
@@ -1,5 +1,7 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
+import os
+import tempfile
 from typing import List
 from dotenv import load_dotenv
 
@@ -33,7 +35,132 @@ class Settings(BaseSettings):
     # Exchange settings
     MEXC_API_KEY: str = Field(default="", env="MEXC_API_KEY")
     MEXC_API_SECRET: str = Field(default="", env="MEXC_API_SECRET")
-    
+    EXCHANGE_RATE_LIMIT_PER_SECOND: float = Field(default=10.0, env="EXCHANGE_RATE_LIMIT_PER_SECOND")
+    EXCHANGE_RATE_LIMIT_BURST: float = Field(default=10.0, env="EXCHANGE_RATE_LIMIT_BURST")
+    EXCHANGE_FANOUT_CONCURRENCY: int = Field(default=5, env="EXCHANGE_FANOUT_CONCURRENCY")
+    EXCHANGE_MAX_RETRIES: int = Field(default=2, env="EXCHANGE_MAX_RETRIES")
+    EXCHANGE_RETRY_BASE_DELAY: float = Field(default=0.2, env="EXCHANGE_RETRY_BASE_DELAY")
+    EXCHANGE_RETRY_MAX_DELAY: float = Field(default=2.0, env="EXCHANGE_RETRY_MAX_DELAY")
+    EXCHANGE_HEDGE_ENABLED: bool = Field(default=False, env="EXCHANGE_HEDGE_ENABLED")
+    EXCHANGE_BREAKER_FAILURE_THRESHOLD: int = Field(default=5, env="EXCHANGE_BREAKER_FAILURE_THRESHOLD")
+    EXCHANGE_BREAKER_RESET_TIMEOUT: float = Field(default=30.0, env="EXCHANGE_BREAKER_RESET_TIMEOUT")
+
+    # Exchange WebSocket stream settings
+    MEXC_WS_URL: str = Field(default="wss://wbs.mexc.com/ws", env="MEXC_WS_URL")
+    MEXC_WS_MAX_SUBSCRIPTIONS: int = Field(default=30, env="MEXC_WS_MAX_SUBSCRIPTIONS")
+    MEXC_WS_PING_INTERVAL: float = Field(default=20.0, env="MEXC_WS_PING_INTERVAL")
+    MEXC_WS_RECONNECT_MIN_DELAY: float = Field(default=1.0, env="MEXC_WS_RECONNECT_MIN_DELAY")
+    MEXC_WS_RECONNECT_MAX_DELAY: float = Field(default=30.0, env="MEXC_WS_RECONNECT_MAX_DELAY")
+    ORDER_BOOK_SNAPSHOT_DEPTH: int = Field(default=100, env="ORDER_BOOK_SNAPSHOT_DEPTH")
+
+    # Shared-memory market data published by the collector process (python -m app.collector)
+    MARKET_DATA_SYMBOLS: List[str] = Field(default_factory=list, env="MARKET_DATA_SYMBOLS")
+    SHARED_MARKET_DATA_PATH: str = Field(
+        default_factory=lambda: os.path.join(
+            "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+            "scheduled_trader_market_data"
+        ),
+        env="SHARED_MARKET_DATA_PATH"
+    )
+    SHARED_MARKET_DATA_SLOTS: int = Field(default=512, env="SHARED_MARKET_DATA_SLOTS")
+    SHARED_MARKET_DATA_DEPTH: int = Field(default=20, env="SHARED_MARKET_DATA_DEPTH")
+    SHARED_MARKET_DATA_STALE_AFTER: float = Field(default=5.0, env="SHARED_MARKET_DATA_STALE_AFTER")
+    SHARED_MARKET_DATA_MAX_AGE: float = Field(default=30.0, env="SHARED_MARKET_DATA_MAX_AGE")
+    COLLECTOR_TICKER_REFRESH_INTERVAL: float = Field(default=5.0, env="COLLECTOR_TICKER_REFRESH_INTERVAL")
+    # How often the collector records a market_data row per symbol; 0 disables it
+    COLLECTOR_MARKET_DATA_INTERVAL: float = Field(default=60.0, env="COLLECTOR_MARKET_DATA_INTERVAL")
+
+    # Market data cache settings (TTLs in seconds)
+    MARKET_DATA_CACHE_MAX_ENTRIES: int = Field(default=1024, env="MARKET_DATA_CACHE_MAX_ENTRIES")
+    CACHE_TTL_TICKER: float = Field(default=1.0, env="CACHE_TTL_TICKER")
+    CACHE_TTL_ORDER_BOOK: float = Field(default=0.5, env="CACHE_TTL_ORDER_BOOK")
+    CACHE_TTL_OHLCV: float = Field(default=30.0, env="CACHE_TTL_OHLCV")
+    # Closed candles are kept on disk per symbol and timeframe; only newer ones are fetched from MEXC
+    OHLCV_STORE_DIR: str = Field(default="./ohlcv", env="OHLCV_STORE_DIR")
+    OHLCV_FETCH_LIMIT: int = Field(default=1000, env="OHLCV_FETCH_LIMIT")
+    # Higher timeframes are aggregated from the base timeframe's candles while that needs no more
+    # than OHLCV_RESAMPLE_MAX_CANDLES base candles fetched; otherwise they are fetched themselves
+    OHLCV_BASE_TIMEFRAME: str = Field(default="1m", env="OHLCV_BASE_TIMEFRAME")
+    OHLCV_RESAMPLED_TIMEFRAMES: List[str] = Field(
+        default_factory=lambda: ["5m", "15m", "30m", "1h", "4h", "1d"],
+        env="OHLCV_RESAMPLED_TIMEFRAMES"
+    )
+    OHLCV_RESAMPLE_MAX_CANDLES: int = Field(default=10080, env="OHLCV_RESAMPLE_MAX_CANDLES")
+    # Technical indicators: timeframe stored with cached market data, candles kept per series,
+    # and processes computing full histories (0 computes them in the event loop)
+    INDICATOR_TIMEFRAME: str = Field(default="1h", env="INDICATOR_TIMEFRAME")
+    INDICATOR_HISTORY: int = Field(default=500, env="INDICATOR_HISTORY")
+    INDICATOR_WORKERS: int = Field(default=0, env="INDICATOR_WORKERS")
+
+    # Write-behind queue: inserts are committed in batches of this many rows, or after this many seconds
+    WRITE_BEHIND_MAX_ROWS: int = Field(default=500, env="WRITE_BEHIND_MAX_ROWS")
+    WRITE_BEHIND_MAX_DELAY: float = Field(default=0.05, env="WRITE_BEHIND_MAX_DELAY")
+    # "commit": the engine waits for a fill's batch to commit before moving on; "deferred": it moves
+    # on once queued, and the execution journal recovers fills lost if the process dies first
+    ORDER_RECORD_DURABILITY: str = Field(default="commit", env="ORDER_RECORD_DURABILITY")
+
+    # market_data retention: full-resolution rows are kept this long, then rolled into buckets of
+    # MARKET_DATA_ROLLUP_SECONDS kept for MARKET_DATA_ROLLUP_RETENTION_SECONDS. The collector runs it;
+    # API workers only do when MARKET_DATA_RETENTION_IN_API is set (e.g. when no collector is deployed)
+    MARKET_DATA_RETENTION_ENABLED: bool = Field(default=True, env="MARKET_DATA_RETENTION_ENABLED")
+    MARKET_DATA_RETENTION_IN_API: bool = Field(default=False, env="MARKET_DATA_RETENTION_IN_API")
+    MARKET_DATA_RETENTION_SECONDS: float = Field(default=86400.0, env="MARKET_DATA_RETENTION_SECONDS")
+    MARKET_DATA_ROLLUP_SECONDS: int = Field(default=300, env="MARKET_DATA_ROLLUP_SECONDS")
+    MARKET_DATA_ROLLUP_RETENTION_SECONDS: float = Field(default=90 * 86400.0, env="MARKET_DATA_ROLLUP_RETENTION_SECONDS")
+    MARKET_DATA_RETENTION_INTERVAL: float = Field(default=300.0, env="MARKET_DATA_RETENTION_INTERVAL")
+    # Rows deleted per transaction, and SQLite pages freed per incremental_vacuum step
+    MARKET_DATA_RETENTION_BATCH_SIZE: int = Field(default=2000, env="MARKET_DATA_RETENTION_BATCH_SIZE")
+    MARKET_DATA_VACUUM_PAGES: int = Field(default=256, env="MARKET_DATA_VACUUM_PAGES")
+    # Run a one-off full VACUUM to switch an existing SQLite database to auto_vacuum=INCREMENTAL;
+    # it holds the write lock for the whole rewrite
+    MARKET_DATA_VACUUM_CONVERT: bool = Field(default=True, env="MARKET_DATA_VACUUM_CONVERT")
+
+    # Markets metadata snapshot
+    MARKETS_CACHE_PATH: str = Field(default="./markets_cache.json", env="MARKETS_CACHE_PATH")
+    MARKETS_REFRESH_INTERVAL: float = Field(default=3600.0, env="MARKETS_REFRESH_INTERVAL")
+    # How often processes that don't refresh the snapshot (API workers, engines) check it for a newer one
+    MARKETS_RELOAD_INTERVAL: float = Field(default=60.0, env="MARKETS_RELOAD_INTERVAL")
+
+    # Trade scheduler: jobs later than this many seconds are skipped instead of fired
+    SCHEDULER_MISFIRE_GRACE_SECONDS: float = Field(default=30.0, env="SCHEDULER_MISFIRE_GRACE_SECONDS")
+    # Cross buys against sells on the same pair and instant, sending only the difference to the exchange
+    ENGINE_NETTING_ENABLED: bool = Field(default=False, env="ENGINE_NETTING_ENABLED")
+    # Load, validate and warm up each trade this many seconds before it fires
+    ENGINE_PREARM_SECONDS: float = Field(default=2.0, env="ENGINE_PREARM_SECONDS")
+    # Final stretch before firing spent yielding on a monotonic clock instead of sleeping
+    ENGINE_FIRE_SPIN_SECONDS: float = Field(default=0.002, env="ENGINE_FIRE_SPIN_SECONDS")
+    # Orders placed at once across trading pairs, and jobs allowed to queue before callers wait
+    ENGINE_EXECUTION_CONCURRENCY: int = Field(default=8, env="ENGINE_EXECUTION_CONCURRENCY")
+    ENGINE_EXECUTION_QUEUE_SIZE: int = Field(default=1000, env="ENGINE_EXECUTION_QUEUE_SIZE")
+    # Only legs due within this many seconds are kept in memory; the pager extends the window
+    ENGINE_HORIZON_SECONDS: float = Field(default=3600.0, env="ENGINE_HORIZON_SECONDS")
+    ENGINE_PAGER_INTERVAL: float = Field(default=60.0, env="ENGINE_PAGER_INTERVAL")
+    # Run the engine inside API workers; trades are split into shards owned through database leases,
+    # so any number of workers or engine processes can run it without executing a trade twice
+    ENGINE_ENABLED: bool = Field(default=False, env="ENGINE_ENABLED")
+    ENGINE_SHARD_COUNT: int = Field(default=16, env="ENGINE_SHARD_COUNT")
+    ENGINE_LEASE_TTL: float = Field(default=15.0, env="ENGINE_LEASE_TTL")
+    ENGINE_LEASE_RENEW_INTERVAL: float = Field(default=5.0, env="ENGINE_LEASE_RENEW_INTERVAL")
+    # Engine service (python -m app.engine); API workers push trade changes to it over Unix sockets here
+    ENGINE_SOCKET_DIR: str = Field(
+        default_factory=lambda: os.path.join(tempfile.gettempdir(), "scheduled_trader_engine"),
+        env="ENGINE_SOCKET_DIR"
+    )
+    ENGINE_COMMAND_TIMEOUT: float = Field(default=0.25, env="ENGINE_COMMAND_TIMEOUT")
+    CLOCK_SYNC_SAMPLES: int = Field(default=5, env="CLOCK_SYNC_SAMPLES")
+    CLOCK_SYNC_INTERVAL: float = Field(default=300.0, env="CLOCK_SYNC_INTERVAL")
+    # Write-ahead execution journal; snapshots bound how much of it recovery replays
+    JOURNAL_DIR: str = Field(default="./journal", env="JOURNAL_DIR")
+    JOURNAL_FLUSH_INTERVAL: float = Field(default=0.05, env="JOURNAL_FLUSH_INTERVAL")
+    JOURNAL_SNAPSHOT_INTERVAL: float = Field(default=30.0, env="JOURNAL_SNAPSHOT_INTERVAL")
+    # Scheduled trades changed this long before a snapshot's watermark are re-read on recovery
+    JOURNAL_CATCHUP_MARGIN: float = Field(default=60.0, env="JOURNAL_CATCHUP_MARGIN")
+    # Orders acknowledged without a confirmed fill are polled per symbol, backing off while nothing settles
+    FILL_RECONCILE_MIN_INTERVAL: float = Field(default=2.0, env="FILL_RECONCILE_MIN_INTERVAL")
+    FILL_RECONCILE_MAX_INTERVAL: float = Field(default=60.0, env="FILL_RECONCILE_MAX_INTERVAL")
+    FILL_RECONCILE_BATCH_SIZE: int = Field(default=100, env="FILL_RECONCILE_BATCH_SIZE")
+    FILL_RECONCILE_MAX_AGE: float = Field(default=86400.0, env="FILL_RECONCILE_MAX_AGE")
+
     model_config = SettingsConfigDict(case_sensitive=True)
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""Command channel from the API workers to the engine service (`python -m app.engine`).
+
+Every engine process listens on its own Unix socket in one directory; the API sends each
+trade change to all of them as a line of JSON and waits only for the acknowledgement, not
+for anything to execute. Engines that don't own the trade's shard ignore it. A command that
+can't be delivered is not lost for good: the engine's pager and snapshot catch-up read
+changed trades from the database anyway, only later.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CommandHandler = Callable[[str, int], Awaitable[None]]
+
+SOCKET_PREFIX = 'engine-'
+SOCKET_SUFFIX = '.sock'
+
+class EngineCommandServer:
+    def __init__(self, directory: str, handler: CommandHandler):
+        """Initialize a server passing each `(op, trade_id)` command to `handler`."""
+        self.directory = directory
+        self.handler = handler
+        self.path = os.path.join(directory, f"{SOCKET_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}{SOCKET_SUFFIX}")
+        self._server: Optional[asyncio.AbstractServer] = None
+
+        # Statistics
+        self.commands = 0
+        self.errors = 0
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        _remove_stale_sockets(self.directory)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        logger.info(f"Listening for engine commands on {self.path}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = {'ok': True}
+                try:
+                    command = json.loads(line)
+                    reply['id'] = command.get('id')
+                    await self.handler(command['op'], int(command['trade_id']))
+                    self.commands += 1
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error handling engine command {line[:200]!r}: {str(e)}")
+                    reply.update(ok=False, error=str(e))
+                writer.write(json.dumps(reply, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def get_stats(self) -> Dict:
+        return {'path': self.path, 'commands': self.commands, 'errors': self.errors}
+
+def _remove_stale_sockets(directory: str):
+    """Delete sockets left behind by engine processes that died without cleaning up."""
+    for path in _socket_paths(directory):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+        except OSError:
+            pass
+        finally:
+            probe.close()
+
+def _socket_paths(directory: str) -> List[str]:
+    try:
+        return [
+            entry.path for entry in os.scandir(directory)
+            if entry.name.startswith(SOCKET_PREFIX) and entry.name.endswith(SOCKET_SUFFIX)
+        ]
+    except FileNotFoundError:
+        return []
+
+class EngineCommandClient:
+    def __init__(self, directory: str, timeout: float = 0.25):
+        """Initialize a client that delivers commands to every engine listening in `directory`."""
+        self.directory = directory
+        self.timeout = timeout
+        # One persistent connection per engine socket; commands on it are answered in order
+        self._connections: Dict[str, Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_id = 0
+
+        # Statistics
+        self.sent = 0
+        self.failed = 0
+
+    async def send(self, op: str, trade_id: int) -> int:
+        """Send a command to every engine and return how many acknowledged it."""
+        paths = _socket_paths(self.directory)
+        # Engines that shut down remove their socket
+        for path in set(self._connections) - set(paths):
+            self._drop(path)
+        if not paths:
+            return 0
+        self._next_id += 1
+        line = json.dumps({'id': self._next_id, 'op': op, 'trade_id': trade_id}, separators=(',', ':')).encode() + b'\n'
+        results = await asyncio.gather(*(self._send_to(path, line) for path in paths))
+        return sum(results)
+
+    async def _send_to(self, path: str, line: bytes) -> bool:
+        lock = self._locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            try:
+                connection = self._connections.get(path)
+                if connection is None:
+                    connection = self._connections[path] = await asyncio.wait_for(
+                        asyncio.open_unix_connection(path), self.timeout
+                    )
+                reader, writer = connection
+                writer.write(line)
+                await writer.drain()
+                reply = json.loads(await asyncio.wait_for(reader.readline(), self.timeout))
+                self.sent += 1
+                return bool(reply.get('ok'))
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                self.failed += 1
+                # A timed-out reply would be read as the answer to the next command; start over instead
+                self._drop(path)
+                logger.warning(f"Could not deliver engine command to {path}: {str(e) or type(e).__name__}")
+                return False
+
+    def _drop(self, path: str):
+        connection = self._connections.pop(path, None)
+        if connection is not None:
+            connection[1].close()
+
+    async def close(self):
+        for path in list(self._connections):
+            self._drop(path)
+
+    def get_stats(self) -> Dict:
+        return {
+            'engines': len(_socket_paths(self.directory)),
+            'connections': len(self._connections),
+            'sent': self.sent,
+            'failed': self.failed,
+        }
+
+engine_commands = EngineCommandClient(settings.ENGINE_SOCKET_DIR, timeout=settings.ENGINE_COMMAND_TIMEOUT)
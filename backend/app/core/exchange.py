@@ -1,48 +1,164 @@
 import ccxt.async_support as ccxt
+import asyncio
+import time
 from typing import Dict, List, Optional
 from datetime import datetime
-import time
 from fastapi import HTTPException
 import logging
 from app.core.config import settings
+from app.core.rate_limiter import rate_limiter
+from app.core.cache import market_data_cache
+from app.core.markets import markets_catalog
+from app.core.order_book import order_book_manager
+from app.core.shared_market_data import shared_market_data
+from app.core.resilience import CircuitBreaker, CircuitOpenError, resilient_caller
+from app.core.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Symbols broken out in metrics; everything else is grouped so label cardinality stays bounded
+MAJOR_SYMBOLS = {'BTC/USDT', 'ETH/USDT'}
+
+EXCHANGE_REQUEST_SECONDS = metrics.histogram(
+    'exchange_request_duration_seconds',
+    'Time spent waiting on a single MEXC API request',
+    ('method', 'symbol_class')
+)
+EXCHANGE_CALL_SECONDS = metrics.histogram(
+    'exchange_call_duration_seconds',
+    'End-to-end MEXCExchange call time, including rate limiting and retries',
+    ('method', 'symbol_class')
+)
+EXCHANGE_ERRORS = metrics.counter(
+    'exchange_errors_total',
+    'MEXCExchange calls that failed after retries',
+    ('method', 'symbol_class', 'error')
+)
+RATE_LIMIT_WAIT_SECONDS = metrics.histogram(
+    'exchange_rate_limit_wait_seconds',
+    'Time spent waiting for the exchange rate limiter',
+    ('endpoint',)
+)
+
+def symbol_class(args: tuple) -> str:
+    """Classify the symbol argument of an exchange call for metric labels."""
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            return 'batch'
+        if isinstance(arg, str) and '/' in arg:
+            if arg in MAJOR_SYMBOLS:
+                return 'major'
+            return 'usdt' if arg.endswith('/USDT') else 'other'
+    return 'none'
+
 class MEXCExchange:
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(self, api_key: str, api_secret: str, use_shared_feed: bool = True):
         """Initialize MEXC exchange connection with API credentials."""
         self.exchange = ccxt.mexc({
             'apiKey': api_key,
             'secret': api_secret,
-            'enableRateLimit': True,
+            # Every call already waits for the shared TokenBucketRateLimiter; ccxt's own throttle would stack on top
+            'enableRateLimit': False,
             'options': {
                 'defaultType': 'spot',
                 'recvWindow': 60000,  # Increased from default 5000
                 'adjustForTimeDifference': True
             }
         })
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between requests
+        self.rate_limiter = rate_limiter
+        self.cache = market_data_cache
+        # Latest tickers and books published by the collector sidecar, when it is running
+        self.shared_feed = shared_market_data if use_shared_feed else None
+        self.resilience = resilient_caller
+        self.stale_served = 0
+
+    async def _rate_limit(self, endpoint: str = 'default'):
+        """Wait for the process-wide rate limiter without blocking the event loop."""
+        waited = await self.rate_limiter.acquire(endpoint)
+        RATE_LIMIT_WAIT_SECONDS.observe(waited, endpoint)
+
+    async def reserve_rate_limit(self, endpoint: str):
+        """Take a rate limiter token ahead of a time-critical call made with `rate_limit_acquired=True`."""
+        await self._rate_limit(endpoint)
+
+    async def _call(
+        self,
+        endpoint: str,
+        method: str,
+        *args,
+        idempotent: bool = True,
+        rate_limit_acquired: bool = False,
+        **kwargs
+    ):
+        """Call a ccxt method with rate limiting, timeouts, retries and the endpoint's circuit breaker."""
+        labels = (method, symbol_class(args))
+        prepaid = [rate_limit_acquired]
 
-    def _rate_limit(self):
-        """Implement rate limiting to avoid hitting API limits."""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last_request)
-        self.last_request_time = time.time()
+        async def before_attempt():
+            # The first attempt may already hold a reserved token; retries always queue
+            if prepaid[0]:
+                prepaid[0] = False
+                return
+            await self._rate_limit(endpoint)
+
+        async def request():
+            start = time.perf_counter()
+            try:
+                return await getattr(self.exchange, method)(*args, **kwargs)
+            finally:
+                EXCHANGE_REQUEST_SECONDS.observe(time.perf_counter() - start, *labels)
+
+        start = time.perf_counter()
+        try:
+            return await self.resilience.call(
+                endpoint,
+                request,
+                idempotent=idempotent,
+                before_attempt=before_attempt
+            )
+        except Exception as e:
+            EXCHANGE_ERRORS.inc(*labels, type(e).__name__)
+            raise
+        finally:
+            EXCHANGE_CALL_SECONDS.observe(time.perf_counter() - start, *labels)
+
+    def _stale_or_unavailable(self, key, description: str):
+        """Serve the last cached value, however old, while an endpoint's circuit is open."""
+        stale = self.cache.get(key, allow_stale=True)
+        if stale is None:
+            raise HTTPException(
+                status_code=503,
+                detail=f"MEXC is temporarily unavailable and no cached {description} exists"
+            )
+        self.stale_served += 1
+        return stale
+
+    def get_stats(self) -> Dict:
+        """Return runtime statistics for this exchange client."""
+        return {
+            'rate_limiter': self.rate_limiter.get_stats(),
+            'cache': self.cache.get_stats(),
+            'order_books': order_book_manager.get_stats(),
+            'shared_feed': self.shared_feed.get_stats() if self.shared_feed else None,
+            'resilience': self.resilience.get_stats(),
+            'stale_served': self.stale_served
+        }
 
     async def validate_connection(self) -> bool:
         """Validate API connection and credentials."""
         try:
-            self._rate_limit()
-            await self.exchange.fetch_balance()
+            await self._call('fetch_balance', 'fetch_balance')
             return True
         except ccxt.AuthenticationError:
             raise HTTPException(
                 status_code=401,
                 detail="Invalid API credentials"
             )
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="MEXC is temporarily unavailable"
+            )
         except Exception as e:
             logger.error(f"Connection validation error: {str(e)}")
             raise HTTPException(
@@ -52,9 +168,24 @@ class MEXCExchange:
 
     async def fetch_ticker(self, symbol: str) -> Dict:
         """Fetch current ticker data for a trading pair."""
+        if self.shared_feed is not None:
+            ticker = self.shared_feed.get_ticker(symbol)
+            if ticker is not None:
+                return ticker
+        try:
+            return await self.cache.get_or_fetch(
+                ('ticker', symbol),
+                settings.CACHE_TTL_TICKER,
+                lambda: self._fetch_ticker(symbol)
+            )
+        except CircuitOpenError:
+            return self._stale_or_unavailable(('ticker', symbol), f"ticker for {symbol}")
+
+    async def _fetch_ticker(self, symbol: str) -> Dict:
         try:
-            self._rate_limit()
-            return await self.exchange.fetch_ticker(symbol)
+            return await self._call('fetch_ticker', 'fetch_ticker', symbol)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching ticker for {symbol}: {str(e)}")
             raise HTTPException(
@@ -62,11 +193,80 @@ class MEXCExchange:
                 detail=f"Failed to fetch ticker data for {symbol}"
             )
 
-    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1h', limit: int = 100) -> List:
-        """Fetch OHLCV (candlestick) data for a trading pair."""
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch ticker data for many trading pairs, keyed by symbol."""
+        symbols = list(dict.fromkeys(symbols))
+        tickers = {}
+        if self.shared_feed is not None:
+            for symbol in symbols:
+                ticker = self.shared_feed.get_ticker(symbol)
+                if ticker is not None:
+                    tickers[symbol] = ticker
+        cached = self.cache.get_many([('ticker', symbol) for symbol in symbols if symbol not in tickers])
+        tickers.update({key[1]: ticker for key, ticker in cached.items()})
+        missing = [symbol for symbol in symbols if symbol not in tickers]
+        if missing:
+            try:
+                fetched = await self.cache.get_or_fetch(
+                    ('tickers', tuple(sorted(missing))),
+                    0,  # Coalesce identical bulk requests; results are cached per symbol below
+                    lambda: self._fetch_tickers(missing)
+                )
+            except CircuitOpenError:
+                # Serve whatever stale tickers we still hold
+                stale = self.cache.get_many_stale([('ticker', symbol) for symbol in missing])
+                self.stale_served += len(stale)
+                tickers.update({key[1]: ticker for key, ticker in stale.items()})
+                return tickers
+            for symbol, ticker in fetched.items():
+                self.cache.set(('ticker', symbol), ticker, settings.CACHE_TTL_TICKER)
+            tickers.update(fetched)
+        return tickers
+
+    async def _fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        if self.exchange.has.get('fetchTickers'):
+            try:
+                tickers = await self._call('fetch_tickers', 'fetch_tickers', symbols)
+                return {symbol: tickers[symbol] for symbol in symbols if symbol in tickers}
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                logger.error(f"Error fetching tickers for {len(symbols)} symbols: {str(e)}")
+                raise HTTPException(
+                    status_code=500,
+                    detail="Failed to fetch ticker data"
+                )
+
+        # The venue can't batch, so fan out with bounded concurrency
+        semaphore = asyncio.Semaphore(settings.EXCHANGE_FANOUT_CONCURRENCY)
+
+        async def fetch_one(symbol: str) -> Optional[Dict]:
+            async with semaphore:
+                try:
+                    return await self._fetch_ticker(symbol)
+                except HTTPException:
+                    return None
+
+        results = await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+        return {symbol: ticker for symbol, ticker in zip(symbols, results) if ticker is not None}
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1h', limit: int = 100, since: Optional[int] = None) -> List:
+        """Fetch OHLCV (candlestick) data for a trading pair, starting at `since` (epoch ms) if given."""
+        key = ('ohlcv', symbol, timeframe, limit, since)
+        try:
+            return await self.cache.get_or_fetch(
+                key,
+                settings.CACHE_TTL_OHLCV,
+                lambda: self._fetch_ohlcv(symbol, timeframe, limit, since)
+            )
+        except CircuitOpenError:
+            return self._stale_or_unavailable(key, f"OHLCV data for {symbol}")
+
+    async def _fetch_ohlcv(self, symbol: str, timeframe: str, limit: int, since: Optional[int] = None) -> List:
         try:
-            self._rate_limit()
-            return await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            return await self._call('fetch_ohlcv', 'fetch_ohlcv', symbol, timeframe, since=since, limit=limit)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching OHLCV for {symbol}: {str(e)}")
             raise HTTPException(
@@ -76,9 +276,28 @@ class MEXCExchange:
 
     async def fetch_order_book(self, symbol: str, limit: int = 20) -> Dict:
         """Fetch order book data for a trading pair."""
+        if self.shared_feed is not None:
+            order_book = self.shared_feed.get_order_book(symbol, limit)
+            if order_book is not None:
+                return order_book
         try:
-            self._rate_limit()
-            return await self.exchange.fetch_order_book(symbol, limit)
+            return await self.cache.get_or_fetch(
+                ('order_book', symbol, limit),
+                settings.CACHE_TTL_ORDER_BOOK,
+                lambda: self._fetch_order_book(symbol, limit)
+            )
+        except CircuitOpenError:
+            return self._stale_or_unavailable(('order_book', symbol, limit), f"order book for {symbol}")
+
+    async def fetch_order_book_snapshot(self, symbol: str, limit: int = 100) -> Dict:
+        """Fetch a fresh, uncached order book snapshot for seeding a local book."""
+        return await self._fetch_order_book(symbol, limit)
+
+    async def _fetch_order_book(self, symbol: str, limit: int) -> Dict:
+        try:
+            return await self._call('fetch_order_book', 'fetch_order_book', symbol, limit)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching order book for {symbol}: {str(e)}")
             raise HTTPException(
@@ -86,16 +305,32 @@ class MEXCExchange:
                 detail=f"Failed to fetch order book for {symbol}"
             )
 
-    async def create_market_order(self, symbol: str, side: str, amount: float) -> Dict:
-        """Create a market order."""
+    async def create_market_order(
+        self,
+        symbol: str,
+        side: str,
+        amount: float,
+        rate_limit_acquired: bool = False,
+        client_order_id: Optional[str] = None
+    ) -> Dict:
+        """Create a market order, optionally tagged with a client order id it can later be looked up by."""
         try:
-            self._rate_limit()
-            return await self.exchange.create_market_order(symbol, side, amount)
+            params = {'clientOrderId': client_order_id} if client_order_id else {}
+            # Never retried or hedged: a repeated order would trade twice
+            return await self._call(
+                'create_order', 'create_market_order', symbol, side, amount,
+                idempotent=False, rate_limit_acquired=rate_limit_acquired, params=params
+            )
         except ccxt.InsufficientFunds:
             raise HTTPException(
                 status_code=400,
                 detail="Insufficient funds for order"
             )
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="MEXC is temporarily unavailable"
+            )
         except Exception as e:
             logger.error(f"Error creating market order for {symbol}: {str(e)}")
             raise HTTPException(
@@ -106,13 +341,18 @@ class MEXCExchange:
     async def create_limit_order(self, symbol: str, side: str, amount: float, price: float) -> Dict:
         """Create a limit order."""
         try:
-            self._rate_limit()
-            return await self.exchange.create_limit_order(symbol, side, amount, price)
+            # Never retried or hedged: a repeated order would trade twice
+            return await self._call('create_order', 'create_limit_order', symbol, side, amount, price, idempotent=False)
         except ccxt.InsufficientFunds:
             raise HTTPException(
                 status_code=400,
                 detail="Insufficient funds for order"
             )
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="MEXC is temporarily unavailable"
+            )
         except Exception as e:
             logger.error(f"Error creating limit order for {symbol}: {str(e)}")
             raise HTTPException(
@@ -123,8 +363,12 @@ class MEXCExchange:
     async def fetch_order(self, order_id: str, symbol: Optional[str] = None) -> Dict:
         """Fetch order status by ID."""
         try:
-            self._rate_limit()
-            return await self.exchange.fetch_order(order_id, symbol)
+            return await self._call('fetch_order', 'fetch_order', order_id, symbol)
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="MEXC is temporarily unavailable"
+            )
         except Exception as e:
             logger.error(f"Error fetching order {order_id}: {str(e)}")
             raise HTTPException(
@@ -132,11 +376,49 @@ class MEXCExchange:
                 detail=f"Failed to fetch order {order_id}"
             )
 
+    async def fetch_order_by_client_id(self, client_order_id: str, symbol: str) -> Optional[Dict]:
+        """Fetch an order by the client order id it was created with; None if the exchange never received it."""
+        try:
+            return await self._call('fetch_order', 'fetch_order', None, symbol, params={'clientOrderId': client_order_id})
+        except ccxt.OrderNotFound:
+            return None
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="MEXC is temporarily unavailable"
+            )
+        except Exception as e:
+            logger.error(f"Error fetching order with client id {client_order_id}: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to fetch order {client_order_id}"
+            )
+
+    async def fetch_closed_orders(self, symbol: str, since: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Fetch a symbol's finished orders since `since` (epoch ms) in one request."""
+        try:
+            return await self._call('fetch_orders', 'fetch_closed_orders', symbol, since, limit)
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="MEXC is temporarily unavailable"
+            )
+        except Exception as e:
+            logger.error(f"Error fetching closed orders for {symbol}: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to fetch closed orders for {symbol}"
+            )
+
     async def cancel_order(self, order_id: str, symbol: Optional[str] = None) -> Dict:
         """Cancel an existing order."""
         try:
-            self._rate_limit()
-            return await self.exchange.cancel_order(order_id, symbol)
+            return await self._call('cancel_order', 'cancel_order', order_id, symbol, idempotent=False)
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="MEXC is temporarily unavailable"
+            )
         except Exception as e:
             logger.error(f"Error canceling order {order_id}: {str(e)}")
             raise HTTPException(
@@ -144,11 +426,25 @@ class MEXCExchange:
                 detail=f"Failed to cancel order {order_id}"
             )
 
+    async def fetch_time(self, rate_limit_acquired: bool = False) -> int:
+        """Fetch the exchange server time in milliseconds; raises CircuitOpenError while its breaker is open."""
+        return await self._call('fetch_time', 'fetch_time', rate_limit_acquired=rate_limit_acquired)
+
+    async def warm_up(self):
+        """Load market definitions and open a connection ahead of time-critical orders."""
+        if not self.exchange.markets:
+            await self._call('fetch_markets', 'load_markets')
+        await self.fetch_time()
+
     async def fetch_balance(self) -> Dict:
         """Fetch account balance."""
         try:
-            self._rate_limit()
-            return await self.exchange.fetch_balance()
+            return await self._call('fetch_balance', 'fetch_balance')
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="MEXC is temporarily unavailable"
+            )
         except Exception as e:
             logger.error(f"Error fetching balance: {str(e)}")
             raise HTTPException(
@@ -159,9 +455,14 @@ class MEXCExchange:
     async def fetch_markets(self):
         """Return a list of available markets/trading pairs."""
         try:
-            self._rate_limit()
-            markets = await self.exchange.fetch_markets()
+            markets = await self._call('fetch_markets', 'fetch_markets')
             return [{"symbol": market["symbol"]} for market in markets]
+        except CircuitOpenError:
+            # Serve the last known catalog, like the ticker paths serve stale tickers
+            if not markets_catalog.markets:
+                raise
+            self.stale_served += 1
+            return [{"symbol": symbol} for symbol in markets_catalog.markets]
         except Exception as e:
             logger.error(f"Error fetching markets: {str(e)}")
             raise HTTPException(
@@ -169,6 +470,27 @@ class MEXCExchange:
                 detail="Failed to fetch markets"
             )
 
+    async def fetch_market_metadata(self) -> List[Dict]:
+        """Return full market metadata (type, status, precision, limits) for every market.
+
+        Raises CircuitOpenError while the breaker is open, so callers can keep their last copy.
+        """
+        try:
+            return await self._call('fetch_markets', 'fetch_markets')
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching market metadata: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to fetch markets"
+            )
+
+    async def fetch_quote_volumes(self) -> Dict[str, float]:
+        """Return the 24h quote volume of every market from one bulk request, bypassing the ticker cache."""
+        tickers = await self._call('fetch_tickers', 'fetch_tickers')
+        return {symbol: ticker.get('quoteVolume') or 0.0 for symbol, ticker in tickers.items()}
+
     async def close(self):
         """Close the exchange connection."""
         await self.exchange.close()
@@ -177,10 +499,16 @@ class MEXCExchange:
         """Get comprehensive market summary for a symbol."""
         try:
             logger.info(f"Fetching ticker for {symbol}")
-            ticker = await self.exchange.fetch_ticker(symbol)
-            logger.info(f"Ticker for {symbol}: {ticker}")
-            order_book = await self.exchange.fetch_order_book(symbol, limit=5)
-            logger.info(f"Order book for {symbol}: {order_book}")
+            ticker = await self.fetch_ticker(symbol)
+
+            # Best bid/ask come from the streamed local book when one is live
+            book = order_book_manager.get(symbol)
+            if book is not None:
+                bid, ask = book.best_bid(), book.best_ask()
+            else:
+                order_book = await self.fetch_order_book(symbol, limit=5)
+                bid = order_book['bids'][0][0] if order_book['bids'] else None
+                ask = order_book['asks'][0][0] if order_book['asks'] else None
 
             return {
                 'symbol': symbol,
@@ -188,8 +516,8 @@ class MEXCExchange:
                 '24h_high': ticker['high'],
                 '24h_low': ticker['low'],
                 '24h_volume': ticker['quoteVolume'],
-                'bid': order_book['bids'][0][0] if order_book['bids'] else None,
-                'ask': order_book['asks'][0][0] if order_book['asks'] else None,
+                'bid': bid,
+                'ask': ask,
                 'timestamp': datetime.utcnow().isoformat()
             }
         except Exception as e:
@@ -198,27 +526,36 @@ class MEXCExchange:
 
     async def get_available_trading_pairs(self) -> List[str]:
         """Get a limited list of available trading pairs from MEXC, sorted by volume."""
-        try:
-            markets = await self.exchange.fetch_markets()
-            filtered = [
-                market for market in markets
-                if market.get('active', True)
-                and market.get('type', 'spot') == 'spot'
-                and market['symbol'].endswith('/USDT')
-            ]
-            # Add this after filtering
-            logger.info(f"First filtered market: {filtered[0]}")
-            logger.info(f"First filtered market info: {filtered[0].get('info', {})}")
-            # Sort by quoteVolume or baseVolume if available, descending
-            sorted_markets = sorted(
-                filtered,
-                key=lambda m: m.get('info', {}).get('volume', 0),  # Adjust key as needed
-                reverse=True
-            )
-            return [market['symbol'] for market in sorted_markets[:20]]
-        except Exception as e:
-            logger.error(f"Error fetching trading pairs: {str(e)}")
-            raise
+        # Served from the markets index; only a cold start without a snapshot waits on MEXC
+        if not markets_catalog.trading_pairs:
+            await markets_catalog.refresh(self)
+        return markets_catalog.get_trading_pairs(20)
+
+def _resilience_stat(field: str):
+    return lambda: {(endpoint,): stats[field] for endpoint, stats in resilient_caller.get_stats().items()}
+
+BREAKER_STATES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+metrics.gauge(
+    'exchange_circuit_breaker_state',
+    'Circuit breaker state per endpoint (0 closed, 1 half-open, 2 open)',
+    ('endpoint',),
+    collect=lambda: {(endpoint,): BREAKER_STATES[stats['breaker_state']] for endpoint, stats in resilient_caller.get_stats().items()}
+)
+metrics.counter('exchange_retries_total', 'Retried exchange requests per endpoint', ('endpoint',), collect=_resilience_stat('retries'))
+metrics.counter('exchange_timeouts_total', 'Timed out exchange requests per endpoint', ('endpoint',), collect=_resilience_stat('timeouts'))
+metrics.gauge('exchange_rate_limit_queue_depth', 'Requests waiting for the rate limiter', collect=lambda: {(): rate_limiter.queue_depth})
+metrics.gauge('market_data_cache_entries', 'Entries in the market data cache', collect=lambda: {(): market_data_cache.get_stats()['entries']})
+metrics.counter(
+    'market_data_cache_lookups_total',
+    'Market data cache lookups by result',
+    ('result',),
+    collect=lambda: {
+        ('hit',): market_data_cache.hits,
+        ('miss',): market_data_cache.misses,
+        ('coalesced',): market_data_cache.coalesced
+    }
+)
 
 from app.core.exchange import MEXCExchange
 from app.core.config import settings
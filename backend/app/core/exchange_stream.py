@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+import websockets
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UpdateHandler = Callable[[Dict], Awaitable[None]]
+DisconnectHandler = Callable[[List[str]], None]
+
+# MEXC spot v3 public channel templates, formatted with the exchange market id (e.g. BTCUSDT)
+CHANNELS = {
+    'ticker': 'spot@public.miniTicker.v3.api@{market_id}@UTC+0',
+    'trade': 'spot@public.deals.v3.api@{market_id}',
+    'depth': 'spot@public.increase.depth.v3.api@{market_id}',
+}
+
+def to_market_id(symbol: str) -> str:
+    """Convert a unified symbol (BTC/USDT) to the exchange market id (BTCUSDT)."""
+    return symbol.replace('/', '')
+
+class ExchangeStreamClient:
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        channels: Iterable[str] = ('ticker', 'trade', 'depth'),
+        url: Optional[str] = None,
+        max_subscriptions: Optional[int] = None
+    ):
+        """Initialize a push-based market data client for the MEXC spot WebSocket API."""
+        self.url = url or settings.MEXC_WS_URL
+        self.symbols = list(dict.fromkeys(symbols))
+        self.channels = list(channels)
+        self.max_subscriptions = max_subscriptions or settings.MEXC_WS_MAX_SUBSCRIPTIONS
+        self._symbols_by_id = {to_market_id(symbol): symbol for symbol in self.symbols}
+        self._handlers: List[UpdateHandler] = []
+        self._disconnect_handlers: List[DisconnectHandler] = []
+        self._tasks: List[asyncio.Task] = []
+
+        # Statistics
+        self.messages_received = 0
+        self.updates_dispatched = 0
+        self.reconnects = 0
+        self.connected = 0
+        self.last_message_at: Optional[float] = None
+
+    def add_handler(self, handler: UpdateHandler):
+        """Register a coroutine called with every normalised update."""
+        self._handlers.append(handler)
+
+    def add_disconnect_handler(self, handler: DisconnectHandler):
+        """Register a callback receiving the symbols whose updates may have been missed."""
+        self._disconnect_handlers.append(handler)
+
+    def _topics(self) -> List[str]:
+        return [
+            CHANNELS[channel].format(market_id=to_market_id(symbol))
+            for symbol in self.symbols
+            for channel in self.channels
+        ]
+
+    async def start(self):
+        """Open connections and subscribe; MEXC caps subscriptions per connection so topics are spread out."""
+        topics = self._topics()
+        for i in range(0, len(topics), self.max_subscriptions):
+            chunk = topics[i:i + self.max_subscriptions]
+            self._tasks.append(asyncio.create_task(self._run_connection(chunk)))
+        logger.info(f"Streaming {len(topics)} topics over {len(self._tasks)} connection(s) from {self.url}")
+
+    async def stop(self):
+        """Close all connections."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self):
+        """Start streaming and block until stopped."""
+        await self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def _run_connection(self, topics: List[str]):
+        """Keep one connection alive, resubscribing to `topics` after every reconnect."""
+        backoff = settings.MEXC_WS_RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=None, max_size=2 ** 22) as ws:
+                    await ws.send(json.dumps({'method': 'SUBSCRIPTION', 'params': topics}))
+                    self.connected += 1
+                    backoff = settings.MEXC_WS_RECONNECT_MIN_DELAY
+                    keepalive = asyncio.create_task(self._keepalive(ws))
+                    try:
+                        async for raw in ws:
+                            await self._handle_message(raw)
+                    finally:
+                        keepalive.cancel()
+                        self.connected -= 1
+                        self._notify_disconnect(topics)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Market data stream disconnected: {str(e)}")
+
+            self.reconnects += 1
+            # Full jitter so many workers don't reconnect in lockstep
+            await asyncio.sleep(random.uniform(0, backoff))
+            backoff = min(backoff * 2, settings.MEXC_WS_RECONNECT_MAX_DELAY)
+
+    def _notify_disconnect(self, topics: List[str]):
+        symbols = list({self._symbols_by_id[topic.split('@')[2]] for topic in topics})
+        for handler in self._disconnect_handlers:
+            handler(symbols)
+
+    async def _keepalive(self, ws):
+        # MEXC drops connections that stay silent for 60 seconds
+        while True:
+            await asyncio.sleep(settings.MEXC_WS_PING_INTERVAL)
+            await ws.send(json.dumps({'method': 'PING'}))
+
+    async def _handle_message(self, raw):
+        self.messages_received += 1
+        self.last_message_at = time.time()
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logger.warning(f"Ignoring non-JSON stream message: {raw[:100]!r}")
+            return
+
+        update = self.normalize(message)
+        if update is None:
+            return
+        self.updates_dispatched += 1
+        for handler in self._handlers:
+            try:
+                await handler(update)
+            except Exception as e:
+                logger.error(f"Error handling {update['type']} update for {update['symbol']}: {str(e)}")
+
+    def normalize(self, message: Dict) -> Optional[Dict]:
+        """Convert a raw MEXC push message into a normalised update, or None for control messages."""
+        channel = message.get('c')
+        data = message.get('d')
+        if not channel or data is None:
+            # Subscription acks and PONGs
+            return None
+
+        symbol = self._symbols_by_id.get(message.get('s'))
+        if symbol is None:
+            return None
+        timestamp = message.get('t') or int(time.time() * 1000)
+
+        if channel.startswith('spot@public.miniTicker'):
+            return {
+                'type': 'ticker',
+                'symbol': symbol,
+                'price': float(data['p']),
+                'high': float(data['h']),
+                'low': float(data['l']),
+                'volume': float(data['v']),
+                'timestamp': timestamp
+            }
+        if channel.startswith('spot@public.deals'):
+            return {
+                'type': 'trade',
+                'symbol': symbol,
+                'trades': [
+                    {
+                        'side': 'buy' if deal['S'] == 1 else 'sell',
+                        'price': float(deal['p']),
+                        'amount': float(deal['v']),
+                        'timestamp': deal['t']
+                    }
+                    for deal in data.get('deals', [])
+                ],
+                'timestamp': timestamp
+            }
+        if channel.startswith('spot@public.increase.depth'):
+            return {
+                'type': 'depth',
+                'symbol': symbol,
+                'bids': [[float(level['p']), float(level['v'])] for level in data.get('bids', [])],
+                'asks': [[float(level['p']), float(level['v'])] for level in data.get('asks', [])],
+                'version': int(data['r']),
+                'timestamp': timestamp
+            }
+        return None
+
+    def get_stats(self) -> Dict:
+        """Return connection and throughput counters."""
+        return {
+            'url': self.url,
+            'symbols': len(self.symbols),
+            'connections': len(self._tasks),
+            'connected': self.connected,
+            'messages_received': self.messages_received,
+            'updates_dispatched': self.updates_dispatched,
+            'reconnects': self.reconnects,
+            'last_message_at': self.last_message_at,
+        }
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    'execution_pool_queue_wait_seconds',
+    'Time a job waited in the execution pool before starting'
+)
+EXECUTION_SECONDS = metrics.histogram(
+    'execution_pool_execution_seconds',
+    'Time spent running an execution pool job'
+)
+
+class ExecutionPool:
+    def __init__(self, concurrency: int = 8, max_queued: int = 1000):
+        """Initialize a pool running at most `concurrency` jobs, one at a time per lane, in FIFO order."""
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self._lanes: Dict[str, Deque[Tuple[Job, asyncio.Future, float]]] = {}
+        # Lanes with queued work and no running job, in the order they became ready
+        self._ready: Optional[asyncio.Queue] = None
+        self._capacity: Optional[asyncio.Semaphore] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Set[str] = set()
+
+        # Statistics
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+
+        metrics.gauge('execution_pool_queue_depth', 'Jobs waiting in the execution pool', collect=lambda: {(): self.queued})
+        metrics.gauge('execution_pool_running', 'Jobs currently running in the execution pool', collect=lambda: {(): len(self._running)})
+
+    def start(self):
+        """Start the worker tasks on the running event loop."""
+        if not self._workers:
+            self._ready = asyncio.Queue()
+            self._capacity = asyncio.Semaphore(self.max_queued)
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """Stop the workers; jobs still queued are cancelled."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for lane in self._lanes.values():
+            for _, future, _ in lane:
+                future.cancel()
+        self._lanes = {}
+        self._running = set()
+        self.queued = 0
+
+    async def submit(self, lane: str, job: Job) -> Any:
+        """Run `job` after everything queued before it on `lane`, waiting for room if the pool is full."""
+        self.start()
+        # Backpressure: callers wait here instead of growing the queue without bound
+        await self._capacity.acquire()
+        future = asyncio.get_running_loop().create_future()
+        queue = self._lanes.get(lane)
+        if queue is None:
+            queue = self._lanes[lane] = deque()
+            if lane not in self._running:
+                self._ready.put_nowait(lane)
+        queue.append((job, future, time.monotonic()))
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        return await future
+
+    async def _worker(self):
+        while True:
+            lane = await self._ready.get()
+            queue = self._lanes[lane]
+            job, future, queued_at = queue.popleft()
+            if not queue:
+                del self._lanes[lane]
+            self.queued -= 1
+            self._running.add(lane)
+            started = time.monotonic()
+            QUEUE_WAIT_SECONDS.observe(started - queued_at)
+            try:
+                if not future.cancelled():
+                    future.set_result(await job())
+                self.completed += 1
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                EXECUTION_SECONDS.observe(time.monotonic() - started)
+                self._running.discard(lane)
+                self._capacity.release()
+                # Requeue the lane behind the others so one busy pair can't starve the rest
+                if lane in self._lanes:
+                    self._ready.put_nowait(lane)
+            # Let other tasks run between jobs during a burst
+            await asyncio.sleep(0)
+
+    def get_stats(self) -> Dict:
+        return {
+            'concurrency': self.concurrency,
+            'queued': self.queued,
+            'max_queue_depth': self.max_queue_depth,
+            'running': len(self._running),
+            'lanes': len(self._lanes),
+            'completed': self.completed,
+            'failed': self.failed,
+        }
@@ -0,0 +1,152 @@
+"""Local stand-in for the MEXC spot WebSocket API, for offline testing and benchmarking.
+
+Serve:      python -m app.core.fake_stream_server --port 8765 --rate 50
+Benchmark:  python -m app.core.fake_stream_server --bench 10 --symbols 20 --rate 200
+
+Point the application at it with MEXC_WS_URL=ws://127.0.0.1:8765.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Set
+import websockets
+
+logger = logging.getLogger(__name__)
+
+class FakeStreamServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, rate: float = 10.0):
+        """Initialize a server emitting `rate` synthetic messages per second per subscribed topic."""
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self._server = None
+        self._connections: Set = set()
+        self._prices: Dict[str, float] = {}
+        self._versions: Dict[str, int] = {}
+        self.messages_sent = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        # Pick up the real port when started with port=0
+        self.port = next(iter(self._server.sockets)).getsockname()[1]
+        logger.info(f"Fake stream server listening on {self.url}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def drop_connections(self):
+        """Close every client connection, to exercise reconnect and resubscription."""
+        for ws in list(self._connections):
+            await ws.close()
+
+    async def _handle(self, ws, path: Optional[str] = None):
+        self._connections.add(ws)
+        publishers: List[asyncio.Task] = []
+        try:
+            async for raw in ws:
+                request = json.loads(raw)
+                method = request.get('method')
+                if method == 'PING':
+                    await ws.send(json.dumps({'id': 0, 'code': 0, 'msg': 'PONG'}))
+                elif method == 'SUBSCRIPTION':
+                    for topic in request.get('params', []):
+                        await ws.send(json.dumps({'id': 0, 'code': 0, 'msg': topic}))
+                        publishers.append(asyncio.create_task(self._publish(ws, topic)))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in publishers:
+                task.cancel()
+            self._connections.discard(ws)
+
+    async def _publish(self, ws, topic: str):
+        interval = 1.0 / self.rate
+        next_at = time.monotonic()
+        while True:
+            await ws.send(json.dumps(self._message(topic)))
+            self.messages_sent += 1
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+    def _message(self, topic: str) -> Dict:
+        channel, market_id = topic.split('@')[1:3]
+        price = self._prices.get(market_id, 100.0) * (1 + random.gauss(0, 0.0005))
+        self._prices[market_id] = price
+        now = int(time.time() * 1000)
+
+        if channel == 'public.miniTicker.v3.api':
+            data = {
+                's': market_id, 'p': f"{price:.4f}", 'r': '0.0000',
+                'h': f"{price * 1.01:.4f}", 'l': f"{price * 0.99:.4f}",
+                'v': f"{random.uniform(1e5, 1e6):.2f}", 'q': f"{random.uniform(1e3, 1e4):.4f}"
+            }
+        elif channel == 'public.deals.v3.api':
+            data = {
+                'deals': [{'S': random.choice((1, 2)), 'p': f"{price:.4f}", 'v': f"{random.uniform(0.001, 1):.6f}", 't': now}],
+                'e': 'spot@public.deals.v3.api'
+            }
+        else:
+            version = self._versions.get(market_id, 1000) + 1
+            self._versions[market_id] = version
+            data = {
+                'bids': [{'p': f"{price * (1 - 0.0001 * random.randint(1, 20)):.4f}", 'v': f"{random.choice((0, random.uniform(0.1, 5))):.4f}"}],
+                'asks': [{'p': f"{price * (1 + 0.0001 * random.randint(1, 20)):.4f}", 'v': f"{random.choice((0, random.uniform(0.1, 5))):.4f}"}],
+                'e': 'spot@public.increase.depth.v3.api',
+                'r': str(version)
+            }
+        return {'c': topic, 'd': data, 's': market_id, 't': now}
+
+async def run_benchmark(duration: float, symbol_count: int, rate: float):
+    """Stream from a local fake server through ExchangeStreamClient and report throughput and latency."""
+    from app.core.exchange_stream import ExchangeStreamClient
+
+    server = FakeStreamServer(port=0, rate=rate)
+    await server.start()
+    symbols = [f"SYM{i}/USDT" for i in range(symbol_count)]
+    client = ExchangeStreamClient(symbols, url=server.url)
+    latencies: List[float] = []
+
+    async def record(update: Dict):
+        latencies.append(time.time() * 1000 - update['timestamp'])
+
+    client.add_handler(record)
+    await client.start()
+    await asyncio.sleep(duration)
+    await client.stop()
+    await server.stop()
+
+    latencies.sort()
+    count = len(latencies)
+    print(f"updates: {count} ({count / duration:.0f}/s), messages sent: {server.messages_sent}")
+    if count:
+        print(f"latency ms p50={latencies[count // 2]:.2f} p99={latencies[int(count * 0.99)]:.2f} max={latencies[-1]:.2f}")
+
+async def serve_forever(host: str, port: int, rate: float):
+    server = FakeStreamServer(host=host, port=port, rate=rate)
+    await server.start()
+    await asyncio.Future()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=10.0, help='messages per second per topic')
+    parser.add_argument('--bench', type=float, metavar='SECONDS', help='run a client benchmark instead of serving')
+    parser.add_argument('--symbols', type=int, default=10, help='symbols to subscribe in benchmark mode')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.bench:
+        asyncio.run(run_benchmark(args.bench, args.symbols, args.rate))
+    else:
+        asyncio.run(serve_forever(args.host, args.port, args.rate))
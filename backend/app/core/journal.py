@@ -0,0 +1,255 @@
+"""Append-only write-ahead journal of scheduled order executions.
+
+Each aggregated order moves through intent -> submitted -> filled (or failed). The intent,
+carrying the order's client id, is fsynced before the order can be sent, so after a crash
+every order that might have reached the exchange is known and can be looked up by that id.
+Periodic snapshots hold the engine's armed legs and the intents still in flight; recovery
+reads the latest snapshot plus the short tail of records written after it.
+
+Several engine processes can share one base directory: each takes the first slot directory
+whose lock is free, so a restarted process recovers the journal of one that exited.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Leg = Tuple[str, int]
+
+class JournalState:
+    def __init__(self):
+        """State rebuilt from the snapshot and the journal tail."""
+        self.seq = 0
+        self.snapshot_found = False
+        self.watermark: Optional[str] = None
+        # Whatever the engine passed to snapshot()
+        self.armed: Any = None
+        self.in_flight: Dict[str, Dict] = {}
+        # Legs whose intent was filled or failed after the snapshot was taken
+        self.settled: Set[Leg] = set()
+
+class ExecutionJournal:
+    LOG_NAME = 'journal.log'
+    SNAPSHOT_NAME = 'snapshot.json'
+
+    MAX_SLOTS = 64
+
+    def __init__(self, base_directory: str, flush_interval: float = 0.05):
+        """Initialize a journal under `base_directory`; buffered records are fsynced at least every `flush_interval` seconds."""
+        self.base_directory = base_directory
+        self.directory: Optional[str] = None
+        self._slot_lock: Optional[int] = None
+        self.flush_interval = flush_interval
+        self.seq = 0
+        self.in_flight: Dict[str, Dict] = {}
+        self._file = None
+        self._buffer: List[str] = []
+        self._waiters: List[asyncio.Future] = []
+        self._urgent: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.records_since_snapshot = 0
+        self.fsyncs = 0
+        self.snapshots = 0
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.directory, self.LOG_NAME)
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, self.SNAPSHOT_NAME)
+
+    async def open(self) -> JournalState:
+        """Recover state from disk and start the background flusher."""
+        state = await asyncio.to_thread(self._load)
+        self.seq = state.seq
+        self.in_flight = dict(state.in_flight)
+        self._file = open(self.log_path, 'ab')
+        self._urgent = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(
+            f"Recovered execution journal at seq {state.seq} "
+            f"({'from a snapshot' if state.snapshot_found else 'without a snapshot'}, {len(state.in_flight)} orders in flight)"
+        )
+        return state
+
+    def _claim_slot(self):
+        for slot in range(self.MAX_SLOTS):
+            directory = os.path.join(self.base_directory, f'slot-{slot}')
+            os.makedirs(directory, exist_ok=True)
+            fd = os.open(os.path.join(directory, 'lock'), os.O_CREAT | os.O_RDWR)
+            try:
+                # Held until close or process exit, so a crashed owner's slot frees up by itself
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            self.directory, self._slot_lock = directory, fd
+            return
+        raise RuntimeError(f"All {self.MAX_SLOTS} journal slots in {self.base_directory} are in use")
+
+    def _load(self) -> JournalState:
+        if self.directory is None:
+            self._claim_slot()
+        state = JournalState()
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+            state.snapshot_found = True
+            state.seq = snapshot['seq']
+            state.watermark = snapshot.get('watermark')
+            state.armed = snapshot.get('armed')
+            state.in_flight = {intent['client_order_id']: intent for intent in snapshot.get('in_flight', [])}
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final write from a crash; nothing after it was acknowledged
+                        logger.warning(f"Ignoring truncated journal record after seq {state.seq}")
+                        break
+                    # Records up to the snapshot's seq are already part of it
+                    if record['seq'] <= state.seq:
+                        continue
+                    state.seq = record['seq']
+                    self._apply(state.in_flight, record, state.settled)
+        return state
+
+    @staticmethod
+    def _apply(in_flight: Dict[str, Dict], record: Dict, settled: Optional[Set[Leg]] = None):
+        client_order_id = record['client_order_id']
+        if record['type'] == 'intent':
+            in_flight[client_order_id] = record
+        elif record['type'] == 'submitted':
+            if client_order_id in in_flight:
+                in_flight[client_order_id] = {**in_flight[client_order_id], 'order_id': record['order_id']}
+        # Released intents were handed to the engine instance that now owns their trades
+        elif record['type'] in ('filled', 'failed', 'released'):
+            intent = in_flight.pop(client_order_id, None)
+            if intent is not None and settled is not None:
+                settled.update((side, trade_id) for side, trade_id, _ in intent['legs'])
+
+    def record(self, record_type: str, client_order_id: str, **fields) -> int:
+        """Append a record; it reaches disk with the next flush."""
+        self.seq += 1
+        record = {'seq': self.seq, 'type': record_type, 'client_order_id': client_order_id, **fields}
+        self._apply(self.in_flight, record)
+        self._buffer.append(json.dumps(record, separators=(',', ':')) + '\n')
+        self.records_since_snapshot += 1
+        return self.seq
+
+    async def commit(self, record_type: str, client_order_id: str, **fields) -> int:
+        """Append a record and wait until it is fsynced; concurrent commits share one fsync."""
+        seq = self.record(record_type, client_order_id, **fields)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._urgent.set()
+        await waiter
+        return seq
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._urgent.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error flushing execution journal: {str(e)}")
+
+    async def flush(self):
+        async with self._lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self):
+        self._urgent.clear()
+        if not self._buffer:
+            return
+        data = ''.join(self._buffer).encode()
+        waiters = self._waiters
+        self._buffer, self._waiters = [], []
+        try:
+            await asyncio.to_thread(self._write, data)
+        except Exception as e:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            raise
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+
+    async def snapshot(self, armed: Callable[[], Any], watermark: Optional[str] = None):
+        """Write a snapshot of `armed()` and the in-flight intents, then truncate the journal behind it."""
+        async with self._lock:
+            await self._flush_locked()
+            # Captured without yielding, so the snapshot matches self.seq exactly
+            snapshot = {
+                'seq': self.seq,
+                'watermark': watermark,
+                'armed': armed(),
+                'in_flight': list(self.in_flight.values()),
+            }
+            await asyncio.to_thread(self._write_snapshot, json.dumps(snapshot, separators=(',', ':')))
+            self.records_since_snapshot = 0
+            self.snapshots += 1
+
+    def _write_snapshot(self, data: str):
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        # Everything in the log is now covered by the snapshot; a crash before this truncate
+        # only leaves records that replay skips by seq
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+
+    async def close(self):
+        """Flush outstanding records and stop the flusher."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+        self._file.close()
+        self._file = None
+        os.close(self._slot_lock)
+        self.directory, self._slot_lock = None, None
+
+    def get_stats(self) -> Dict:
+        return {
+            'directory': self.directory,
+            'seq': self.seq,
+            'in_flight': len(self.in_flight),
+            'buffered': len(self._buffer),
+            'records_since_snapshot': self.records_since_snapshot,
+            'fsyncs': self.fsyncs,
+            'snapshots': self.snapshots,
+        }
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import math
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import AsyncSessionLocal
+from app.db.models import EngineInstance, EngineShardLease
+
+logger = logging.getLogger(__name__)
+
+ShardCallback = Callable[[Set[int]], Awaitable[None]]
+
+class ShardLeaseManager:
+    def __init__(self, shard_count: int = 1, ttl: float = 15.0, renew_interval: float = 5.0, instance_id: Optional[str] = None):
+        """Initialize ownership of scheduled trade shards (trade id modulo `shard_count`) through renewable lease rows."""
+        self.shard_count = shard_count
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.instance_id = instance_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.owned: Dict[int, int] = {}  # Shard -> epoch it was acquired at
+        self._on_acquired: Optional[ShardCallback] = None
+        self._on_lost: Optional[ShardCallback] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.acquired = 0
+        self.lost = 0
+        self.released = 0
+
+    def shard_of(self, trade_id: int) -> int:
+        return trade_id % self.shard_count
+
+    def owns(self, trade_id: int) -> bool:
+        return trade_id % self.shard_count in self.owned
+
+    def shard_filter(self, trade_id_column):
+        """SQL condition matching rows whose trade id falls in an owned shard."""
+        return (trade_id_column % self.shard_count).in_(sorted(self.owned))
+
+    async def acquire(self):
+        """Create missing lease rows and take this instance's first share of the shards."""
+        async with AsyncSessionLocal() as db:
+            existing = set((await db.execute(select(EngineShardLease.shard))).scalars())
+            missing = [shard for shard in range(self.shard_count) if shard not in existing]
+            if missing:
+                db.add_all(EngineShardLease(shard=shard, epoch=0) for shard in missing)
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    # Another instance created them first
+                    await db.rollback()
+        await self.rebalance()
+
+    def start(self, on_acquired: ShardCallback, on_lost: ShardCallback):
+        """Renew leases in the background, reporting shards gained or lost through the callbacks."""
+        self._on_acquired, self._on_lost = on_acquired, on_lost
+        if self._task is None:
+            self._task = asyncio.create_task(self._renew_loop())
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            try:
+                await self.rebalance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error renewing shard leases: {str(e)}")
+
+    async def rebalance(self):
+        """Renew held leases, then take free shards or give some back until holding a fair share."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        async with AsyncSessionLocal() as db:
+            # Announce this instance so the others give up their excess shards to it
+            await db.merge(EngineInstance(instance_id=self.instance_id, heartbeat_at=now))
+            # A lease is only lost once another instance has taken it over
+            if self.owned:
+                await db.execute(
+                    update(EngineShardLease)
+                    .where(EngineShardLease.shard.in_(list(self.owned)), EngineShardLease.owner == self.instance_id)
+                    .values(expires_at=expires_at)
+                )
+            rows = (await db.execute(
+                select(EngineShardLease).where(EngineShardLease.shard < self.shard_count)
+            )).scalars().all()
+            live = set((await db.execute(
+                select(EngineInstance.instance_id).where(EngineInstance.heartbeat_at > now - timedelta(seconds=self.ttl))
+            )).scalars())
+            await db.commit()
+
+            held = {row.shard: row.epoch for row in rows if row.owner == self.instance_id}
+            target = math.ceil(self.shard_count / len(live | {self.instance_id}))
+
+            for row in rows:
+                if len(held) >= target:
+                    break
+                if row.shard in held or (row.owner and row.expires_at and row.expires_at > now):
+                    continue
+                # Conditional on the lease still being free, so two instances can't both take it
+                result = await db.execute(
+                    update(EngineShardLease)
+                    .where(
+                        EngineShardLease.shard == row.shard,
+                        or_(
+                            EngineShardLease.owner.is_(None),
+                            EngineShardLease.expires_at.is_(None),
+                            EngineShardLease.expires_at <= now
+                        )
+                    )
+                    .values(owner=self.instance_id, epoch=EngineShardLease.epoch + 1, expires_at=expires_at)
+                )
+                await db.commit()
+                if result.rowcount == 1:
+                    held[row.shard] = (row.epoch or 0) + 1
+
+        lost = set(self.owned) - set(held)
+        gained = set(held) - set(self.owned)
+        excess = sorted(held)[target:] if len(held) > target else []
+        self.owned = {shard: epoch for shard, epoch in held.items() if shard not in excess}
+
+        if lost:
+            self.lost += len(lost)
+            logger.warning(f"Lost shard leases {sorted(lost)} to another engine instance")
+            await self._notify(self._on_lost, lost)
+        if gained - set(excess):
+            self.acquired += len(gained - set(excess))
+            logger.info(f"Acquired shard leases {sorted(gained - set(excess))}")
+            await self._notify(self._on_acquired, gained - set(excess))
+        if excess:
+            # Stop scheduling them before letting go, so the next owner starts from a clean slate
+            await self._notify(self._on_lost, set(excess) - gained)
+            await self._release(excess)
+
+    async def _notify(self, callback: Optional[ShardCallback], shards: Set[int]):
+        if callback is not None and shards:
+            await callback(shards)
+
+    async def _release(self, shards: Iterable[int]):
+        shards = list(shards)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(EngineShardLease)
+                .where(EngineShardLease.shard.in_(shards), EngineShardLease.owner == self.instance_id)
+                .values(owner=None, expires_at=None)
+            )
+            await db.commit()
+        self.released += len(shards)
+        logger.info(f"Released shard leases {sorted(shards)}")
+
+    async def fence(self, db: AsyncSession, shards: Iterable[int]) -> bool:
+        """Within the caller's transaction, confirm and extend the leases on `shards`; False if any has lapsed."""
+        shards = set(shards)
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(EngineShardLease)
+            .where(
+                EngineShardLease.shard.in_(list(shards)),
+                EngineShardLease.owner == self.instance_id,
+                EngineShardLease.expires_at > now
+            )
+            .values(expires_at=now + timedelta(seconds=self.ttl))
+        )
+        return result.rowcount == len(shards)
+
+    async def stop(self):
+        """Stop renewing and hand every held shard back."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.owned:
+            await self._release(list(self.owned))
+            self.owned = {}
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(EngineInstance).where(EngineInstance.instance_id == self.instance_id))
+            await db.commit()
+
+    def get_stats(self) -> Dict:
+        return {
+            'instance_id': self.instance_id,
+            'shard_count': self.shard_count,
+            'owned': sorted(self.owned),
+            'acquired': self.acquired,
+            'lost': self.lost,
+            'released': self.released,
+        }
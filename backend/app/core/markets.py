@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+from app.core.config import settings
+from app.core.resilience import CircuitOpenError
+
+if TYPE_CHECKING:
+    from app.core.exchange import MEXCExchange
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+class MarketsCatalog:
+    def __init__(self, cache_path: str, refresh_interval: float, reload_interval: float):
+        """Initialize an in-memory index of exchange markets backed by an on-disk snapshot.
+
+        One process (the collector) refreshes the snapshot from MEXC; the others reload it from disk.
+        """
+        self.cache_path = cache_path
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        self.markets: Dict[str, Dict] = {}
+        self.trading_pairs: List[str] = []  # Active USDT spot pairs ranked by 24h quote volume
+        self.updated_at: Optional[float] = None
+        self._loaded_mtime: Optional[float] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def load(self) -> bool:
+        """Load the last snapshot from disk; return False if there is no usable snapshot."""
+        try:
+            mtime = os.stat(self.cache_path).st_mtime
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable markets snapshot {self.cache_path}: {str(e)}")
+            return False
+
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            return False
+        self.markets = snapshot['markets']
+        self.trading_pairs = snapshot['trading_pairs']
+        self.updated_at = snapshot['updated_at']
+        self._loaded_mtime = mtime
+        logger.info(f"Loaded {len(self.markets)} markets from {self.cache_path}")
+        return True
+
+    def _save(self):
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'updated_at': self.updated_at,
+            'markets': self.markets,
+            'trading_pairs': self.trading_pairs
+        }
+        # Write to a temp file and rename so concurrent readers never see a partial snapshot
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, self.cache_path)
+
+    @staticmethod
+    def _compact(market: Dict) -> Dict:
+        """Keep only the market fields the application uses."""
+        limits = market.get('limits') or {}
+        return {
+            'base': market.get('base'),
+            'quote': market.get('quote'),
+            'type': market.get('type', 'spot'),
+            'active': market.get('active', True),
+            'precision': market.get('precision') or {},
+            'limits': {
+                'amount': limits.get('amount') or {},
+                'cost': limits.get('cost') or {}
+            }
+        }
+
+    def _build_index(self, markets: List[Dict], volumes: Dict[str, float]) -> List[str]:
+        """Return active USDT spot pairs sorted by 24h quote volume, highest first."""
+        def volume(market: Dict) -> float:
+            value = volumes.get(market['symbol']) or market.get('info', {}).get('volume') or 0
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return 0.0
+
+        filtered = [
+            market for market in markets
+            if market.get('active', True)
+            and market.get('type', 'spot') == 'spot'
+            and market['symbol'].endswith('/USDT')
+        ]
+        filtered.sort(key=volume, reverse=True)
+        return [market['symbol'] for market in filtered]
+
+    async def refresh(self, exchange: "MEXCExchange"):
+        """Download markets and 24h volumes, rebuild the index and persist it."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            markets = await exchange.fetch_market_metadata()
+            try:
+                # One bulk request that bypasses the ticker cache, which only has room for the hot symbols
+                volumes = await exchange.fetch_quote_volumes()
+            except Exception as e:
+                logger.warning(f"Ranking trading pairs without ticker volumes: {str(e)}")
+                volumes = {}
+
+            self.trading_pairs = self._build_index(markets, volumes)
+            self.markets = {market['symbol']: self._compact(market) for market in markets}
+            self.updated_at = time.time()
+            try:
+                await asyncio.to_thread(self._save)
+                # Our own write, so the reload check doesn't read it back
+                self._loaded_mtime = os.stat(self.cache_path).st_mtime
+            except OSError as e:
+                logger.error(f"Error saving markets snapshot: {str(e)}")
+            logger.info(f"Refreshed {len(self.markets)} markets, {len(self.trading_pairs)} USDT spot pairs")
+
+    async def _refresh_loop(self, exchange: "MEXCExchange"):
+        while True:
+            age = time.time() - self.updated_at if self.updated_at else None
+            if age is not None and age < self.refresh_interval:
+                await asyncio.sleep(self.refresh_interval - age)
+            try:
+                await self.refresh(exchange)
+            except asyncio.CancelledError:
+                raise
+            except CircuitOpenError as e:
+                logger.warning(f"MEXC markets unavailable, keeping the last known markets: {str(e)}")
+                await asyncio.sleep(max(e.retry_after, 1.0))
+            except Exception as e:
+                logger.error(f"Error refreshing markets: {str(e)}")
+                await asyncio.sleep(min(60, self.refresh_interval))
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if os.stat(self.cache_path).st_mtime != self._loaded_mtime:
+                    await asyncio.to_thread(self.load)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error reloading markets snapshot: {str(e)}")
+
+    async def start(self, exchange: "MEXCExchange", refresh: bool = False):
+        """Load the on-disk snapshot and keep it current in the background.
+
+        With `refresh`, this process downloads and persists the snapshot every refresh interval;
+        otherwise it reloads whatever the refreshing process last wrote.
+        """
+        if self._refresh_task is not None:
+            return
+        if refresh:
+            self.load()
+            self._refresh_task = asyncio.create_task(self._refresh_loop(exchange))
+            return
+        if not self.load():
+            # Nothing on disk yet: fetch once so this process has precision and limits to work with
+            try:
+                await self.refresh(exchange)
+            except Exception as e:
+                logger.error(f"Error fetching markets without a snapshot: {str(e)}")
+        self._refresh_task = asyncio.create_task(self._reload_loop())
+
+    async def stop(self):
+        """Stop the background refresh or reload."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def get_trading_pairs(self, limit: int = 20) -> List[str]:
+        """Return the highest-volume active USDT spot pairs."""
+        return self.trading_pairs[:limit]
+
+    def get_market(self, symbol: str) -> Optional[Dict]:
+        """Return compact metadata (precision, limits) for a symbol."""
+        return self.markets.get(symbol)
+
+markets_catalog = MarketsCatalog(
+    cache_path=settings.MARKETS_CACHE_PATH,
+    refresh_interval=settings.MARKETS_REFRESH_INTERVAL,
+    reload_interval=settings.MARKETS_RELOAD_INTERVAL
+)
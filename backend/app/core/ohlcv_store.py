@@ -0,0 +1,435 @@
+"""Local OHLCV history, one set of column files per symbol and timeframe.
+
+Each column (timestamp, open, high, low, close, volume) is a flat little-endian array on
+disk, memory-mapped read-only for queries, so range lookups are a binary search plus a
+slice and memory use doesn't grow with history. Only closed candles are stored; the
+candle still forming is kept in memory and refreshed at most every CACHE_TTL_OHLCV
+seconds. A sync fetches just the candles after the last stored one, and, when a request
+reaches further back than the store, a bounded backfill before the first. A store idle
+for longer than one bounded catch-up starts over from the recent candles instead of
+keeping a hole.
+
+Higher timeframes are aggregated from the base timeframe (1m by default) rather than fetched,
+so one upstream series per symbol serves every chart; the bar still forming is rebuilt from
+the stored base candles in its bucket plus the forming base candle. Base candles MEXC left out
+(minutes without trades) count as flat candles at the previous close with no volume.
+
+Writes take an exclusive lock on the series directory so several API workers can share
+the store; the locked file I/O runs in a worker thread, never on the event loop. On append
+the timestamp column is written last and the series length is the shortest column, so a
+torn append is never read and is trimmed by the next one. A backfill rewrites the series
+into a new directory and switches CURRENT to it.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import ccxt.async_support as ccxt
+import numpy as np
+from app.core.config import settings
+from app.core.scheduler import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+COLUMNS: Tuple[Tuple[str, np.dtype], ...] = (
+    ('open', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('volume', np.dtype('<f8')),
+    # Last, so its length marks how many rows are complete
+    ('timestamp', np.dtype('<i8')),
+)
+
+def _sorted_rows(candles: Iterable[List]) -> np.ndarray:
+    rows = np.asarray([candle[:6] for candle in candles], dtype='f8').reshape(-1, 6)
+    return rows[np.argsort(rows[:, 0], kind='stable')]
+
+def _column(rows: np.ndarray, index: int, name: str) -> np.ndarray:
+    """Column `name` (at `index` in COLUMNS) of rows laid out as [timestamp, open, high, low, close, volume]."""
+    return rows[:, 0] if name == 'timestamp' else rows[:, index + 1]
+
+class OHLCVSeries:
+    def __init__(self, directory: str, symbol: str, timeframe: str):
+        """Initialize the stored candles of one symbol and timeframe."""
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.timeframe_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        self.directory = os.path.join(directory, symbol.replace('/', '_'), timeframe)
+        # Subdirectory holding the column files; prepending writes a new one and switches CURRENT to it
+        self.generation: Optional[str] = None
+        self.columns: Dict[str, np.ndarray] = {name: np.empty(0, dtype) for name, dtype in COLUMNS}
+        self.length = 0
+        # The candle still forming, as [timestamp, open, high, low, close, volume]
+        self.live: Optional[List] = None
+        self.live_fetched_at = 0.0
+        # Earliest time already backfilled from, even if MEXC had nothing that old
+        self.history_start: Optional[int] = None
+        self.lock = asyncio.Lock()
+
+    def _current(self) -> str:
+        try:
+            with open(os.path.join(self.directory, 'CURRENT')) as f:
+                return f.read().strip() or '0'
+        except FileNotFoundError:
+            return '0'
+
+    def _path(self, name: str, generation: str) -> str:
+        return os.path.join(self.directory, generation, f'{name}.bin')
+
+    def _stored_length(self, generation: str) -> int:
+        lengths = []
+        for name, dtype in COLUMNS:
+            try:
+                lengths.append(os.path.getsize(self._path(name, generation)) // dtype.itemsize)
+            except FileNotFoundError:
+                return 0
+        return min(lengths)
+
+    def refresh(self):
+        """Remap the columns if another process (or this one) changed the series since the last look."""
+        generation = self._current()
+        length = self._stored_length(generation)
+        if generation == self.generation and length == self.length:
+            return
+        self.columns = {
+            name: np.memmap(self._path(name, generation), dtype=dtype, mode='r', shape=(length,)) if length else np.empty(0, dtype)
+            for name, dtype in COLUMNS
+        }
+        self.generation = generation
+        self.length = length
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        return int(self.columns['timestamp'][0]) if self.length else None
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.columns['timestamp'][self.length - 1]) if self.length else None
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    async def append(self, candles: List[List]) -> int:
+        """Append closed candles newer than the last stored one; returns how many were written."""
+        if not candles:
+            return 0
+        written = await asyncio.to_thread(self._write_append, candles)
+        self.refresh()
+        return written
+
+    def _write_append(self, candles: List[List]) -> int:
+        with self._locked():
+            generation = self._current()
+            length = self._stored_length(generation)
+            last = None
+            if length:
+                timestamps = np.memmap(self._path('timestamp', generation), dtype=COLUMNS[-1][1], mode='r', shape=(length,))
+                last = int(timestamps[-1])
+            rows = _sorted_rows(candle for candle in candles if last is None or candle[0] > last)
+            if not len(rows):
+                return 0
+            os.makedirs(os.path.join(self.directory, generation), exist_ok=True)
+            for index, (name, dtype) in enumerate(COLUMNS):
+                with open(self._path(name, generation), 'ab') as f:
+                    # Drop the tail of an append torn by a crash before adding to it
+                    f.truncate(length * dtype.itemsize)
+                    f.write(_column(rows, index, name).astype(dtype).tobytes())
+        return len(rows)
+
+    async def prepend(self, candles: List[List]) -> int:
+        """Insert closed candles older than the first stored one; returns how many were written.
+
+        The series is rewritten into a new generation directory and CURRENT is switched to it
+        atomically, so readers see either the old files or the complete new ones.
+        """
+        if not candles:
+            return 0
+        written = await asyncio.to_thread(self._write_prepend, candles)
+        self.refresh()
+        return written
+
+    def _write_prepend(self, candles: List[List]) -> int:
+        with self._locked():
+            generation = self._current()
+            length = self._stored_length(generation)
+            existing = {
+                name: np.fromfile(self._path(name, generation), dtype=dtype, count=length) if length else np.empty(0, dtype)
+                for name, dtype in COLUMNS
+            }
+            first = int(existing['timestamp'][0]) if length else None
+            rows = _sorted_rows(candle for candle in candles if first is None or candle[0] < first)
+            if not len(rows):
+                return 0
+            replacement = uuid.uuid4().hex[:8]
+            os.makedirs(os.path.join(self.directory, replacement))
+            for index, (name, dtype) in enumerate(COLUMNS):
+                np.concatenate((_column(rows, index, name).astype(dtype), existing[name])).tofile(self._path(name, replacement))
+            pointer = os.path.join(self.directory, f'CURRENT.{replacement}')
+            with open(pointer, 'w') as f:
+                f.write(replacement)
+            os.replace(pointer, os.path.join(self.directory, 'CURRENT'))
+            # Processes still mapping the old files keep reading them until they remap
+            shutil.rmtree(os.path.join(self.directory, generation), ignore_errors=True)
+        return len(rows)
+
+    async def reset(self, before: int) -> bool:
+        """Start the series over if its last stored candle is older than `before`; returns whether it did."""
+        reset = await asyncio.to_thread(self._write_reset, before)
+        self.refresh()
+        return reset
+
+    def _write_reset(self, before: int) -> bool:
+        with self._locked():
+            generation = self._current()
+            length = self._stored_length(generation)
+            if length:
+                timestamps = np.memmap(self._path('timestamp', generation), dtype=COLUMNS[-1][1], mode='r', shape=(length,))
+                if int(timestamps[-1]) >= before:
+                    # Another process caught up first
+                    return False
+            replacement = uuid.uuid4().hex[:8]
+            os.makedirs(os.path.join(self.directory, replacement))
+            pointer = os.path.join(self.directory, f'CURRENT.{replacement}')
+            with open(pointer, 'w') as f:
+                f.write(replacement)
+            os.replace(pointer, os.path.join(self.directory, 'CURRENT'))
+            shutil.rmtree(os.path.join(self.directory, generation), ignore_errors=True)
+        return True
+
+    def _rows(self, start: int, stop: int) -> List[List]:
+        timestamps = self.columns['timestamp'][start:stop].tolist()
+        values = np.column_stack([self.columns[name][start:stop] for name, _ in COLUMNS[:-1]]).tolist()
+        return [[timestamp] + row for timestamp, row in zip(timestamps, values)]
+
+    def index(self, since_ms: int) -> int:
+        return int(np.searchsorted(self.columns['timestamp'], since_ms, side='left'))
+
+    def since(self, since_ms: int, limit: int) -> List[List]:
+        start = self.index(since_ms)
+        return self._rows(start, min(start + limit, self.length))
+
+    def tail(self, limit: int) -> List[List]:
+        return self._rows(max(0, self.length - limit), self.length)
+
+def resample(columns: Dict[str, np.ndarray], timeframe_ms: int, previous_close: Optional[float] = None) -> List[List]:
+    """Aggregate consecutive candles into `timeframe_ms` buckets aligned to the epoch, like MEXC's.
+
+    Missing candles are taken as flat at the close before them with no volume. Only those
+    opening a bucket change it: they set its open, and widen its range, to that close. For
+    the first bucket that is `previous_close`; without one its leading gap is ignored.
+    """
+    timestamps = columns['timestamp']
+    if not len(timestamps):
+        return []
+    buckets = timestamps - timestamps % timeframe_ms
+    # Index of the first candle of every bucket, and of the last
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+    values = np.column_stack((
+        columns['open'][starts],
+        np.maximum.reduceat(columns['high'], starts),
+        np.minimum.reduceat(columns['low'], starts),
+        columns['close'][ends],
+        np.add.reduceat(columns['volume'], starts),
+    ))
+    bucket_starts = buckets[starts]
+    # Buckets whose first candle is missing, and the close carried into them
+    leading = timestamps[starts] > bucket_starts
+    carried = columns['close'][np.maximum(starts - 1, 0)]
+    if previous_close is None:
+        leading[0] = False
+    else:
+        carried[0] = previous_close
+    values[leading, 0] = carried[leading]
+    values[leading, 1] = np.maximum(values[leading, 1], carried[leading])
+    values[leading, 2] = np.minimum(values[leading, 2], carried[leading])
+    return [[timestamp] + row for timestamp, row in zip(bucket_starts.tolist(), values.tolist())]
+
+class OHLCVStore:
+    def __init__(
+        self,
+        directory: str,
+        fetch_limit: int = 1000,
+        live_ttl: float = 30.0,
+        base_timeframe: str = '1m',
+        resampled_timeframes: Tuple[str, ...] = (),
+        max_resample_candles: int = 10080
+    ):
+        """Initialize a store under `directory`; syncs fetch up to `fetch_limit` candles per request.
+
+        Timeframes in `resampled_timeframes` are built from `base_timeframe` candles whenever that
+        takes fetching at most `max_resample_candles` of them.
+        """
+        self.directory = directory
+        self.fetch_limit = fetch_limit
+        self.live_ttl = live_ttl
+        self.base_timeframe = base_timeframe
+        self.resampled_timeframes = set(resampled_timeframes) - {base_timeframe}
+        self.max_resample_candles = max_resample_candles
+        self._series: Dict[Tuple[str, str], OHLCVSeries] = {}
+
+        # Statistics
+        self.hits = 0
+        self.resampled = 0
+        self.upstream_fetches = 0
+        self.candles_appended = 0
+
+    def series(self, symbol: str, timeframe: str) -> OHLCVSeries:
+        key = (symbol, timeframe)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = OHLCVSeries(self.directory, symbol, timeframe)
+        return series
+
+    async def get(self, exchange, symbol: str, timeframe: str, limit: int = 100, since: Optional[datetime] = None) -> List[List]:
+        """Return up to `limit` candles from `since`, or the latest `limit` candles, in ccxt's list format."""
+        since_ms = int(to_timestamp(since) * 1000) if since is not None else None
+        if timeframe in self.resampled_timeframes:
+            candles = await self._get_resampled(exchange, symbol, timeframe, limit, since_ms)
+            if candles is not None:
+                return candles
+
+        series = self.series(symbol, timeframe)
+        async with series.lock:
+            await self._sync(exchange, series, limit, since_ms)
+
+        if since_ms is not None and (series.first_timestamp is None or since_ms < series.first_timestamp):
+            # Further back than the store will backfill; served straight from MEXC
+            self.upstream_fetches += 1
+            return await exchange.fetch_ohlcv(symbol, timeframe, limit, since=since_ms)
+
+        self.hits += 1
+        live = series.live
+        if since_ms is None:
+            candles = series.tail(limit)
+            if live is not None and (not candles or live[0] > candles[-1][0]):
+                candles = (candles + [live])[-limit:]
+        else:
+            candles = series.since(since_ms, limit)
+            if live is not None and len(candles) < limit and live[0] >= since_ms and (not candles or live[0] > candles[-1][0]):
+                candles.append(live)
+        return candles
+
+    async def _get_resampled(self, exchange, symbol: str, timeframe: str, limit: int, since_ms: Optional[int]) -> Optional[List[List]]:
+        """Build the candles from the base timeframe, or return None if that would fetch too much history."""
+        base = self.series(symbol, self.base_timeframe)
+        timeframe_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        now_ms = int(time.time() * 1000)
+        forming = now_ms - now_ms % timeframe_ms
+        start = since_ms - since_ms % timeframe_ms if since_ms is not None else forming - (limit - 1) * timeframe_ms
+
+        base.refresh()
+        needed = (now_ms - start) // base.timeframe_ms + 1
+        if needed > self.max_resample_candles and (base.first_timestamp is None or start < base.first_timestamp):
+            return None
+        if base.last_timestamp is not None and (now_ms - base.last_timestamp) // base.timeframe_ms > self.max_resample_candles:
+            # The store sat idle too long to catch up from the base timeframe
+            return None
+
+        async with base.lock:
+            await self._sync(exchange, base, needed, start)
+
+        first = base.index(start)
+        previous_close = float(base.columns['close'][first - 1]) if first else None
+        if since_ms is not None:
+            # Just enough base candles for `limit` buckets, plus the forming base candle if it falls inside them
+            stop = base.index(start + limit * timeframe_ms)
+        else:
+            stop = base.length
+        columns = {name: base.columns[name][first:stop] for name, _ in COLUMNS}
+        live = base.live
+        if live is not None and live[0] >= start and live[0] >= (base.last_timestamp or 0) + base.timeframe_ms \
+                and (since_ms is None or live[0] < start + limit * timeframe_ms):
+            columns = {
+                name: np.append(columns[name], live[0] if name == 'timestamp' else live[index + 1])
+                for index, (name, _) in enumerate(COLUMNS)
+            }
+        self.resampled += 1
+        candles = resample(columns, timeframe_ms, previous_close)
+        return candles[:limit] if since_ms is not None else candles[-limit:]
+
+    async def _sync(self, exchange, series: OHLCVSeries, limit: int, since_ms: Optional[int]):
+        """Fetch the closed candles missing from the requested range, and refresh the forming candle."""
+        series.refresh()
+        timeframe_ms = series.timeframe_ms
+        now_ms = int(time.time() * 1000)
+        forming = now_ms - now_ms % timeframe_ms
+        # Fetch at most the larger of the request and one page
+        oldest = forming - max(limit, self.fetch_limit) * timeframe_ms
+        wanted = max(since_ms if since_ms is not None else forming - limit * timeframe_ms, oldest)
+
+        last = series.last_timestamp
+        if last is not None and last + timeframe_ms < oldest and await series.reset(oldest - timeframe_ms):
+            # A long-idle store starts over rather than keep a hole resampling would fill as flat
+            series.history_start = None
+
+        first = series.first_timestamp
+        if first is not None and wanted < first and (series.history_start is None or wanted < series.history_start):
+            self.candles_appended += await series.prepend(await self._fetch_range(exchange, series, wanted, first))
+            # MEXC may simply have nothing older; don't ask again
+            series.history_start = wanted
+
+        start = series.last_timestamp + timeframe_ms if series.last_timestamp is not None else wanted
+        start = max(start, oldest)
+        live_fresh = (
+            series.live is not None and series.live[0] == forming
+            and time.monotonic() - series.live_fetched_at < self.live_ttl
+        )
+        if start >= forming and live_fresh:
+            return
+
+        while True:
+            self.upstream_fetches += 1
+            candles = await exchange.fetch_ohlcv(series.symbol, series.timeframe, self.fetch_limit, since=start)
+            closed = [candle for candle in candles if candle[0] + timeframe_ms <= now_ms]
+            for candle in candles:
+                if candle[0] == forming:
+                    series.live = list(candle[:6])
+                    series.live_fetched_at = time.monotonic()
+            appended = await series.append(closed)
+            self.candles_appended += appended
+            # A short page, or one reaching the forming candle, is the last one
+            if len(candles) < self.fetch_limit or candles[-1][0] >= forming:
+                return
+            start = candles[-1][0] + timeframe_ms
+
+    async def _fetch_range(self, exchange, series: OHLCVSeries, start: int, end: int) -> List[List]:
+        """Fetch the candles from `start` up to (not including) `end`, a page at a time."""
+        candles = []
+        while start < end:
+            self.upstream_fetches += 1
+            page = await exchange.fetch_ohlcv(series.symbol, series.timeframe, self.fetch_limit, since=start)
+            candles.extend(candle for candle in page if candle[0] < end)
+            if len(page) < self.fetch_limit:
+                break
+            start = page[-1][0] + series.timeframe_ms
+        return candles
+
+    def get_stats(self) -> Dict:
+        return {
+            'series': len(self._series),
+            'hits': self.hits,
+            'resampled': self.resampled,
+            'upstream_fetches': self.upstream_fetches,
+            'candles_appended': self.candles_appended,
+        }
+
+ohlcv_store = OHLCVStore(
+    settings.OHLCV_STORE_DIR,
+    fetch_limit=settings.OHLCV_FETCH_LIMIT,
+    live_ttl=settings.CACHE_TTL_OHLCV,
+    base_timeframe=settings.OHLCV_BASE_TIMEFRAME,
+    resampled_timeframes=tuple(settings.OHLCV_RESAMPLED_TIMEFRAMES),
+    max_resample_candles=settings.OHLCV_RESAMPLE_MAX_CANDLES
+)
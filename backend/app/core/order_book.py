@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from sortedcontainers import SortedDict
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.core.exchange import MEXCExchange
+
+logger = logging.getLogger(__name__)
+
+class PriceLevels:
+    def __init__(self, descending: bool):
+        """Initialize one side of a book; bids are kept descending, asks ascending."""
+        self._sign = -1.0 if descending else 1.0
+        # Signed price -> size, always ascending so the best level is first on both sides
+        self._levels: SortedDict = SortedDict()
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def update(self, price: float, size: float):
+        """Set the size at a price level; a size of zero removes the level."""
+        key = price * self._sign
+        if size <= 0:
+            self._levels.pop(key, None)
+        else:
+            self._levels[key] = size
+
+    def replace(self, levels: List[List[float]]):
+        """Replace all levels with a snapshot."""
+        self._levels = SortedDict({price * self._sign: size for price, size in levels if size > 0})
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._levels:
+            return None
+        key, size = self._levels.peekitem(0)
+        return key * self._sign, size
+
+    def top(self, n: int) -> List[List[float]]:
+        return [[key * self._sign, size] for key, size in islice(self._levels.items(), n)]
+
+    def size_at(self, price: float) -> float:
+        return self._levels.get(price * self._sign, 0.0)
+
+class LocalOrderBook:
+    def __init__(self, symbol: str):
+        """Initialize an empty, unsynchronised L2 book for a symbol."""
+        self.symbol = symbol
+        self.bids = PriceLevels(descending=True)
+        self.asks = PriceLevels(descending=False)
+        self.version: Optional[int] = None
+        self.synced = False
+        self.updated_at: Optional[float] = None
+
+    def apply_snapshot(self, bids: List[List[float]], asks: List[List[float]], version: int):
+        """Reset the book from a full REST snapshot."""
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.version = version
+        self.synced = True
+        self.updated_at = time.time()
+
+    def apply_diff(self, bids: List[List[float]], asks: List[List[float]], version: int) -> bool:
+        """Apply an incremental update; return False and desynchronise on a sequence gap."""
+        if self.version is not None and version <= self.version:
+            # Already reflected in the snapshot
+            return True
+        if self.version is None or version != self.version + 1:
+            self.synced = False
+            return False
+        for price, size in bids:
+            self.bids.update(price, size)
+        for price, size in asks:
+            self.asks.update(price, size)
+        self.version = version
+        self.updated_at = time.time()
+        return True
+
+    def best_bid(self) -> Optional[float]:
+        best = self.bids.best()
+        return best[0] if best else None
+
+    def best_ask(self) -> Optional[float]:
+        best = self.asks.best()
+        return best[0] if best else None
+
+    def size_at(self, side: str, price: float) -> float:
+        """Return the resting size at an exact price on 'bids' or 'asks'."""
+        return (self.bids if side == 'bids' else self.asks).size_at(price)
+
+    def to_dict(self, limit: int = 20) -> Dict:
+        """Return the top `limit` levels in the same shape as ccxt's fetch_order_book."""
+        timestamp = int(self.updated_at * 1000) if self.updated_at else None
+        return {
+            'symbol': self.symbol,
+            'bids': self.bids.top(limit),
+            'asks': self.asks.top(limit),
+            'timestamp': timestamp,
+            'datetime': datetime.utcfromtimestamp(self.updated_at).isoformat() if self.updated_at else None,
+            'nonce': self.version
+        }
+
+class OrderBookManager:
+    def __init__(self, snapshot_depth: int = 100, max_pending: int = 1000):
+        """Initialize local books maintained from exchange depth diffs.
+
+        At most `max_pending` diffs per symbol are buffered while its snapshot is fetched.
+        """
+        self.snapshot_depth = snapshot_depth
+        self.max_pending = max_pending
+        self.books: Dict[str, LocalOrderBook] = {}
+        self.exchange: Optional["MEXCExchange"] = None
+        self._pending: Dict[str, List[Dict]] = {}
+        self._resyncs: Dict[str, asyncio.Task] = {}
+
+        # Statistics
+        self.diffs_applied = 0
+        self.gaps_detected = 0
+        self.resyncs = 0
+        self.diffs_dropped = 0
+
+    def set_exchange(self, exchange: "MEXCExchange"):
+        self.exchange = exchange
+
+    def get(self, symbol: str) -> Optional[LocalOrderBook]:
+        """Return the local book for a symbol if it is synchronised, otherwise None."""
+        book = self.books.get(symbol)
+        if book is None or not book.synced:
+            return None
+        return book
+
+    async def handle_update(self, update: Dict):
+        """Stream handler applying depth diffs and triggering resyncs on gaps."""
+        if update['type'] != 'depth':
+            return
+        symbol = update['symbol']
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = LocalOrderBook(symbol)
+
+        if not book.synced:
+            if self.exchange is None:
+                # Nothing can fetch a snapshot to replay them onto
+                self.diffs_dropped += 1
+                return
+            # Buffer until the snapshot arrives, then replay
+            pending = self._pending.setdefault(symbol, [])
+            pending.append(update)
+            if len(pending) > self.max_pending:
+                # Keep the newest; the snapshot will be at least as recent as the dropped ones
+                self.diffs_dropped += len(pending) - self.max_pending
+                del pending[:len(pending) - self.max_pending]
+            self._schedule_resync(symbol)
+            return
+
+        if book.apply_diff(update['bids'], update['asks'], update['version']):
+            self.diffs_applied += 1
+        else:
+            self.gaps_detected += 1
+            logger.warning(f"Order book gap for {symbol}: at {book.version}, got {update['version']}")
+            if self.exchange is None:
+                self.diffs_dropped += 1
+                return
+            self._pending[symbol] = [update]
+            self._schedule_resync(symbol)
+
+    def invalidate(self, symbols: List[str]):
+        """Mark books unsynchronised, e.g. after the stream disconnects."""
+        for symbol in symbols:
+            book = self.books.get(symbol)
+            if book is not None:
+                book.synced = False
+
+    def _schedule_resync(self, symbol: str):
+        if self.exchange is None or symbol in self._resyncs:
+            return
+        self._resyncs[symbol] = asyncio.create_task(self._resync(symbol))
+
+    async def _resync(self, symbol: str):
+        try:
+            self.resyncs += 1
+            snapshot = await self.exchange.fetch_order_book_snapshot(symbol, self.snapshot_depth)
+            book = self.books[symbol]
+            book.apply_snapshot(snapshot['bids'], snapshot['asks'], int(snapshot['nonce'] or 0))
+
+            # Replay diffs that arrived while the snapshot was in flight
+            for update in self._pending.pop(symbol, []):
+                if not book.apply_diff(update['bids'], update['asks'], update['version']):
+                    self.gaps_detected += 1
+                    self._pending[symbol] = []
+                    break
+                self.diffs_applied += 1
+        except Exception as e:
+            logger.error(f"Error resynchronising order book for {symbol}: {str(e)}")
+            await asyncio.sleep(1)
+        finally:
+            # If the book is still behind the stream, the next diff schedules another attempt
+            del self._resyncs[symbol]
+
+    def get_stats(self) -> Dict:
+        return {
+            'books': len(self.books),
+            'synced': sum(1 for book in self.books.values() if book.synced),
+            'diffs_applied': self.diffs_applied,
+            'gaps_detected': self.gaps_detected,
+            'resyncs': self.resyncs,
+            'diffs_dropped': self.diffs_dropped,
+            'pending_diffs': sum(len(pending) for pending in self._pending.values()),
+        }
+
+order_book_manager = OrderBookManager(snapshot_depth=settings.ORDER_BOOK_SNAPSHOT_DEPTH)
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from app.core.config import settings
+
+# Request weights per exchange endpoint, roughly following MEXC's spot API weights.
+ENDPOINT_WEIGHTS: Dict[str, float] = {
+    'fetch_ticker': 1,
+    'fetch_tickers': 5,
+    'fetch_ohlcv': 1,
+    'fetch_order_book': 1,
+    'create_order': 1,
+    'cancel_order': 1,
+    'fetch_order': 2,
+    'fetch_orders': 10,
+    'fetch_balance': 10,
+    'fetch_markets': 10,
+    'fetch_time': 1,
+}
+
+class TokenBucketRateLimiter:
+    def __init__(self, rate: float, capacity: float, weights: Optional[Dict[str, float]] = None):
+        """Initialize a token bucket refilled at `rate` tokens per second."""
+        self.rate = rate
+        self.capacity = capacity
+        self.weights = weights or {}
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+        # Counters
+        self.total_requests = 0
+        self.delayed_requests = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so the lock binds to the running event loop, not the import-time one
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def weight_for(self, endpoint: str) -> float:
+        """Return the token cost of a call to `endpoint`."""
+        return min(self.weights.get(endpoint, 1), self.capacity)
+
+    async def acquire(self, endpoint: str = 'default') -> float:
+        """Wait until the bucket has enough tokens for `endpoint`; return the time spent waiting."""
+        weight = self.weight_for(endpoint)
+        start = time.monotonic()
+        self.total_requests += 1
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            # The lock keeps waiters FIFO so heavy calls are not starved by light ones
+            async with self._get_lock():
+                while True:
+                    self._refill()
+                    if self._tokens >= weight:
+                        self._tokens -= weight
+                        break
+                    await asyncio.sleep((weight - self._tokens) / self.rate)
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            self.delayed_requests += 1
+        self.total_wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+        return waited
+
+    def get_stats(self) -> Dict:
+        """Return wait-time and queue-depth counters."""
+        return {
+            'rate': self.rate,
+            'capacity': self.capacity,
+            'available_tokens': round(self._tokens, 3),
+            'total_requests': self.total_requests,
+            'delayed_requests': self.delayed_requests,
+            'total_wait_seconds': round(self.total_wait_time, 6),
+            'max_wait_seconds': round(self.max_wait_time, 6),
+            'avg_wait_seconds': round(self.total_wait_time / self.total_requests, 6) if self.total_requests else 0.0,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+# Shared by every MEXCExchange instance in the process so they draw from one budget
+rate_limiter = TokenBucketRateLimiter(
+    rate=settings.EXCHANGE_RATE_LIMIT_PER_SECOND,
+    capacity=settings.EXCHANGE_RATE_LIMIT_BURST,
+    weights=ENDPOINT_WEIGHTS
+)
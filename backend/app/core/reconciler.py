@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Optional, Set
+from fastapi import HTTPException
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.allocation import allocate_pro_rata, amount_step, to_decimal
+from app.core.exchange import MEXCExchange
+from app.core.markets import markets_catalog
+from app.core.scheduler import to_timestamp
+from app.db.database import AsyncSessionLocal
+from app.db.models import ScheduledTrade, Trade, TradeStatus
+
+logger = logging.getLogger(__name__)
+
+# Orders the exchange has finished with; anything else is still working
+FINAL_STATUSES = ('closed', 'canceled', 'cancelled', 'rejected', 'expired')
+
+class FillReconciler:
+    def __init__(
+        self,
+        exchange: MEXCExchange,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        batch_size: int = 100,
+        max_age: float = 86400.0
+    ):
+        """Initialize a reconciler that confirms the fills of submitted orders, one request per symbol per poll."""
+        self.exchange = exchange
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.batch_size = batch_size
+        self.max_age = max_age
+        # Symbol -> {order id: submitted at (epoch seconds)}
+        self._pending: Dict[str, Dict[str, float]] = {}
+        # Per-symbol polling interval, doubled after every poll that settles nothing
+        self._intervals: Dict[str, float] = {}
+        self._next_poll: Dict[str, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.polls = 0
+        self.settled = 0
+        self.abandoned = 0
+        self.errors = 0
+
+    def track(self, symbol: str, order_id: str, submitted_at: Optional[float] = None):
+        """Start polling for an order's fill; polling of its symbol restarts at the shortest interval."""
+        self._pending.setdefault(symbol, {})[order_id] = submitted_at or time.time()
+        self._intervals[symbol] = self.min_interval
+        self._next_poll[symbol] = min(self._next_poll.get(symbol, float('inf')), time.time() + self.min_interval)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def load(self, *conditions):
+        """Track every recorded order still waiting for its fill, optionally narrowed by SQL `conditions`."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ScheduledTrade.trading_pair, Trade.order_id, Trade.executed_at)
+                .join(ScheduledTrade, Trade.scheduled_trade_id == ScheduledTrade.id)
+                .where(Trade.status == TradeStatus.PENDING, Trade.order_id.isnot(None), *conditions)
+            )
+            rows = result.all()
+        for symbol, order_id, executed_at in rows:
+            pending = self._pending.get(symbol, {})
+            if order_id not in pending:
+                self.track(symbol, order_id, to_timestamp(executed_at) if executed_at else None)
+        return len(rows)
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            due = [symbol for symbol, at in self._next_poll.items() if at <= now]
+            if due:
+                await asyncio.gather(*(self._poll(symbol) for symbol in due))
+                continue
+            delay = min(self._next_poll.values(), default=None)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), None if delay is None else delay - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, symbol: str):
+        pending = self._pending.get(symbol)
+        if not pending:
+            self._forget(symbol)
+            return
+        self.polls += 1
+        interval = self._intervals.get(symbol, self.min_interval)
+        try:
+            orders = await self._fetch_finished(symbol, min(pending.values()), set(pending))
+        except Exception as e:
+            self.errors += 1
+            # An open circuit gets the longest wait; other failures back off like an empty poll
+            circuit_open = isinstance(e, HTTPException) and e.status_code == 503
+            interval = self.max_interval if circuit_open else min(interval * 2, self.max_interval)
+            logger.warning(f"Error polling {symbol} order fills: {e.detail if isinstance(e, HTTPException) else str(e)}")
+            self._reschedule(symbol, interval)
+            return
+
+        if orders:
+            try:
+                await self.apply(orders)
+            except Exception:
+                self._reschedule(symbol, interval)
+                return
+            for order_id in orders:
+                pending.pop(order_id, None)
+            interval = self.min_interval
+        else:
+            interval = min(interval * 2, self.max_interval)
+
+        # Orders the exchange no longer lists are given up on rather than polled forever
+        expired = [order_id for order_id, submitted_at in pending.items() if time.time() - submitted_at > self.max_age]
+        for order_id in expired:
+            del pending[order_id]
+            self.abandoned += 1
+            logger.warning(f"Giving up on confirming the fill of {symbol} order {order_id}")
+        if pending:
+            self._reschedule(symbol, interval)
+        else:
+            self._forget(symbol)
+
+    async def _fetch_finished(self, symbol: str, oldest: float, wanted: Set[str]) -> Dict[str, Dict]:
+        """Page through the symbol's finished orders since the oldest pending one, keeping the wanted ones."""
+        found: Dict[str, Dict] = {}
+        seen: Set[str] = set()
+        since = int(oldest * 1000) - 60_000  # Leave room for clock skew between here and the exchange
+        while True:
+            orders = await self.exchange.fetch_closed_orders(symbol, since=since, limit=self.batch_size)
+            new = [order for order in orders if order['id'] not in seen]
+            seen.update(order['id'] for order in new)
+            for order in new:
+                if order['id'] in wanted and order.get('status') in FINAL_STATUSES:
+                    found[order['id']] = order
+            timestamps = [order['timestamp'] for order in new if order.get('timestamp')]
+            # A short page is the last one; a page of orders already seen means no progress is possible
+            if len(orders) < self.batch_size or len(found) == len(wanted) or not timestamps:
+                return found
+            # Orders sharing the page's last millisecond may continue on the next page, so it starts there;
+            # a page that is all one millisecond can't be paged past within it, so move on to the next one
+            last = max(timestamps)
+            since = last if last > since else since + 1
+
+    async def apply(self, orders: Dict[str, Dict]):
+        """Write the fill prices and outcomes of finished orders to their trade rows in one transaction."""
+        filled = []
+        unfilled = []
+        partial = {}
+        for order_id, order in orders.items():
+            price = order.get('average') or order.get('price')
+            if order.get('filled') or (order.get('status') == 'closed' and order.get('filled') is None):
+                filled.append({'order': order_id, 'fill_price': price})
+                if order.get('filled') is not None and order.get('amount') and order['filled'] < order['amount']:
+                    partial[order_id] = order
+            else:
+                unfilled.append(order_id)
+
+        trades = Trade.__table__
+        async with AsyncSessionLocal() as db:
+            try:
+                if filled:
+                    # One executemany for the whole batch; COALESCE keeps the recorded price if the exchange gave none
+                    await db.execute(
+                        trades.update()
+                        .where(trades.c.order_id == bindparam('order'))
+                        .values(
+                            price=func.coalesce(bindparam('fill_price', type_=trades.c.price.type), trades.c.price),
+                            status=TradeStatus.EXECUTED
+                        ),
+                        filled
+                    )
+                if partial:
+                    unfilled_trades = await self._reallocate(db, partial)
+                    if unfilled_trades:
+                        await db.execute(
+                            update(Trade).where(Trade.id.in_(unfilled_trades)).values(status=TradeStatus.FAILED)
+                        )
+                        await db.execute(
+                            update(ScheduledTrade)
+                            .where(ScheduledTrade.id.in_(
+                                select(Trade.scheduled_trade_id).where(Trade.id.in_(unfilled_trades))
+                            ))
+                            .values(status=TradeStatus.FAILED)
+                        )
+                if unfilled:
+                    await db.execute(
+                        update(Trade).where(Trade.order_id.in_(unfilled)).values(status=TradeStatus.FAILED)
+                    )
+                    # The leg never traded, so neither did its scheduled trade
+                    await db.execute(
+                        update(ScheduledTrade)
+                        .where(ScheduledTrade.id.in_(select(Trade.scheduled_trade_id).where(Trade.order_id.in_(unfilled))))
+                        .values(status=TradeStatus.FAILED)
+                    )
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                self.errors += 1
+                logger.error(f"Error recording fills for orders {list(orders)}: {str(e)}")
+                raise
+        self.settled += len(orders)
+        if unfilled:
+            logger.warning(f"Orders {unfilled} finished without filling; their trades are marked failed")
+
+    async def _reallocate(self, db: AsyncSession, orders: Dict[str, Dict]) -> List[int]:
+        """Re-split partially filled orders across their trades, like the engine split the assumed full fill.
+
+        Legs crossed internally against the opposite side keep their amounts. Returns the trade rows
+        whose share came to nothing.
+        """
+        result = await db.execute(
+            select(Trade.id, Trade.order_id, Trade.side, ScheduledTrade.trading_pair, ScheduledTrade.amount)
+            .join(ScheduledTrade, Trade.scheduled_trade_id == ScheduledTrade.id)
+            .where(Trade.order_id.in_(list(orders)))
+            .order_by(Trade.id)
+        )
+        rows_by_order = defaultdict(list)
+        for row in result.all():
+            rows_by_order[row.order_id].append(row)
+
+        amounts = []
+        unfilled = []
+        for order_id, rows in rows_by_order.items():
+            order = orders[order_id]
+            side = order.get('side')
+            if side not in ('buy', 'sell'):
+                continue
+            crossed = sum((to_decimal(row.amount) for row in rows if row.side != side), Decimal(0))
+            legs = [row for row in rows if row.side == side]
+            shares = allocate_pro_rata(
+                crossed + to_decimal(order['filled']),
+                [to_decimal(row.amount) for row in legs],
+                amount_step(markets_catalog.get_market(legs[0].trading_pair) if legs else None)
+            )
+            for row, share in zip(legs, shares):
+                if share > 0:
+                    amounts.append({'trade': row.id, 'filled_amount': float(share)})
+                else:
+                    unfilled.append(row.id)
+
+        if amounts:
+            trades = Trade.__table__
+            await db.execute(
+                trades.update().where(trades.c.id == bindparam('trade')).values(amount=bindparam('filled_amount')),
+                amounts
+            )
+        return unfilled
+
+    def _reschedule(self, symbol: str, interval: float):
+        self._intervals[symbol] = interval
+        self._next_poll[symbol] = time.time() + interval
+
+    def _forget(self, symbol: str):
+        self._pending.pop(symbol, None)
+        self._intervals.pop(symbol, None)
+        self._next_poll.pop(symbol, None)
+
+    def get_stats(self) -> Dict:
+        return {
+            'pending_orders': sum(len(pending) for pending in self._pending.values()),
+            'symbols': len(self._pending),
+            'intervals': dict(self._intervals),
+            'polls': self.polls,
+            'settled': self.settled,
+            'abandoned': self.abandoned,
+            'errors': self.errors,
+        }
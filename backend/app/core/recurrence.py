@@ -0,0 +1,78 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from apscheduler.triggers.cron import CronTrigger
+from app.db.models import RecurringTradeRule, ScheduledTrade, TradeStatus
+
+# Crontab day numbers (0 and 7 are Sunday) as APScheduler day names; APScheduler counts from Monday
+_CRON_WEEKDAYS = ('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+def _day_of_week(field: str) -> str:
+    """Translate a crontab day-of-week field into the day names APScheduler reads unambiguously."""
+    if field == '*' or re.search(r'[a-z]', field, re.IGNORECASE):
+        return field
+    days: List[int] = []
+    for part in field.split(','):
+        span, _, step = part.partition('/')
+        if span == '*':
+            first, last = 0, 6
+        elif '-' in span:
+            first, last = (int(value) for value in span.split('-', 1))
+        else:
+            first = last = int(span)
+        if not (0 <= first <= 7 and 0 <= last <= 7 and first <= last):
+            raise ValueError(f"Invalid day of week {part!r}")
+        days.extend(range(first, last + 1, int(step) if step else 1))
+    return ','.join(dict.fromkeys(_CRON_WEEKDAYS[day] for day in days))
+
+def parse_schedule(schedule: str) -> CronTrigger:
+    """Parse a standard five-field crontab expression (UTC); raises ValueError if it is invalid."""
+    fields = schedule.split()
+    if len(fields) != 5:
+        raise ValueError(f"Expected 5 crontab fields, got {len(fields)}")
+    minute, hour, day, month, day_of_week = fields
+    return CronTrigger(
+        minute=minute,
+        hour=hour,
+        day=day,
+        month=month,
+        day_of_week=_day_of_week(day_of_week),
+        timezone=timezone.utc
+    )
+
+def next_occurrence(schedule: str, after: datetime, end_at: Optional[datetime] = None) -> Optional[datetime]:
+    """Return the first occurrence strictly after `after` (naive UTC), or None once past `end_at`."""
+    trigger = parse_schedule(schedule)
+    occurrence = trigger.get_next_fire_time(None, after.replace(tzinfo=timezone.utc) + timedelta(microseconds=1))
+    if occurrence is None:
+        return None
+    occurrence = occurrence.astimezone(timezone.utc).replace(tzinfo=None)
+    if end_at is not None and occurrence > end_at:
+        return None
+    return occurrence
+
+def expand_next(rule: RecurringTradeRule, end: datetime, earliest: datetime) -> Optional[ScheduledTrade]:
+    """Materialise the rule's next occurrence as a scheduled trade if it falls before `end`, and advance the rule past it.
+
+    Occurrences already older than `earliest` would only misfire, so the rule skips them.
+    """
+    if rule.next_occurrence_at is not None and rule.next_occurrence_at < earliest:
+        rule.next_occurrence_at = next_occurrence(rule.schedule, earliest, rule.end_at)
+    trade = None
+    occurrence = rule.next_occurrence_at
+    if occurrence is not None and occurrence < end:
+        trade = ScheduledTrade(
+            user_id=rule.user_id,
+            trading_pair=rule.trading_pair,
+            amount=rule.amount,
+            buy_time=occurrence,
+            sell_time=occurrence + timedelta(seconds=rule.hold_seconds),
+            status=TradeStatus.PENDING,
+            recurring_rule_id=rule.id,
+            occurrence_at=occurrence
+        )
+        rule.next_occurrence_at = next_occurrence(rule.schedule, occurrence, rule.end_at)
+    if rule.next_occurrence_at is None:
+        # No occurrences left before the end date
+        rule.status = TradeStatus.EXECUTED
+    return trade
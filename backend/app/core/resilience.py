@@ -0,0 +1,215 @@
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import ccxt.async_support as ccxt
+from app.core.config import settings
+
+# Per-endpoint timeouts in seconds; order placement gets longer since a timeout leaves its outcome unknown
+ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    'fetch_ticker': 3.0,
+    'fetch_tickers': 5.0,
+    'fetch_ohlcv': 5.0,
+    'fetch_order_book': 3.0,
+    'fetch_order': 5.0,
+    'fetch_orders': 10.0,
+    'fetch_balance': 5.0,
+    'fetch_markets': 15.0,
+    'fetch_time': 3.0,
+    'create_order': 10.0,
+    'cancel_order': 10.0,
+}
+
+# Failures worth retrying and counting against the breaker; anything else is a definitive answer
+TRANSIENT_ERRORS = (ccxt.NetworkError, asyncio.TimeoutError)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+    def __init__(self, endpoint: str, retry_after: float = 0.0):
+        super().__init__(f"Circuit breaker open for {endpoint}")
+        self.endpoint = endpoint
+        self.retry_after = retry_after  # Seconds until the breaker lets a probe through
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """Initialize a breaker that opens after `failure_threshold` consecutive failures."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed; half-open lets a single probe through."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def release_probe(self):
+        """Let another probe through after one was abandoned without a verdict."""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        """Track recent successful call latencies for hedging decisions."""
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        # Too few samples to hedge on
+        if len(self._samples) < 20:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class ResilientCaller:
+    def __init__(self):
+        """Initialize per-endpoint breakers, latency trackers and counters."""
+        self.breakers: Dict[str, CircuitBreaker] = defaultdict(
+            lambda: CircuitBreaker(settings.EXCHANGE_BREAKER_FAILURE_THRESHOLD, settings.EXCHANGE_BREAKER_RESET_TIMEOUT)
+        )
+        self.latencies: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
+        self.retries: Dict[str, int] = defaultdict(int)
+        self.timeouts: Dict[str, int] = defaultdict(int)
+        self.hedges: Dict[str, int] = defaultdict(int)
+        self.hedge_wins: Dict[str, int] = defaultdict(int)
+        self.short_circuits: Dict[str, int] = defaultdict(int)
+
+    async def call(
+        self,
+        endpoint: str,
+        request: Callable[[], Awaitable[Any]],
+        idempotent: bool = True,
+        before_attempt: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """Run `request` with a timeout, jittered retries and hedging (idempotent only) behind a breaker."""
+        breaker = self.breakers[endpoint]
+        if not breaker.allow():
+            self.short_circuits[endpoint] += 1
+            raise CircuitOpenError(endpoint, breaker.retry_after())
+
+        attempts = 1 + (settings.EXCHANGE_MAX_RETRIES if idempotent else 0)
+        for attempt in range(attempts):
+            try:
+                if idempotent and settings.EXCHANGE_HEDGE_ENABLED:
+                    result = await self._hedged_attempt(endpoint, request, before_attempt)
+                else:
+                    result = await self._attempt(endpoint, request, before_attempt)
+            except TRANSIENT_ERRORS:
+                breaker.record_failure()
+                if attempt == attempts - 1 or breaker.state == CircuitBreaker.OPEN:
+                    raise
+                self.retries[endpoint] += 1
+                # Full jitter exponential backoff
+                backoff = settings.EXCHANGE_RETRY_BASE_DELAY * (2 ** attempt)
+                await asyncio.sleep(random.uniform(0, min(backoff, settings.EXCHANGE_RETRY_MAX_DELAY)))
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except Exception:
+                # The venue answered with a definitive error (e.g. insufficient funds), so it is healthy
+                breaker.record_success()
+                raise
+            else:
+                breaker.record_success()
+                return result
+
+    async def _attempt(self, endpoint: str, request: Callable[[], Awaitable[Any]], before_attempt) -> Any:
+        if before_attempt is not None:
+            await before_attempt()
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(request(), ENDPOINT_TIMEOUTS.get(endpoint, 10.0))
+        except asyncio.TimeoutError:
+            self.timeouts[endpoint] += 1
+            raise
+        self.latencies[endpoint].record(time.monotonic() - start)
+        return result
+
+    async def _hedged_attempt(self, endpoint: str, request: Callable[[], Awaitable[Any]], before_attempt) -> Any:
+        """Send a second request if the first hasn't answered within the endpoint's p95 latency."""
+        hedge_after = self.latencies[endpoint].percentile(0.95)
+        primary = asyncio.ensure_future(self._attempt(endpoint, request, before_attempt))
+        tasks = [primary]
+        try:
+            if hedge_after is None:
+                return await primary
+
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self.hedges[endpoint] += 1
+                tasks.append(asyncio.ensure_future(self._attempt(endpoint, request, before_attempt)))
+
+            # First success wins; fail only once every request has failed
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins[endpoint] += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict:
+        """Return breaker state and retry/hedge/timeout counters per endpoint."""
+        endpoints = set(self.breakers) | set(self.retries) | set(self.timeouts) | set(self.hedges)
+        return {
+            endpoint: {
+                'breaker_state': self.breakers[endpoint].state,
+                'consecutive_failures': self.breakers[endpoint].consecutive_failures,
+                'times_opened': self.breakers[endpoint].times_opened,
+                'short_circuits': self.short_circuits[endpoint],
+                'retries': self.retries[endpoint],
+                'timeouts': self.timeouts[endpoint],
+                'hedges': self.hedges[endpoint],
+                'hedge_wins': self.hedge_wins[endpoint],
+                'p95_latency_seconds': self.latencies[endpoint].percentile(0.95),
+            }
+            for endpoint in sorted(endpoints)
+        }
+
+# Shared so every MEXCExchange instance sees the same venue health
+resilient_caller = ResilientCaller()
@@ -0,0 +1,255 @@
+"""Retention for the market_data table.
+
+Rows older than the full-resolution window are rolled into fixed OHLC buckets
+(market_data_rollups) and deleted, oldest first, a bounded batch per transaction with a
+pause in between so API and write-behind commits never wait long for the write lock.
+Rollups past their own window are deleted the same way. On SQLite the freed pages are then
+handed back with incremental_vacuum, a few at a time, instead of a full VACUUM.
+
+auto_vacuum=INCREMENTAL only takes effect on an empty SQLite file, so a database created
+before it is converted once with a full VACUUM on the first run (MARKET_DATA_VACUUM_CONVERT).
+That rewrite holds the write lock until it finishes; with the setting off, the same
+conversion can be done by hand while the services are stopped:
+
+    sqlite3 scheduled_trader.db 'PRAGMA auto_vacuum = INCREMENTAL; VACUUM;'
+
+Batches run in timestamp order, so a bucket's earlier samples are always rolled before its
+later ones: the stored open stays and the close moves forward. The job runs in the collector
+only (see MARKET_DATA_RETENTION_IN_API): SQLite ignores FOR UPDATE SKIP LOCKED, so concurrent
+runs would read the same rows. Should two runs still meet, they collide on the new bucket's
+unique index and one of them retries the batch next time.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import delete, select, text, tuple_
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.database import AsyncSessionLocal, async_engine
+from app.db.models import MarketData, MarketDataRollup
+
+logger = logging.getLogger(__name__)
+
+RETENTION_ROWS = metrics.counter(
+    'market_data_retention_rows_total',
+    'market_data rows rolled up and deleted, and expired rollups deleted',
+    ('table',)
+)
+
+Bucket = Tuple[str, datetime]
+
+def bucket_start(timestamp: datetime, seconds: int) -> datetime:
+    epoch = int((timestamp - datetime(1970, 1, 1)).total_seconds())
+    return datetime(1970, 1, 1) + timedelta(seconds=epoch - epoch % seconds)
+
+class MarketDataRetention:
+    def __init__(
+        self,
+        retention_seconds: float = 86400.0,
+        rollup_seconds: int = 300,
+        rollup_retention_seconds: float = 90 * 86400.0,
+        interval: float = 300.0,
+        batch_size: int = 2000,
+        pause: float = 0.05,
+        vacuum_pages: int = 256,
+        convert_vacuum: bool = True
+    ):
+        """Initialize a job keeping `retention_seconds` of full-resolution rows and `rollup_seconds` buckets after that."""
+        self.retention_seconds = retention_seconds
+        self.rollup_seconds = rollup_seconds
+        self.rollup_retention_seconds = rollup_retention_seconds
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self.convert_vacuum = convert_vacuum
+        self._task: Optional[asyncio.Task] = None
+        self._warned_no_auto_vacuum = False
+
+        # Statistics
+        self.runs = 0
+        self.rolled_up = 0
+        self.expired_rollups = 0
+        self.vacuumed_pages = 0
+        self.conflicts = 0
+        self.last_run_seconds = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error applying market data retention: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, now: Optional[datetime] = None):
+        """Roll up and delete everything past the windows, then reclaim the freed space."""
+        started = asyncio.get_running_loop().time()
+        now = now or datetime.utcnow()
+        # Only whole buckets are rolled, so a bucket's rows never straddle two runs' cutoffs
+        cutoff = bucket_start(now - timedelta(seconds=self.retention_seconds), self.rollup_seconds)
+        while await self._roll_up_batch(cutoff) == self.batch_size:
+            await asyncio.sleep(self.pause)
+
+        expired = now - timedelta(seconds=self.rollup_retention_seconds)
+        while await self._expire_rollups_batch(expired) == self.batch_size:
+            await asyncio.sleep(self.pause)
+
+        await self._vacuum()
+        self.runs += 1
+        self.last_run_seconds = asyncio.get_running_loop().time() - started
+
+    async def _roll_up_batch(self, cutoff: datetime) -> int:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(MarketData.id, MarketData.symbol, MarketData.timestamp, MarketData.price, MarketData.volume)
+                .where(MarketData.timestamp < cutoff)
+                .order_by(MarketData.timestamp, MarketData.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                return 0
+
+            buckets: Dict[Bucket, Dict] = {}
+            for _, symbol, timestamp, price, volume in rows:
+                if price is None:
+                    continue
+                key = (symbol, bucket_start(timestamp, self.rollup_seconds))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = {'open': price, 'high': price, 'low': price, 'close': price, 'volume': volume, 'samples': 1}
+                else:
+                    bucket['high'] = max(bucket['high'], price)
+                    bucket['low'] = min(bucket['low'], price)
+                    bucket['close'] = price
+                    bucket['volume'] = volume
+                    bucket['samples'] += 1
+
+            try:
+                existing = {}
+                if buckets:
+                    existing = {
+                        (rollup.symbol, rollup.bucket_start): rollup
+                        for rollup in (await db.execute(
+                            select(MarketDataRollup)
+                            .where(
+                                MarketDataRollup.bucket_seconds == self.rollup_seconds,
+                                tuple_(MarketDataRollup.symbol, MarketDataRollup.bucket_start).in_(list(buckets))
+                            )
+                            .with_for_update()
+                        )).scalars()
+                    }
+                for (symbol, start), bucket in buckets.items():
+                    rollup = existing.get((symbol, start))
+                    if rollup is None:
+                        db.add(MarketDataRollup(symbol=symbol, bucket_start=start, bucket_seconds=self.rollup_seconds, **bucket))
+                        continue
+                    # The stored samples are older than these, so its open stays and the close moves on
+                    rollup.high = max(rollup.high, bucket['high'])
+                    rollup.low = min(rollup.low, bucket['low'])
+                    rollup.close = bucket['close']
+                    rollup.volume = bucket['volume']
+                    rollup.samples += bucket['samples']
+                await db.execute(delete(MarketData).where(MarketData.id.in_([row[0] for row in rows])))
+                await db.commit()
+            except (IntegrityError, OperationalError) as e:
+                # Another process rolled the same rows, or held the write lock too long; the next run picks them up
+                await db.rollback()
+                self.conflicts += 1
+                logger.warning(f"Market data retention batch skipped: {str(e).splitlines()[0]}")
+                return 0
+
+        self.rolled_up += len(rows)
+        RETENTION_ROWS.inc('market_data', amount=len(rows))
+        return len(rows)
+
+    async def _expire_rollups_batch(self, expired: datetime) -> int:
+        async with AsyncSessionLocal() as db:
+            ids = (await db.execute(
+                select(MarketDataRollup.id)
+                .where(MarketDataRollup.bucket_start < expired)
+                .order_by(MarketDataRollup.bucket_start)
+                .limit(self.batch_size)
+            )).scalars().all()
+            if ids:
+                await db.execute(delete(MarketDataRollup).where(MarketDataRollup.id.in_(ids)))
+                await db.commit()
+        self.expired_rollups += len(ids)
+        RETENTION_ROWS.inc('market_data_rollups', amount=len(ids))
+        return len(ids)
+
+    async def _vacuum(self):
+        """Return free pages to the filesystem a few at a time (SQLite with auto_vacuum=INCREMENTAL only)."""
+        if async_engine.dialect.name != 'sqlite':
+            return
+        async with async_engine.connect() as conn:
+            mode = (await conn.execute(text('PRAGMA auto_vacuum'))).scalar()
+            if mode != 2 and self.convert_vacuum and not self._warned_no_auto_vacuum:
+                mode = await self._convert_to_incremental(conn)
+            if mode != 2:
+                if not self._warned_no_auto_vacuum:
+                    self._warned_no_auto_vacuum = True
+                    logger.info(
+                        "SQLite database predates auto_vacuum=INCREMENTAL; freed pages are reused but the file "
+                        "won't shrink until a one-off VACUUM converts it"
+                    )
+                return
+            free = (await conn.execute(text('PRAGMA freelist_count'))).scalar()
+            while free:
+                # Each step truncates at most vacuum_pages pages, holding the write lock only that long.
+                # executescript runs the pragma to completion; a plain execute frees a single page
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.executescript(f'PRAGMA incremental_vacuum({self.vacuum_pages})')
+                remaining = (await conn.execute(text('PRAGMA freelist_count'))).scalar()
+                if remaining >= free:
+                    break
+                self.vacuumed_pages += free - remaining
+                free = remaining
+                await asyncio.sleep(self.pause)
+
+    async def _convert_to_incremental(self, conn) -> int:
+        """Rewrite the database once with a full VACUUM so auto_vacuum=INCREMENTAL takes effect."""
+        logger.info("Converting the SQLite database to auto_vacuum=INCREMENTAL with a one-off VACUUM")
+        await conn.commit()
+        raw = await conn.get_raw_connection()
+        try:
+            # The new mode is only stored by a VACUUM; executescript commits first, as VACUUM needs
+            await raw.driver_connection.executescript('PRAGMA auto_vacuum = INCREMENTAL; VACUUM;')
+        except Exception as e:
+            logger.error(f"Error converting the SQLite database to incremental vacuum: {str(e)}")
+        return (await conn.execute(text('PRAGMA auto_vacuum'))).scalar()
+
+    def get_stats(self) -> Dict:
+        return {
+            'runs': self.runs,
+            'rolled_up': self.rolled_up,
+            'expired_rollups': self.expired_rollups,
+            'vacuumed_pages': self.vacuumed_pages,
+            'conflicts': self.conflicts,
+            'last_run_ms': round(self.last_run_seconds * 1000, 3),
+        }
+
+market_data_retention = MarketDataRetention(
+    retention_seconds=settings.MARKET_DATA_RETENTION_SECONDS,
+    rollup_seconds=settings.MARKET_DATA_ROLLUP_SECONDS,
+    rollup_retention_seconds=settings.MARKET_DATA_ROLLUP_RETENTION_SECONDS,
+    interval=settings.MARKET_DATA_RETENTION_INTERVAL,
+    batch_size=settings.MARKET_DATA_RETENTION_BATCH_SIZE,
+    vacuum_pages=settings.MARKET_DATA_VACUUM_PAGES,
+    convert_vacuum=settings.MARKET_DATA_VACUUM_CONVERT
+)
@@ -0,0 +1,227 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JobCallback = Callable[..., Awaitable[Any]]
+BatchCallback = Callable[[List[Any]], Awaitable[Any]]
+
+FIRE_JITTER_SECONDS = metrics.histogram(
+    'scheduler_fire_jitter_seconds',
+    'Delay between a job\'s scheduled time and the moment its callback starts',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+
+def to_timestamp(run_at: datetime) -> float:
+    """Convert a datetime to epoch seconds; naive datetimes are treated as UTC like the rest of the DB."""
+    if run_at.tzinfo is None:
+        run_at = run_at.replace(tzinfo=timezone.utc)
+    return run_at.timestamp()
+
+class ScheduledJob:
+    __slots__ = ('job_id', 'run_at', 'callback', 'args', 'batched', 'on_misfire')
+
+    def __init__(
+        self,
+        job_id: str,
+        run_at: float,
+        callback: Callable,
+        args: Tuple,
+        batched: bool = False,
+        on_misfire: Optional[BatchCallback] = None
+    ):
+        self.job_id = job_id
+        self.run_at = run_at
+        self.callback = callback
+        self.args = args
+        self.batched = batched
+        self.on_misfire = on_misfire
+
+class TradeScheduler:
+    def __init__(self, misfire_grace_time: float = 30.0):
+        """Initialize an in-process scheduler backed by a min-heap of fire times."""
+        self.misfire_grace_time = misfire_grace_time
+        # (run_at, sequence, job) entries; the sequence keeps ordering stable for equal times
+        self._heap: List[Tuple[float, int, ScheduledJob]] = []
+        # Live jobs by id; heap entries whose job is no longer indexed here are cancelled
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+        # Statistics
+        self.fired = 0
+        self.misfired = 0
+        self.cancelled = 0
+        self.max_jitter = 0.0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def schedule(self, job_id: str, run_at: datetime, callback: JobCallback, *args):
+        """Schedule `callback(*args)` at `run_at`, replacing any job with the same id. O(log n)."""
+        self._push(ScheduledJob(job_id, to_timestamp(run_at), callback, args))
+
+    def schedule_batched(
+        self,
+        job_id: str,
+        run_at: datetime,
+        callback: BatchCallback,
+        item: Any,
+        on_misfire: Optional[BatchCallback] = None
+    ):
+        """Schedule `item` for `callback`; items due at the same instant are passed to one call as a list.
+
+        Items skipped as misfires are passed to `on_misfire` instead, also as a list.
+        """
+        self._push(ScheduledJob(job_id, to_timestamp(run_at), callback, (item,), batched=True, on_misfire=on_misfire))
+
+    def load_batched(
+        self,
+        callback: BatchCallback,
+        entries: Iterable[Tuple[str, float, Any]],
+        on_misfire: Optional[BatchCallback] = None
+    ):
+        """Bulk-schedule `(job_id, run_at_timestamp, item)` entries for `callback` with one O(n) heapify."""
+        for job_id, run_at, item in entries:
+            if job_id in self._jobs:
+                self.cancel(job_id)
+            job = ScheduledJob(job_id, run_at, callback, (item,), batched=True, on_misfire=on_misfire)
+            self._jobs[job_id] = job
+            self._heap.append((run_at, next(self._sequence), job))
+        heapq.heapify(self._heap)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _push(self, job: ScheduledJob):
+        job_id = job.job_id
+        if job_id in self._jobs:
+            self.cancel(job_id)
+        self._jobs[job_id] = job
+        heapq.heappush(self._heap, (job.run_at, next(self._sequence), job))
+        # Only an earlier head changes how long the timer loop should sleep
+        if self._wakeup is not None and self._heap[0][2] is job:
+            self._wakeup.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job; its heap entry is discarded lazily when it reaches the top."""
+        if self._jobs.pop(job_id, None) is None:
+            return False
+        self.cancelled += 1
+        # Rebuild once cancelled entries dominate so the heap doesn't grow without bound
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._jobs):
+            self._heap = [entry for entry in self._heap if self._jobs.get(entry[2].job_id) is entry[2]]
+            heapq.heapify(self._heap)
+        return True
+
+    def has_job(self, job_id: str) -> bool:
+        return job_id in self._jobs
+
+    def _is_live(self, job: ScheduledJob) -> bool:
+        return self._jobs.get(job.job_id) is job
+
+    def start(self):
+        """Start the timer loop on the running event loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop firing jobs and wait for callbacks already running."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            # Drop cancelled entries at the head
+            while self._heap and not self._is_live(self._heap[0][2]):
+                heapq.heappop(self._heap)
+
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Take everything that is due in one pass so same-instant batched jobs are dispatched together
+            now = time.time()
+            batches: Dict[Tuple[Callable, float], List[ScheduledJob]] = {}
+            misfires: Dict[Callable, List[ScheduledJob]] = {}
+            while self._heap and self._heap[0][0] <= now:
+                _, _, job = heapq.heappop(self._heap)
+                if not self._is_live(job):
+                    continue
+                del self._jobs[job.job_id]
+                lateness = now - job.run_at
+                if lateness > self.misfire_grace_time:
+                    self.misfired += 1
+                    logger.warning(f"Skipping job {job.job_id}: missed its run time by {lateness:.1f}s")
+                    if job.on_misfire is not None:
+                        misfires.setdefault(job.on_misfire, []).append(job)
+                elif job.batched:
+                    batches.setdefault((job.callback, job.run_at), []).append(job)
+                else:
+                    self._spawn(self._fire([job], job.callback(*job.args)))
+            for (callback, _), jobs in batches.items():
+                self._spawn(self._fire(jobs, callback([job.args[0] for job in jobs])))
+            for on_misfire, jobs in misfires.items():
+                self._spawn(self._report_misfires(jobs, on_misfire([job.args[0] for job in jobs])))
+
+    def _spawn(self, coro: Awaitable):
+        task = asyncio.ensure_future(coro)
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _fire(self, jobs: List[ScheduledJob], call: Awaitable):
+        jitter = max(0.0, time.time() - jobs[0].run_at)
+        FIRE_JITTER_SECONDS.observe(jitter)
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.fired += len(jobs)
+        try:
+            await call
+        except Exception as e:
+            logger.error(f"Error running {len(jobs)} job(s) due at {jobs[0].run_at} ({jobs[0].job_id}, ...): {str(e)}")
+
+    async def _report_misfires(self, jobs: List[ScheduledJob], call: Awaitable):
+        try:
+            await call
+        except Exception as e:
+            logger.error(f"Error handling {len(jobs)} misfired job(s) ({jobs[0].job_id}, ...): {str(e)}")
+
+    def next_run_time(self) -> Optional[datetime]:
+        """Return when the next live job fires, if any."""
+        while self._heap and not self._is_live(self._heap[0][2]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return datetime.utcfromtimestamp(self._heap[0][0])
+
+    def get_stats(self) -> Dict:
+        """Return job counts and firing statistics."""
+        return {
+            'pending_jobs': len(self._jobs),
+            'heap_entries': len(self._heap),
+            'running_jobs': len(self._running),
+            'fired': self.fired,
+            'misfired': self.misfired,
+            'cancelled': self.cancelled,
+            'max_jitter_seconds': round(self.max_jitter, 6),
+        }
@@ -0,0 +1,281 @@
+"""Shared-memory table of the latest tickers and order books.
+
+One market data collector process (`python -m app.collector`) writes; every API worker maps the
+same file read-only and reads it in place. Each symbol owns a fixed-size slot guarded by a
+seqlock: the writer makes the sequence odd while writing and even when done, and readers retry
+if the sequence was odd or changed during the read.
+"""
+import math
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+MAGIC = b'STMD'
+LAYOUT_VERSION = 1
+
+# magic, layout version, slot count, book depth, writer heartbeat, writer pid
+HEADER = struct.Struct('<4sIIIdI')
+HEADER_SIZE = 64
+
+# seq, symbol, last, high, low, bid, ask, base volume, quote volume, ticker ms, book nonce, bid count, ask count, book ms
+SLOT_HEADER = struct.Struct('<Q32s8dqIId')
+
+def _slot_size(depth: int) -> int:
+    return SLOT_HEADER.size + depth * 4 * 8
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+class SharedMarketDataWriter:
+    def __init__(self, path: str, slot_count: int, depth: int):
+        """Initialize the single writer of the shared market data file."""
+        self.path = path
+        self.slot_count = slot_count
+        self.depth = depth
+        self.slot_size = _slot_size(depth)
+        self._map: Optional[mmap.mmap] = None
+        self._slots: Dict[str, int] = {}
+        self._seqs: Dict[int, int] = {}
+
+    def open(self):
+        """Create (or reset) the file and map it."""
+        size = HEADER_SIZE + self.slot_count * self.slot_size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Resize in place instead of recreating, so running readers keep a valid mapping
+            os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+        self._map[HEADER_SIZE:size] = bytes(size - HEADER_SIZE)
+        HEADER.pack_into(self._map, 0, MAGIC, LAYOUT_VERSION, self.slot_count, self.depth, time.time(), os.getpid())
+
+    def close(self):
+        if self._map is not None:
+            # A zero heartbeat tells readers to fall back immediately
+            HEADER.pack_into(self._map, 0, MAGIC, LAYOUT_VERSION, self.slot_count, self.depth, 0.0, os.getpid())
+            self._map.close()
+            self._map = None
+
+    def heartbeat(self):
+        """Record that the writer is alive."""
+        HEADER.pack_into(self._map, 0, MAGIC, LAYOUT_VERSION, self.slot_count, self.depth, time.time(), os.getpid())
+
+    def _slot_offset(self, symbol: str) -> Optional[int]:
+        index = self._slots.get(symbol)
+        if index is None:
+            if len(self._slots) >= self.slot_count:
+                return None
+            index = self._slots[symbol] = len(self._slots)
+            offset = HEADER_SIZE + index * self.slot_size
+            nan = float('nan')
+            self._write(offset, (0, symbol.encode()[:32]) + (nan,) * 7 + (0.0, 0, 0, 0, 0.0))
+            return offset
+        return HEADER_SIZE + index * self.slot_size
+
+    def _read_slot(self, offset: int) -> tuple:
+        return SLOT_HEADER.unpack_from(self._map, offset)
+
+    def _write(self, offset: int, fields: tuple, levels: Optional[List[float]] = None):
+        seq = self._seqs.get(offset, 0)
+        # Odd sequence marks the slot as being written
+        struct.pack_into('<Q', self._map, offset, seq + 1)
+        SLOT_HEADER.pack_into(self._map, offset, seq + 1, *fields[1:])
+        if levels is not None:
+            struct.pack_into(f'<{len(levels)}d', self._map, offset + SLOT_HEADER.size, *levels)
+        struct.pack_into('<Q', self._map, offset, seq + 2)
+        self._seqs[offset] = seq + 2
+
+    def write_ticker(self, symbol: str, ticker: Dict):
+        """Publish the latest ticker fields for a symbol."""
+        offset = self._slot_offset(symbol)
+        if offset is None:
+            return
+        current = self._read_slot(offset)
+        has_book = current[13] > 0
+
+        def merged(index: int, key: str) -> float:
+            # Partial updates (e.g. streamed mini tickers) keep the fields they don't carry
+            if key in ('bid', 'ask') and has_book:
+                return current[index]
+            value = ticker.get(key)
+            return current[index] if value is None else float(value)
+
+        fields = (0, symbol.encode()[:32]) + tuple(
+            merged(index, key) for index, key in enumerate(
+                ('last', 'high', 'low', 'bid', 'ask', 'baseVolume', 'quoteVolume'), start=2
+            )
+        ) + (float(ticker.get('timestamp') or time.time() * 1000),) + current[10:]
+        self._write(offset, fields)
+
+    def write_order_book(self, symbol: str, bids: List[List[float]], asks: List[List[float]], nonce: Optional[int]):
+        """Publish the top levels of a symbol's order book."""
+        offset = self._slot_offset(symbol)
+        if offset is None:
+            return
+        bids, asks = bids[:self.depth], asks[:self.depth]
+        current = self._read_slot(offset)
+        best_bid = bids[0][0] if bids else float('nan')
+        best_ask = asks[0][0] if asks else float('nan')
+        fields = (0, symbol.encode()[:32]) + current[2:5] + (best_bid, best_ask) + current[7:10] + (
+            nonce or 0, len(bids), len(asks), time.time() * 1000
+        )
+        padding = [0.0] * (2 * self.depth)
+        bid_values = [value for level in bids for value in level[:2]]
+        ask_values = [value for level in asks for value in level[:2]]
+        levels = (bid_values + padding)[:2 * self.depth] + (ask_values + padding)[:2 * self.depth]
+        self._write(offset, fields, levels)
+
+    def invalidate_order_book(self, symbol: str):
+        """Withdraw a symbol's book so readers fall back to fetching it directly."""
+        index = self._slots.get(symbol)
+        if index is None:
+            return
+        offset = HEADER_SIZE + index * self.slot_size
+        current = self._read_slot(offset)
+        self._write(offset, current[:10] + (0, 0, 0, 0.0))
+
+class SharedMarketDataReader:
+    def __init__(self, path: str, stale_after: float, max_age: float):
+        """Initialize a read-only view of the collector's shared market data."""
+        self.path = path
+        self.stale_after = stale_after
+        self.max_age = max_age
+        self._map: Optional[mmap.mmap] = None
+        self._depth = 0
+        self._slot_count = 0
+        self._slot_size = 0
+        self._slots: Dict[str, int] = {}
+        self._next_open_attempt = 0.0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self) -> bool:
+        if self._map is not None:
+            return True
+        now = time.monotonic()
+        if now < self._next_open_attempt:
+            return False
+        self._next_open_attempt = now + 5
+        try:
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        magic, version, self._slot_count, self._depth = HEADER.unpack_from(self._map, 0)[:4]
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self._map.close()
+            self._map = None
+            return False
+        self._slot_size = _slot_size(self._depth)
+        return True
+
+    def is_alive(self) -> bool:
+        """Return True if a collector has written a heartbeat recently."""
+        if not self._open():
+            return False
+        slot_count, depth, heartbeat = HEADER.unpack_from(self._map, 0)[2:5]
+        if (slot_count, depth) != (self._slot_count, self._depth):
+            # The collector restarted with a different layout; remap on the next call
+            self._map.close()
+            self._map = None
+            self._slots = {}
+            self._next_open_attempt = 0.0
+            return False
+        return time.time() - heartbeat < self.stale_after
+
+    def _find_slot(self, symbol: str) -> Optional[int]:
+        name = symbol.encode()[:32].ljust(32, b'\0')
+        index = self._slots.get(symbol)
+        if index is not None:
+            offset = HEADER_SIZE + index * self._slot_size
+            if self._map[offset + 8:offset + 40] == name:
+                return offset
+        # Slot assignment changes when the collector restarts, so rescan
+        for index in range(self._slot_count):
+            offset = HEADER_SIZE + index * self._slot_size
+            if self._map[offset + 8:offset + 40] == name:
+                self._slots[symbol] = index
+                return offset
+        return None
+
+    def _read(self, symbol: str, with_levels: bool) -> Optional[tuple]:
+        if not self.is_alive():
+            return None
+        offset = self._find_slot(symbol)
+        if offset is None:
+            return None
+        for _ in range(100):
+            seq = struct.unpack_from('<Q', self._map, offset)[0]
+            if seq & 1:
+                continue
+            fields = SLOT_HEADER.unpack_from(self._map, offset)
+            levels = None
+            if with_levels:
+                levels = struct.unpack_from(f'<{4 * self._depth}d', self._map, offset + SLOT_HEADER.size)
+            if struct.unpack_from('<Q', self._map, offset)[0] == seq:
+                return fields, levels
+        return None
+
+    def get_ticker(self, symbol: str) -> Optional[Dict]:
+        """Return the latest ticker for a symbol, or None if it is missing or stale."""
+        result = self._read(symbol, with_levels=False)
+        if result is None or math.isnan(result[0][2]) or time.time() * 1000 - result[0][9] > self.max_age * 1000:
+            self.misses += 1
+            return None
+        self.hits += 1
+        _, _, last, high, low, bid, ask, base_volume, quote_volume, timestamp = result[0][:10]
+        return {
+            'symbol': symbol,
+            'timestamp': int(timestamp),
+            'datetime': datetime.utcfromtimestamp(timestamp / 1000).isoformat(),
+            'last': last,
+            'high': _optional(high),
+            'low': _optional(low),
+            'bid': _optional(bid),
+            'ask': _optional(ask),
+            'baseVolume': _optional(base_volume),
+            'quoteVolume': _optional(quote_volume),
+        }
+
+    def get_order_book(self, symbol: str, limit: int = 20) -> Optional[Dict]:
+        """Return the top `limit` book levels, or None if unavailable, stale or too shallow."""
+        result = self._read(symbol, with_levels=True)
+        if result is None or limit > self._depth:
+            self.misses += 1
+            return None
+        fields, levels = result
+        nonce, bid_count, ask_count, book_ms = fields[10:14]
+        if book_ms == 0 or time.time() * 1000 - book_ms > self.max_age * 1000:
+            self.misses += 1
+            return None
+        self.hits += 1
+        half = 2 * self._depth
+        return {
+            'symbol': symbol,
+            'bids': [[levels[2 * i], levels[2 * i + 1]] for i in range(min(bid_count, limit))],
+            'asks': [[levels[half + 2 * i], levels[half + 2 * i + 1]] for i in range(min(ask_count, limit))],
+            'timestamp': int(book_ms),
+            'datetime': datetime.utcfromtimestamp(book_ms / 1000).isoformat(),
+            'nonce': nonce
+        }
+
+    def get_stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'alive': self.is_alive(),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+shared_market_data = SharedMarketDataReader(
+    path=settings.SHARED_MARKET_DATA_PATH,
+    stale_after=settings.SHARED_MARKET_DATA_STALE_AFTER,
+    max_age=settings.SHARED_MARKET_DATA_MAX_AGE
+)
@@ -1,226 +1,1021 @@
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from apscheduler.executors.pool import ThreadPoolExecutor
-from datetime import datetime
+import asyncio
+import gc
+from datetime import datetime, timedelta
+from decimal import Decimal
 import logging
-from typing import Optional, Dict, List
-from sqlalchemy.orm import Session
-from app.core.exchange import MEXCExchange
-from app.db.models import ScheduledTrade, Trade, TradeStatus
-from app.db.database import get_db
+import time
+import uuid
+from typing import Optional, Dict, Iterable, List, Set, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, bindparam, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app.core.allocation import allocate_pro_rata, amount_step, floor_to_step, to_decimal
+from app.core.clock import exchange_clock
+from app.core.engine_channel import EngineCommandServer, engine_commands
+from app.core.exchange import MEXCExchange, exchange_instance
+from app.core.execution_pool import ExecutionPool
+from app.core.journal import ExecutionJournal, Leg
+from app.core.leases import ShardLeaseManager
+from app.core.markets import markets_catalog
+from app.core.metrics import metrics
+from app.core.reconciler import FillReconciler
+from app.core.recurrence import expand_next
+from app.core.scheduler import TradeScheduler, to_timestamp
+from app.db.models import RecurringTradeRule, ScheduledTrade, Trade, TradeLegClaim, TradeStatus
+from app.db.database import AsyncSessionLocal
+from app.db.write_behind import write_behind
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+ORDER_ACK_LATENCY_SECONDS = metrics.histogram(
+    'engine_order_ack_latency_seconds',
+    'Time from a trade\'s scheduled instant to the exchange acknowledging its order',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+# Fill records go through the write-behind queue; rows of the same statement share one executemany
+INSERT_TRADE = Trade.__table__.insert()
+MARK_EXECUTED = (
+    ScheduledTrade.__table__.update()
+    .where(ScheduledTrade.__table__.c.id == bindparam('trade_id'))
+    .values(status=TradeStatus.EXECUTED)
+)
+MARK_FAILED = (
+    ScheduledTrade.__table__.update()
+    .where(ScheduledTrade.__table__.c.id == bindparam('trade_id'))
+    .values(status=TradeStatus.FAILED)
+)
+
+class OrderGroup:
+    def __init__(self, trading_pair: str, fire_at: datetime, client_order_id: Optional[str] = None):
+        """Collect the trade legs on one pair that are due at the same instant."""
+        self.trading_pair = trading_pair
+        self.fire_at = fire_at
+        # Lets the order be found on the exchange even if its acknowledgement is lost
+        self.client_order_id = client_order_id or uuid.uuid4().hex
+        self.legs: Dict[str, List[Tuple[int, Decimal]]] = {'buy': [], 'sell': []}
+        self.side = 'buy'
+        self.order_amount = Decimal(0)
+        self.crossed = Decimal(0)
+        self.step = Decimal(0)
+
+    def add(self, side: str, trade_id: int, amount: Decimal):
+        self.legs[side].append((trade_id, amount))
+
+    def total(self, side: str) -> Decimal:
+        return sum((amount for _, amount in self.legs[side]), Decimal(0))
+
+    def trade_ids(self) -> List[int]:
+        return [trade_id for legs in self.legs.values() for trade_id, _ in legs]
+
+    def leg_keys(self) -> List[Leg]:
+        return [(side, trade_id) for side, legs in self.legs.items() for trade_id, _ in legs]
+
+    def discard(self, legs: Set[Leg]):
+        for side in self.legs:
+            self.legs[side] = [(trade_id, amount) for trade_id, amount in self.legs[side] if (side, trade_id) not in legs]
+
+    def plan(self, step: Decimal):
+        """Work out the single order covering the group's legs."""
+        buy_total, sell_total = self.total('buy'), self.total('sell')
+        self.side = 'buy' if buy_total >= sell_total else 'sell'
+        # Opposite legs cross against each other internally; only the difference goes to the exchange
+        self.crossed = min(buy_total, sell_total)
+        self.step = step
+        self.order_amount = floor_to_step(abs(buy_total - sell_total), step)
+
+    def to_intent(self) -> Dict:
+        return {
+            'pair': self.trading_pair,
+            'fire_at': self.fire_at.isoformat(),
+            'side': self.side,
+            'amount': str(self.order_amount),
+            'crossed': str(self.crossed),
+            'step': str(self.step),
+            'legs': [[side, trade_id, str(amount)] for side, legs in self.legs.items() for trade_id, amount in legs],
+        }
+
+    @classmethod
+    def from_intent(cls, intent: Dict) -> "OrderGroup":
+        group = cls(intent['pair'], datetime.fromisoformat(intent['fire_at']), intent['client_order_id'])
+        for side, trade_id, amount in intent['legs']:
+            group.add(side, trade_id, Decimal(amount))
+        group.side = intent['side']
+        group.order_amount = Decimal(intent['amount'])
+        group.crossed = Decimal(intent['crossed'])
+        group.step = Decimal(intent['step'])
+        return group
+
 class ScheduledTradeEngine:
-    def __init__(self):
+    def __init__(self, exchange: Optional[MEXCExchange] = None):
         """Initialize the scheduled trading engine."""
-        # Configure job stores
-        jobstores = {
-            'default': SQLAlchemyJobStore(url=settings.DATABASE_URL)
-        }
-        
-        # Configure executors
-        executors = {
-            'default': ThreadPoolExecutor(20)
-        }
-        
-        # Create scheduler
-        self.scheduler = AsyncIOScheduler(
-            jobstores=jobstores,
-            executors=executors,
-            timezone='UTC'
+        # Jobs live in memory; the execution journal and its snapshots let a restart restore them quickly
+        self.scheduler = TradeScheduler(misfire_grace_time=settings.SCHEDULER_MISFIRE_GRACE_SECONDS)
+        self.journal = ExecutionJournal(settings.JOURNAL_DIR, flush_interval=settings.JOURNAL_FLUSH_INTERVAL)
+        # Trades are split into shards by id; this instance only schedules the shards it holds a lease on
+        self.leases = ShardLeaseManager(
+            shard_count=settings.ENGINE_SHARD_COUNT,
+            ttl=settings.ENGINE_LEASE_TTL,
+            renew_interval=settings.ENGINE_LEASE_RENEW_INTERVAL
+        )
+
+        self.commands = EngineCommandServer(settings.ENGINE_SOCKET_DIR, self.handle_command)
+
+        # Reuse the API's exchange connection so both share one connection pool
+        self.exchange = exchange or exchange_instance
+        self.clock = exchange_clock
+        self.execution_pool = ExecutionPool(
+            concurrency=settings.ENGINE_EXECUTION_CONCURRENCY,
+            max_queued=settings.ENGINE_EXECUTION_QUEUE_SIZE
         )
-        
-        # Initialize exchange connection
-        self.exchange = MEXCExchange(
-            api_key=settings.MEXC_API_KEY,
-            api_secret=settings.MEXC_API_SECRET
+        # Confirms fills of orders acknowledged before they settled
+        self.reconciler = FillReconciler(
+            self.exchange,
+            min_interval=settings.FILL_RECONCILE_MIN_INTERVAL,
+            max_interval=settings.FILL_RECONCILE_MAX_INTERVAL,
+            batch_size=settings.FILL_RECONCILE_BATCH_SIZE,
+            max_age=settings.FILL_RECONCILE_MAX_AGE
         )
 
+        # Fire time (exchange epoch seconds) of every leg not yet filled, failed or cancelled
+        self._armed: Dict[Leg, float] = {}
+        # Legs handed to execute_due_orders and not finished yet
+        self._executing: Set[Leg] = set()
+        # Scheduled trades changed after this instant are not yet reflected in the armed legs
+        self._watermark: Optional[datetime] = None
+        # Legs due before this instant are armed; later ones stay in the database until the pager reaches them
+        self._horizon_end: Optional[datetime] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._pager_task: Optional[asyncio.Task] = None
+        # Fills waiting for their write-behind batch when ORDER_RECORD_DURABILITY is "deferred"
+        self._recording: Set[asyncio.Task] = set()
+
     async def start(self):
         """Start the trading engine."""
         try:
             # Validate exchange connection
             await self.exchange.validate_connection()
-            
-            # Start the scheduler
+
+            # Trade times are exchange times; measure how far the local clock is off
+            await self.clock.sync(self.exchange)
+            self.clock.start(self.exchange)
+
+            # Start the scheduler and the workers it hands due orders to
+            self.execution_pool.start()
             self.scheduler.start()
-            
-            # Load existing scheduled trades
+
+            # Take a share of the shards, then load their scheduled trades
+            await self.leases.acquire()
             await self.load_scheduled_trades()
-            
+            self.leases.start(self._on_shards_acquired, self._on_shards_lost)
+            await self.reconciler.load(self.leases.shard_filter(Trade.scheduled_trade_id))
+            self.reconciler.start()
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+            self._pager_task = asyncio.create_task(self._pager_loop())
+
+            # Trade changes from the API arrive from here on
+            await self.commands.start()
+
             logger.info("Scheduled trading engine started successfully")
         except Exception as e:
             logger.error(f"Failed to start trading engine: {str(e)}")
             raise
 
     async def load_scheduled_trades(self):
-        """Load existing scheduled trades from database."""
-        db = next(get_db())
+        """Restore armed legs from the journal snapshot and tail, then page in trades due within the horizon."""
         try:
-            # Get all pending scheduled trades
-            scheduled_trades = db.query(ScheduledTrade).filter(
-                ScheduledTrade.status == TradeStatus.PENDING
-            ).all()
-            
-            # Schedule each trade
-            for trade in scheduled_trades:
-                await self.schedule_trade(trade)
-                
-            logger.info(f"Loaded {len(scheduled_trades)} scheduled trades")
+            started = time.monotonic()
+            state = await self.journal.open()
+            now = datetime.utcnow()
+            self._watermark = now
+            # Legs further overdue than this would only be skipped as misfires
+            self._horizon_end = now - timedelta(seconds=settings.SCHEDULER_MISFIRE_GRACE_SECONDS)
+
+            # Intents for shards now owned by another instance are reconciled there from their claims
+            for intent in list(self.journal.in_flight.values()):
+                if not any(self.leases.owns(trade_id) for _, trade_id, _ in intent['legs']):
+                    self.journal.record('released', intent['client_order_id'])
+            in_flight = self._in_flight_legs()
+
+            changed = 0
+            snapshot = state.armed or {}
+            if state.snapshot_found and snapshot.get('horizon_end'):
+                excluded = state.settled | in_flight
+                owns = self.leases.owns
+                self._arm_many(
+                    (side, trade_id, fire_at)
+                    for side in ('buy', 'sell')
+                    for trade_id, fire_at in zip(*snapshot[side])
+                    if owns(trade_id) and (side, trade_id) not in excluded
+                )
+                # The snapshot covers its own window; apply whatever the API changed in it since
+                self._horizon_end = max(self._horizon_end, datetime.fromisoformat(snapshot['horizon_end']))
+                since = datetime.fromisoformat(state.watermark) - timedelta(seconds=settings.JOURNAL_CATCHUP_MARGIN)
+                changed = await self._catch_up(since, skip=in_flight)
+                # Shards this process didn't hold when the snapshot was taken aren't in it
+                new_shards = set(self.leases.owned) - set(snapshot.get('shards', []))
+                changed += await self._page_in(now - timedelta(seconds=settings.SCHEDULER_MISFIRE_GRACE_SECONDS),
+                                               self._horizon_end, new_shards, skip=in_flight)
+
+            horizon_end = now + timedelta(seconds=settings.ENGINE_HORIZON_SECONDS)
+            await self._expand_rules(horizon_end)
+            paged = await self._extend_horizon(horizon_end, skip=in_flight)
+
+            # Orders that may have been sent before the crash, by this process or a dead instance
+            for intent in list(self.journal.in_flight.values()):
+                await self._reconcile(OrderGroup.from_intent(intent))
+            await self._reconcile_claims()
+
+            logger.info(
+                f"Loaded {len(self._armed)} scheduled trade legs due before {self._horizon_end} "
+                f"({changed} changed and {paged} paged-in trades read, {len(state.in_flight)} orders reconciled) "
+                f"in {time.monotonic() - started:.3f}s"
+            )
         except Exception as e:
             logger.error(f"Error loading scheduled trades: {str(e)}")
             raise
+
+    async def _catch_up(self, since: datetime, skip: Set[Leg] = frozenset()) -> int:
+        """Re-arm or disarm the legs of trades changed since `since`, keeping only open legs inside the horizon."""
+        # Trades moved out of the window aren't read here; execute_due_orders re-arms them when the old time comes
+        changed = (
+            ScheduledTrade.updated_at >= since,
+            or_(ScheduledTrade.buy_time < self._horizon_end, ScheduledTrade.sell_time < self._horizon_end),
+            self.leases.shard_filter(ScheduledTrade.id)
+        )
+        query = (
+            select(ScheduledTrade.id, ScheduledTrade.status, ScheduledTrade.buy_time, ScheduledTrade.sell_time)
+            .where(*changed)
+        )
+        executed = (
+            select(Trade.scheduled_trade_id, Trade.side)
+            .join(ScheduledTrade, Trade.scheduled_trade_id == ScheduledTrade.id)
+            .where(ScheduledTrade.status == TradeStatus.PENDING, *changed)
+        )
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(query)).all()
+            done = {(side, trade_id) for trade_id, side in (await db.execute(executed)).all()}
+
+        horizon_end = to_timestamp(self._horizon_end)
+        arm = []
+        for trade_id, status, buy_time, sell_time in rows:
+            for side, fire_at in (('buy', buy_time), ('sell', sell_time)):
+                leg = (side, trade_id)
+                if leg in skip:
+                    continue
+                fire_at = to_timestamp(fire_at)
+                if status != TradeStatus.PENDING or leg in done or fire_at >= horizon_end:
+                    self._disarm(leg)
+                else:
+                    arm.append((side, trade_id, fire_at))
+        self._arm_many(arm)
+        return len(rows)
+
+    async def _extend_horizon(self, end: datetime, skip: Set[Leg] = frozenset()) -> int:
+        """Arm the open legs due between the current horizon and `end` using indexed range queries."""
+        start = self._horizon_end
+        if end <= start:
+            return 0
+        # Advance first so API changes arriving during the queries are armed directly; they are newer than the
+        # rows read here, which is why legs armed in the meantime are left alone in _page_in
+        self._horizon_end = end
+        return await self._page_in(start, end, set(self.leases.owned), skip)
+
+    async def _page_in(self, start: datetime, end: datetime, shards: Set[int], skip: Set[Leg] = frozenset()) -> int:
+        """Arm the open legs of `shards` due in [start, end)."""
+        if not shards:
+            return 0
+        rows = {}
+        done = set()
+        in_shards = (ScheduledTrade.id % self.leases.shard_count).in_(sorted(shards))
+        async with AsyncSessionLocal() as db:
+            for column in (ScheduledTrade.buy_time, ScheduledTrade.sell_time):
+                in_window = (ScheduledTrade.status == TradeStatus.PENDING, column >= start, column < end, in_shards)
+                result = await db.execute(
+                    select(ScheduledTrade.id, ScheduledTrade.buy_time, ScheduledTrade.sell_time).where(*in_window)
+                )
+                rows.update((row[0], row) for row in result.all())
+                result = await db.execute(
+                    select(Trade.scheduled_trade_id, Trade.side)
+                    .join(ScheduledTrade, Trade.scheduled_trade_id == ScheduledTrade.id)
+                    .where(*in_window)
+                )
+                done.update((side, trade_id) for trade_id, side in result.all())
+
+        start_at, end_at = to_timestamp(start), to_timestamp(end)
+        arm = []
+        for trade_id, buy_time, sell_time in rows.values():
+            for side, fire_at in (('buy', buy_time), ('sell', sell_time)):
+                leg = (side, trade_id)
+                fire_at = to_timestamp(fire_at)
+                if start_at <= fire_at < end_at and leg not in done and leg not in skip and leg not in self._armed:
+                    arm.append((side, trade_id, fire_at))
+        self._arm_many(arm)
+        return len(rows)
+
+    async def _pager_loop(self):
+        while True:
+            await asyncio.sleep(settings.ENGINE_PAGER_INTERVAL)
+            try:
+                horizon_end = datetime.utcnow() + timedelta(seconds=settings.ENGINE_HORIZON_SECONDS)
+                await self._expand_rules(horizon_end)
+                await self._extend_horizon(horizon_end, skip=self._executing | self._in_flight_legs())
+                await self._reconcile_claims()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error paging in scheduled trades: {str(e)}")
+
+    async def _on_shards_acquired(self, shards: Set[int]):
+        """Load the window of shards taken over from another instance and pick up its unfinished orders."""
+        start = datetime.utcnow() - timedelta(seconds=settings.SCHEDULER_MISFIRE_GRACE_SECONDS)
+        paged = await self._page_in(start, self._horizon_end, shards, skip=self._executing | self._in_flight_legs())
+        logger.info(f"Loaded {paged} scheduled trades for acquired shards {sorted(shards)}")
+        await self._expand_rules(self._horizon_end)
+        await self._reconcile_claims()
+        await self.reconciler.load((Trade.scheduled_trade_id % self.leases.shard_count).in_(sorted(shards)))
+
+    async def _expand_rules(self, end: datetime, rule_ids: Optional[List[int]] = None) -> int:
+        """Turn the next occurrence of each recurring rule due before `end` into a scheduled trade.
+
+        A rule has at most one occurrence waiting for its buy; the one after it is expanded once it
+        fires (see _advance_rules), so pending rows stay one per rule however dense the schedule.
+        """
+        if not self.leases.owned:
+            return 0
+        conditions = [
+            RecurringTradeRule.status == TradeStatus.PENDING,
+            RecurringTradeRule.next_occurrence_at < end,
+            # Rules are sharded by their own id, so only one instance expands each
+            self.leases.shard_filter(RecurringTradeRule.id)
+        ]
+        if rule_ids is not None:
+            conditions.append(RecurringTradeRule.id.in_(rule_ids))
+        now = datetime.utcnow()
+        earliest = now - timedelta(seconds=settings.SCHEDULER_MISFIRE_GRACE_SECONDS)
+        # Occurrences fire this far ahead of their time; the extra second absorbs clock rounding
+        upcoming = now + timedelta(seconds=settings.ENGINE_PREARM_SECONDS + 1)
+        async with AsyncSessionLocal() as db:
+            rules = (await db.execute(select(RecurringTradeRule).where(*conditions))).scalars().all()
+            if not rules:
+                return 0
+            rule_ids = [rule.id for rule in rules]
+            result = await db.execute(
+                select(ScheduledTrade.recurring_rule_id).where(
+                    ScheduledTrade.recurring_rule_id.in_(rule_ids),
+                    ScheduledTrade.status == TradeStatus.PENDING,
+                    ScheduledTrade.occurrence_at > upcoming
+                )
+            )
+            waiting = set(result.scalars().all())
+            result = await db.execute(
+                select(ScheduledTrade.recurring_rule_id, ScheduledTrade.occurrence_at).where(
+                    ScheduledTrade.recurring_rule_id.in_(rule_ids),
+                    ScheduledTrade.occurrence_at >= min(rule.next_occurrence_at for rule in rules)
+                )
+            )
+            expanded = set(result.all())
+            trades = []
+            for rule in rules:
+                if rule.id in waiting:
+                    continue
+                trade = expand_next(rule, end, earliest)
+                if trade is not None and (trade.recurring_rule_id, trade.occurrence_at) not in expanded:
+                    trades.append(trade)
+            db.add_all(trades)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another instance expanded them in the meantime; it advanced the rules as well
+                await db.rollback()
+                logger.warning(f"Occurrences of recurring rules {rule_ids} were already expanded")
+                return 0
+
+        # Occurrences fall into any shard; the others' engines learn of them through the command channel
+        for trade in trades:
+            if self.leases.owns(trade.id):
+                await self.schedule_trade(trade)
+            else:
+                await engine_commands.send('schedule', trade.id)
+        if trades:
+            logger.info(f"Expanded the next occurrence of {len(trades)} recurring rules")
+        return len(trades)
+
+    async def _advance_rules(self, rule_ids: Set[int]):
+        """Expand the next occurrence of rules whose current one just fired, on the instance owning each rule."""
+        try:
+            owned = [rule_id for rule_id in rule_ids if self.leases.owns(rule_id)]
+            if owned:
+                await self._expand_rules(self._horizon_end, rule_ids=owned)
+            for rule_id in rule_ids.difference(owned):
+                await engine_commands.send('rule', rule_id)
+        except Exception as e:
+            logger.error(f"Error advancing recurring rules {sorted(rule_ids)}: {str(e)}")
+
+    async def _on_shards_lost(self, shards: Set[int]):
+        """Stop scheduling shards another instance now owns; claims keep legs already under way from firing twice."""
+        for leg in [leg for leg in self._armed if self.leases.shard_of(leg[1]) in shards]:
+            self._disarm(leg)
+
+    def _arm_many(self, legs: Iterable[Tuple[str, int, float]]):
+        prearm = settings.ENGINE_PREARM_SECONDS
+        # Cyclic GC passes over the growing heap would otherwise double the cost of a bulk load
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            entries = []
+            for side, trade_id, fire_at in legs:
+                leg = (side, trade_id)
+                self._armed[leg] = fire_at
+                entries.append((f"{side}_{trade_id}", fire_at - prearm, leg))
+            if entries:
+                self.scheduler.load_batched(self.execute_due_orders, entries, on_misfire=self._on_misfire)
         finally:
-            db.close()
+            if gc_enabled:
+                gc.enable()
+
+    def _disarm(self, leg: Leg):
+        if self._armed.pop(leg, None) is not None:
+            self.scheduler.cancel(f"{leg[0]}_{leg[1]}")
+
+    def _settle(self, group: OrderGroup):
+        for leg in group.leg_keys():
+            self._armed.pop(leg, None)
+
+    def _snapshot_state(self) -> Dict:
+        """The horizon and the armed legs as per-side [trade_ids, fire_times] columns, which load far faster than one list per leg."""
+        state = {
+            'horizon_end': self._horizon_end.isoformat(),
+            'shards': sorted(self.leases.owned),
+            'buy': [[], []],
+            'sell': [[], []]
+        }
+        for (side, trade_id), fire_at in self._armed.items():
+            trade_ids, fire_times = state[side]
+            trade_ids.append(trade_id)
+            fire_times.append(fire_at)
+        return state
+
+    def _in_flight_legs(self) -> Set[Leg]:
+        return {(side, trade_id) for intent in self.journal.in_flight.values() for side, trade_id, _ in intent['legs']}
 
     async def schedule_trade(self, trade: ScheduledTrade):
-        """Schedule a new trade."""
+        """Schedule a new or updated trade; legs beyond the horizon are left for the pager."""
         try:
-            # Schedule buy order
-            self.scheduler.add_job(
-                self.execute_buy_order,
-                'date',
-                run_date=trade.buy_time,
-                args=[trade.id],
-                id=f"buy_{trade.id}",
-                replace_existing=True
-            )
-            
-            # Schedule sell order
-            self.scheduler.add_job(
-                self.execute_sell_order,
-                'date',
-                run_date=trade.sell_time,
-                args=[trade.id],
-                id=f"sell_{trade.id}",
-                replace_existing=True
-            )
-            
+            if trade.status != TradeStatus.PENDING or not self.leases.owns(trade.id):
+                self.unschedule_trade(trade.id)
+                return
+
+            # Legs due at the same instant are armed together ahead of time, then fired by execute_due_orders
+            prearm = timedelta(seconds=settings.ENGINE_PREARM_SECONDS)
+            horizon_end = to_timestamp(self._horizon_end) if self._horizon_end else None
+            busy = self._executing | self._in_flight_legs()
+            for side, fire_at in (('buy', trade.buy_time), ('sell', trade.sell_time)):
+                leg = (side, trade.id)
+                if leg in busy:
+                    continue
+                if horizon_end is not None and to_timestamp(fire_at) >= horizon_end:
+                    self._disarm(leg)
+                    continue
+                self._armed[leg] = to_timestamp(fire_at)
+                self.scheduler.schedule_batched(
+                    f"{side}_{trade.id}", fire_at - prearm, self.execute_due_orders, leg, on_misfire=self._on_misfire
+                )
+
             logger.info(f"Scheduled trade {trade.id} for {trade.trading_pair}")
         except Exception as e:
             logger.error(f"Error scheduling trade {trade.id}: {str(e)}")
             raise
 
+    def unschedule_trade(self, trade_id: int):
+        """Drop a trade's armed legs without touching the database."""
+        self._disarm(('buy', trade_id))
+        self._disarm(('sell', trade_id))
+
     async def execute_buy_order(self, trade_id: int):
         """Execute a buy order for a scheduled trade."""
-        db = next(get_db())
+        await self.execute_due_orders([('buy', trade_id)])
+
+    async def execute_sell_order(self, trade_id: int):
+        """Execute a sell order for a scheduled trade."""
+        await self.execute_due_orders([('sell', trade_id)])
+
+    async def execute_due_orders(self, legs: List[Tuple[str, int]]):
+        """Arm trade legs due at the same instant and fire one aggregated order per pair (and side, unless netting)."""
+        legs = [tuple(leg) for leg in legs if tuple(leg) not in self._executing]
+        self._executing.update(legs)
+        moved: List[ScheduledTrade] = []
         try:
-            # Get trade details
-            trade = db.query(ScheduledTrade).filter(
-                ScheduledTrade.id == trade_id
-            ).first()
-            
-            if not trade or trade.status != TradeStatus.PENDING:
-                logger.warning(f"Trade {trade_id} not found or not pending")
+            trade_ids = [trade_id for _, trade_id in legs]
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(ScheduledTrade).where(
+                        ScheduledTrade.id.in_(trade_ids),
+                        ScheduledTrade.status == TradeStatus.PENDING
+                    )
+                )
+                trades = {trade.id: trade for trade in result.scalars()}
+                # A leg already recorded must not trade again, however it came to be rescheduled
+                result = await db.execute(
+                    select(Trade.scheduled_trade_id, Trade.side).where(Trade.scheduled_trade_id.in_(trade_ids))
+                )
+                executed = {(side, trade_id) for trade_id, side in result.all()}
+
+            groups: Dict[Tuple, OrderGroup] = {}
+            for side, trade_id in legs:
+                trade = trades.get(trade_id)
+                if trade is None or (side, trade_id) in executed:
+                    logger.warning(f"Trade {trade_id} not found, not pending or its {side} already executed")
+                    self._armed.pop((side, trade_id), None)
+                    continue
+                fire_at = trade.buy_time if side == 'buy' else trade.sell_time
+                if to_timestamp(fire_at) != self._armed.get((side, trade_id), to_timestamp(fire_at)):
+                    # Moved since it was armed (possibly beyond the horizon); arm it again for its new time
+                    moved.append(trade)
+                    continue
+                key = (trade.trading_pair,) if settings.ENGINE_NETTING_ENABLED else (trade.trading_pair, side)
+                if key not in groups:
+                    groups[key] = OrderGroup(trade.trading_pair, fire_at)
+                groups[key].add(side, trade.id, to_decimal(trade.amount))
+            if not groups:
                 return
-            
-            # Execute market buy order
-            order = await self.exchange.create_market_order(
-                trade.trading_pair,
-                'buy',
-                trade.amount
-            )
-            
-            # Create trade record
-            trade_record = Trade(
-                scheduled_trade_id=trade.id,
-                order_id=order['id'],
-                side='buy',
-                amount=trade.amount,
-                price=order['price'],
-                status=TradeStatus.COMPLETED,
-                executed_at=datetime.utcnow()
-            )
-            
-            db.add(trade_record)
-            db.commit()
-            
-            logger.info(f"Executed buy order for trade {trade_id}")
-        except Exception as e:
-            logger.error(f"Error executing buy order for trade {trade_id}: {str(e)}")
-            # Update trade status to failed
-            trade.status = TradeStatus.FAILED
-            db.commit()
+
+            try:
+                # Keep-alive connection and ccxt market definitions ready before the first order goes out
+                await self.exchange.warm_up()
+            except Exception as e:
+                logger.warning(f"Error warming up exchange connection: {str(e)}")
+
+            await asyncio.gather(*(self._execute_group(group) for group in groups.values()))
+
+            # A recurring occurrence's buy going out lets its rule expand the next one
+            rule_ids = {trades[trade_id].recurring_rule_id for group in groups.values() for trade_id, _ in group.legs['buy']}
+            rule_ids.discard(None)
+            if rule_ids:
+                await self._advance_rules(rule_ids)
         finally:
-            db.close()
+            self._executing.difference_update(legs)
+            for trade in moved:
+                await self.schedule_trade(trade)
 
-    async def execute_sell_order(self, trade_id: int):
-        """Execute a sell order for a scheduled trade."""
-        db = next(get_db())
+    async def _on_misfire(self, legs: List[Tuple[str, int]]):
+        """Fail the trades whose legs the scheduler skipped as too late, so they stop holding their armed slots."""
+        trade_ids = set()
+        for side, trade_id in legs:
+            if self._armed.pop((side, trade_id), None) is not None:
+                trade_ids.add(trade_id)
+        if not trade_ids:
+            return
+        # A trade that missed one leg must not fire the other
+        for trade_id in trade_ids:
+            self.unschedule_trade(trade_id)
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(
+                    update(ScheduledTrade)
+                    .where(ScheduledTrade.id.in_(trade_ids), ScheduledTrade.status == TradeStatus.PENDING)
+                    .values(status=TradeStatus.FAILED)
+                )
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error marking misfired trades {sorted(trade_ids)} as failed: {str(e)}")
+                return
+        logger.warning(f"Marked trades {sorted(trade_ids)} as failed after missing their run time")
+
+    async def _claim(self, group: OrderGroup) -> bool:
+        """Record a claim on each of the group's legs while this instance still holds their shards' leases.
+
+        Legs another instance has claimed are dropped from the group; False means nothing is left to send.
+        """
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(
+                    select(TradeLegClaim.scheduled_trade_id, TradeLegClaim.side)
+                    .where(TradeLegClaim.scheduled_trade_id.in_(group.trade_ids()))
+                )
+                taken = {(side, trade_id) for trade_id, side in result.all()} & set(group.leg_keys())
+                if taken:
+                    logger.warning(f"Skipping {group.trading_pair} trade legs {sorted(taken)} already claimed")
+                    for leg in taken:
+                        self._armed.pop(leg, None)
+                    group.discard(taken)
+                if not group.leg_keys():
+                    return False
+
+                shards = {self.leases.shard_of(trade_id) for trade_id in group.trade_ids()}
+                if not await self.leases.fence(db, shards):
+                    await db.rollback()
+                    logger.warning(f"Lost the lease on {group.trading_pair} trades {group.trade_ids()} before sending")
+                    return False
+                db.add_all(
+                    TradeLegClaim(
+                        scheduled_trade_id=trade_id,
+                        side=side,
+                        client_order_id=group.client_order_id,
+                        owner=self.leases.instance_id,
+                        epoch=self.leases.owned.get(self.leases.shard_of(trade_id))
+                    )
+                    for side, trade_id in group.leg_keys()
+                )
+                await db.commit()
+                return True
+            except IntegrityError:
+                await db.rollback()
+                logger.warning(f"{group.trading_pair} trades {group.trade_ids()} were claimed by another engine instance")
+                return False
+
+    async def _reconcile_claims(self):
+        """Resolve orders claimed by an instance that stopped before recording them, for shards now owned here."""
+        if not self.leases.owned:
+            return
+        stale = datetime.utcnow() - timedelta(seconds=self.leases.ttl)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(TradeLegClaim, ScheduledTrade)
+                .join(ScheduledTrade, TradeLegClaim.scheduled_trade_id == ScheduledTrade.id)
+                .outerjoin(Trade, and_(
+                    Trade.scheduled_trade_id == TradeLegClaim.scheduled_trade_id,
+                    Trade.side == TradeLegClaim.side
+                ))
+                .where(
+                    Trade.id.is_(None),
+                    ScheduledTrade.status == TradeStatus.PENDING,
+                    TradeLegClaim.claimed_at < stale,
+                    self.leases.shard_filter(TradeLegClaim.scheduled_trade_id)
+                )
+            )
+            rows = result.all()
+
+        groups: Dict[str, OrderGroup] = {}
+        for claim, trade in rows:
+            leg = (claim.side, trade.id)
+            # This process's own orders are tracked by its journal
+            if claim.client_order_id in self.journal.in_flight or leg in self._executing:
+                continue
+            fire_at = trade.buy_time if claim.side == 'buy' else trade.sell_time
+            if to_timestamp(fire_at) + self.leases.ttl > self.clock.now():
+                continue
+            group = groups.get(claim.client_order_id)
+            if group is None:
+                group = groups[claim.client_order_id] = OrderGroup(trade.trading_pair, fire_at, claim.client_order_id)
+            group.add(claim.side, trade.id, to_decimal(trade.amount))
+
+        for group in groups.values():
+            for leg in group.leg_keys():
+                self._disarm(leg)
+            group.plan(amount_step(markets_catalog.get_market(group.trading_pair)))
+            # Adopted into this journal so a crash while resolving it doesn't lose track of it again
+            self.journal.record('intent', group.client_order_id, **group.to_intent())
+            logger.info(f"Reconciling {group.trading_pair} order {group.client_order_id} claimed by another engine instance")
+            await self._reconcile(group)
+
+    async def _wait_until(self, fire_at: datetime):
+        """Wait until an order sent now would reach the exchange at `fire_at` (exchange time)."""
+        send_at = self.clock.to_local(to_timestamp(fire_at)) - self.clock.one_way_latency()
+        # Convert once to the monotonic clock so wall-clock adjustments can't move the deadline
+        deadline = time.monotonic() + (send_at - time.time())
+        coarse = deadline - time.monotonic() - settings.ENGINE_FIRE_SPIN_SECONDS
+        if coarse > 0:
+            await asyncio.sleep(coarse)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0)
+
+    async def _execute_group(self, group: OrderGroup):
+        """Claim a group's legs and journal its order intent, wait for its fire time, then run it in the pool on its pair's lane."""
         try:
-            # Get trade details
-            trade = db.query(ScheduledTrade).filter(
-                ScheduledTrade.id == trade_id
-            ).first()
-            
-            if not trade or trade.status != TradeStatus.PENDING:
-                logger.warning(f"Trade {trade_id} not found or not pending")
+            if not await self._claim(group):
+                self._settle(group)
+                return
+            group.plan(amount_step(markets_catalog.get_market(group.trading_pair)))
+            if group.order_amount > 0:
+                # Durable before the order can exist, so a crash after sending it can't go unnoticed
+                await self.journal.commit('intent', group.client_order_id, **group.to_intent())
+            # Spend the rate limiter wait now rather than at the scheduled instant
+            await self.exchange.reserve_rate_limit('create_order')
+            await self._wait_until(group.fire_at)
+            # One lane per pair keeps a trade's sell behind its own buy
+            await self.execution_pool.submit(group.trading_pair, lambda: self._fire_group(group))
+        except Exception as e:
+            logger.error(f"Error executing {group.trading_pair} trades {group.trade_ids()}: {str(e)}")
+            self._fail_intent(group)
+            await self._mark_failed(group)
+
+    async def _fire_group(self, group: OrderGroup):
+        """Submit one order for a group's net amount and record per-trade fills in a single transaction."""
+        pair = group.trading_pair
+        order = None
+        ack_latency_ms = None
+        filled = Decimal(0)
+        price = None
+        if group.order_amount > 0:
+            try:
+                order = await self.exchange.create_market_order(
+                    pair, group.side, float(group.order_amount),
+                    rate_limit_acquired=True, client_order_id=group.client_order_id
+                )
+            except HTTPException as e:
+                logger.error(f"Error executing {group.side} order for {pair} covering trades {group.trade_ids()}: {e.detail}")
+                if e.status_code == 500:
+                    # The request may still have reached the exchange; look it up before giving up on it
+                    await self._reconcile(group)
+                else:
+                    self._fail_intent(group)
+                    await self._mark_failed(group)
                 return
-            
-            # Execute market sell order
-            order = await self.exchange.create_market_order(
-                trade.trading_pair,
-                'sell',
-                trade.amount
+            except Exception as e:
+                logger.error(f"Error executing {group.side} order for {pair} covering trades {group.trade_ids()}: {str(e)}")
+                await self._reconcile(group)
+                return
+            self.journal.record('submitted', group.client_order_id, order_id=order['id'])
+
+            ack_latency = self.clock.now() - to_timestamp(group.fire_at)
+            ORDER_ACK_LATENCY_SECONDS.observe(max(0.0, ack_latency))
+            ack_latency_ms = round(ack_latency * 1000, 3)
+            # Market order acks may omit the fill; assume it filled in full until reconciled
+            filled = to_decimal(order['filled']) if order.get('filled') is not None else group.order_amount
+            price = order.get('average') or order.get('price')
+        if price is None:
+            try:
+                price = (await self.exchange.fetch_ticker(pair))['last']
+            except Exception as e:
+                logger.warning(f"Error fetching a reference price for {pair}: {str(e)}")
+
+        await self._record_fills(group, order, filled, price, ack_latency_ms)
+
+    async def _record_fills(
+        self,
+        group: OrderGroup,
+        order: Optional[Dict],
+        filled: Decimal,
+        price: Optional[float],
+        ack_latency_ms: Optional[float]
+    ):
+        """Allocate an order's fill across the group's trades and record it, at most once per order."""
+        pair = group.trading_pair
+        side = group.side
+        other_side = 'sell' if side == 'buy' else 'buy'
+        shares = dict(zip(
+            [trade_id for trade_id, _ in group.legs[side]],
+            allocate_pro_rata(group.crossed + filled, [amount for _, amount in group.legs[side]], group.step)
+        ))
+        shares.update({trade_id: amount for trade_id, amount in group.legs[other_side]})
+
+        try:
+            # Recovery may reconcile an order whose fills were committed just before a crash
+            recorded = False
+            if order is not None:
+                async with AsyncSessionLocal() as db:
+                    recorded = (await db.execute(
+                        select(Trade.id).where(Trade.order_id == order['id']).limit(1)
+                    )).first() is not None
+
+            executed_at = datetime.utcnow()
+            # An acknowledgement that doesn't show a completed fill is recorded as pending until the reconciler confirms it
+            confirmed = order is None or (
+                order.get('status') == 'closed' and (order.get('average') or order.get('price')) is not None
             )
-            
-            # Create trade record
-            trade_record = Trade(
-                scheduled_trade_id=trade.id,
-                order_id=order['id'],
-                side='sell',
-                amount=trade.amount,
-                price=order['price'],
-                status=TradeStatus.COMPLETED,
-                executed_at=datetime.utcnow()
+            trades = []
+            unfilled = []
+            for leg_side, legs in group.legs.items():
+                for trade_id, _ in legs:
+                    if shares[trade_id] <= 0:
+                        unfilled.append(trade_id)
+                        continue
+                    if recorded:
+                        continue
+                    trades.append({
+                        'scheduled_trade_id': trade_id,
+                        'order_id': order['id'] if order else None,
+                        'side': leg_side,
+                        'amount': float(shares[trade_id]),
+                        'price': price,
+                        'status': TradeStatus.EXECUTED if confirmed else TradeStatus.PENDING,
+                        'executed_at': executed_at,
+                        'ack_latency_ms': ack_latency_ms
+                    })
+
+            # A completed sell closes the scheduled trade
+            sold = [trade_id for trade_id, _ in group.legs['sell'] if trade_id not in unfilled]
+            committed = write_behind.submit([
+                (INSERT_TRADE, trades),
+                (MARK_EXECUTED, [{'trade_id': trade_id} for trade_id in sold]),
+                (MARK_FAILED, [{'trade_id': trade_id} for trade_id in unfilled]),
+            ])
+        except Exception as e:
+            logger.error(
+                f"Error recording fills for {pair} order {order['id'] if order else None} "
+                f"covering trades {group.trade_ids()}: {str(e)}"
             )
-            
-            # Update scheduled trade status
-            trade.status = TradeStatus.COMPLETED
-            
-            db.add(trade_record)
-            db.commit()
-            
-            logger.info(f"Executed sell order for trade {trade_id}")
+            if order is None:
+                await self._mark_failed(group)
+            return
+
+        recording = self._after_fills_recorded(committed, group, order, confirmed)
+        if settings.ORDER_RECORD_DURABILITY == 'deferred':
+            # The journal keeps the order in flight until its batch commits, so a crash before then is reconciled on restart
+            task = asyncio.create_task(recording)
+            self._recording.add(task)
+            task.add_done_callback(self._recording.discard)
+        else:
+            await recording
+
+    async def _after_fills_recorded(self, committed: asyncio.Future, group: OrderGroup, order: Optional[Dict], confirmed: bool):
+        pair = group.trading_pair
+        try:
+            await committed
         except Exception as e:
-            logger.error(f"Error executing sell order for trade {trade_id}: {str(e)}")
-            # Update trade status to failed
-            trade.status = TradeStatus.FAILED
-            db.commit()
-        finally:
-            db.close()
+            logger.error(
+                f"Error recording fills for {pair} order {order['id'] if order else None} "
+                f"covering trades {group.trade_ids()}: {str(e)}"
+            )
+            # An order that went out stays in flight in the journal and is recorded on recovery
+            if order is None:
+                await self._mark_failed(group)
+            return
+
+        if order is not None:
+            self.journal.record('filled', group.client_order_id, order_id=order['id'])
+            if not confirmed:
+                self.reconciler.track(pair, order['id'])
+        self._settle(group)
+
+        logger.info(
+            f"Executed {len(group.trade_ids())} {pair} trade legs with "
+            f"{'order ' + str(order['id']) if order else 'no exchange order'} "
+            f"({group.side} {group.order_amount}, crossed {group.crossed})"
+        )
+
+    async def _reconcile(self, group: OrderGroup):
+        """Resolve a journaled order whose outcome is unknown by looking it up with its client order id."""
+        pair = group.trading_pair
+        try:
+            order = await self.exchange.fetch_order_by_client_id(group.client_order_id, pair)
+        except Exception as e:
+            logger.error(f"Could not reconcile {pair} order {group.client_order_id}, leaving it in flight: {str(e)}")
+            return
+
+        if order is None:
+            # Never reached the exchange: fire it if there is still time, otherwise the legs failed
+            self.journal.record('failed', group.client_order_id)
+            fire_at = to_timestamp(group.fire_at)
+            if fire_at > self.clock.now():
+                # Release the claims so the legs can be claimed again when they fire
+                async with AsyncSessionLocal() as db:
+                    await db.execute(delete(TradeLegClaim).where(TradeLegClaim.client_order_id == group.client_order_id))
+                    await db.commit()
+                self._arm_many((side, trade_id, fire_at) for side, trade_id in group.leg_keys())
+            else:
+                await self._mark_failed(group)
+            return
+
+        self.journal.record('submitted', group.client_order_id, order_id=order['id'])
+        filled = to_decimal(order['filled']) if order.get('filled') is not None else group.order_amount
+        price = order.get('average') or order.get('price')
+        logger.info(f"Reconciled {pair} order {group.client_order_id} as exchange order {order['id']}")
+        await self._record_fills(group, order, filled, price, None)
+
+    def _fail_intent(self, group: OrderGroup):
+        if group.client_order_id in self.journal.in_flight:
+            self.journal.record('failed', group.client_order_id)
+
+    async def _mark_failed(self, group: OrderGroup):
+        self._settle(group)
+        trade_ids = group.trade_ids()
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(
+                    update(ScheduledTrade)
+                    .where(ScheduledTrade.id.in_(trade_ids), ScheduledTrade.status == TradeStatus.PENDING)
+                    .values(status=TradeStatus.FAILED)
+                )
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error marking trades {trade_ids} as failed: {str(e)}")
 
     async def cancel_scheduled_trade(self, trade_id: int):
         """Cancel a scheduled trade."""
         try:
             # Remove scheduled jobs
-            self.scheduler.remove_job(f"buy_{trade_id}")
-            self.scheduler.remove_job(f"sell_{trade_id}")
-            
+            self.unschedule_trade(trade_id)
+
             # Update trade status in database
-            db = next(get_db())
-            trade = db.query(ScheduledTrade).filter(
-                ScheduledTrade.id == trade_id
-            ).first()
-            
-            if trade:
-                trade.status = TradeStatus.CANCELLED
-                db.commit()
-            
+            async with AsyncSessionLocal() as db:
+                trade = await db.get(ScheduledTrade, trade_id)
+                if trade:
+                    trade.status = TradeStatus.CANCELLED
+                    await db.commit()
+
             logger.info(f"Cancelled scheduled trade {trade_id}")
         except Exception as e:
             logger.error(f"Error cancelling trade {trade_id}: {str(e)}")
             raise
-        finally:
-            db.close()
+
+    async def handle_command(self, op: str, target_id: int):
+        """Apply a change pushed by the API over the command channel; `target_id` is a trade id, or a rule id for 'rule'."""
+        if op == 'cancel':
+            self.unschedule_trade(target_id)
+        elif op == 'rule':
+            # Expand a new or changed recurring rule right away in case its next occurrence is close
+            await self._expand_rules(self._horizon_end, rule_ids=[target_id])
+        elif op == 'schedule':
+            # Read back by primary key so the latest committed state wins over the order commands arrive in
+            async with AsyncSessionLocal() as db:
+                trade = await db.get(ScheduledTrade, target_id)
+            if trade is None:
+                self.unschedule_trade(target_id)
+            else:
+                await self.schedule_trade(trade)
+        else:
+            raise ValueError(f"Unknown engine command {op!r}")
+
+    async def snapshot(self):
+        """Pick up scheduled trades changed since the last snapshot, then snapshot the armed legs."""
+        since = self._watermark - timedelta(seconds=settings.JOURNAL_CATCHUP_MARGIN)
+        watermark = datetime.utcnow()
+        await self._catch_up(since, skip=self._executing | self._in_flight_legs())
+        self._watermark = watermark
+        await self.journal.snapshot(self._snapshot_state, watermark.isoformat())
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(settings.JOURNAL_SNAPSHOT_INTERVAL)
+            try:
+                await self.snapshot()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error snapshotting the execution journal: {str(e)}")
+
+    def get_stats(self) -> Dict:
+        """Return scheduler, clock and journal statistics."""
+        return {
+            'armed_legs': len(self._armed),
+            'horizon_end': self._horizon_end.isoformat() if self._horizon_end else None,
+            'scheduler': self.scheduler.get_stats(),
+            'clock': self.clock.get_stats(),
+            'execution_pool': self.execution_pool.get_stats(),
+            'journal': self.journal.get_stats(),
+            'reconciler': self.reconciler.get_stats(),
+            'leases': self.leases.get_stats(),
+            'commands': self.commands.get_stats(),
+            'write_behind': write_behind.get_stats(),
+        }
 
     async def stop(self):
         """Stop the trading engine."""
         try:
-            self.scheduler.shutdown()
+            await self.commands.stop()
+            for task in (self._snapshot_task, self._pager_task):
+                if task is not None:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+            self._snapshot_task = self._pager_task = None
+            await self.scheduler.stop()
+            await self.execution_pool.stop()
+            await write_behind.flush()
+            await asyncio.gather(*self._recording, return_exceptions=True)
+            await self.reconciler.stop()
+            if self._watermark is not None:
+                # A fresh snapshot means the next start replays nothing
+                await self.snapshot()
+                await self.journal.close()
+            # Hand the shards over straight away instead of letting their leases expire
+            await self.leases.stop()
+            await self.clock.stop()
             logger.info("Scheduled trading engine stopped")
         except Exception as e:
             logger.error(f"Error stopping trading engine: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+# API routes pass trade changes to every engine, in API workers or the engine service, through the helpers below
+
+def _warn_if_undelivered(delivered: int, what: str):
+    if delivered == 0:
+        logger.warning(
+            f"No trading engine is listening in {settings.ENGINE_SOCKET_DIR}; {what} won't execute until one starts "
+            f"(run python -m app.engine, or set ENGINE_ENABLED)"
+        )
+
+async def notify_trade_saved(trade: ScheduledTrade):
+    """Hand a created or updated trade to the engines; the pager and snapshot catch-up cover failures."""
+    try:
+        _warn_if_undelivered(await engine_commands.send('schedule', trade.id), f"trade {trade.id}")
+    except Exception as e:
+        logger.error(f"Error notifying the trading engine of trade {trade.id}: {str(e)}")
+
+async def notify_trade_removed(trade_id: int):
+    """Drop a deleted trade's legs from the engines."""
+    try:
+        await engine_commands.send('cancel', trade_id)
+    except Exception as e:
+        logger.error(f"Error notifying the trading engine of removed trade {trade_id}: {str(e)}")
+
+async def notify_rule_saved(rule: RecurringTradeRule):
+    """Let the engines expand a created or updated recurring rule without waiting for the pager."""
+    try:
+        _warn_if_undelivered(await engine_commands.send('rule', rule.id), f"recurring rule {rule.id}")
+    except Exception as e:
+        logger.error(f"Error notifying the trading engine of recurring rule {rule.id}: {str(e)}")
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -10,8 +11,44 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine, 'connect')
+    def _enable_incremental_vacuum(dbapi_connection, connection_record):
+        # Only takes effect while the database file is still empty; lets retention shrink it without a full VACUUM
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.close()
+
+def to_async_url(url: str) -> str:
+    """Map a database URL to its asyncio driver (aiosqlite for SQLite, asyncpg for PostgreSQL)."""
+    scheme, _, rest = url.partition('://')
+    if scheme == 'sqlite':
+        return f'sqlite+aiosqlite://{rest}'
+    if scheme in ('postgres', 'postgresql', 'postgresql+psycopg2'):
+        return f'postgresql+asyncpg://{rest}'
+    return url
+
+async_engine = create_async_engine(to_async_url(settings.DATABASE_URL))
+# Objects stay usable after commit without another round trip to reload them
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def add_missing_columns(metadata, bind=engine):
+    """Add nullable columns and indexes introduced after a table was created; create_all only creates missing tables."""
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -20,4 +57,8 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 Base.metadata.create_all(bind=engine)
\ No newline at end of file
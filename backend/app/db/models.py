@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Enum, Table
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Enum, Index, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 import enum
@@ -44,9 +44,45 @@ class ScheduledTrade(Base):
     amount = Column(Float)
     status = Column(Enum(TradeStatus), default=TradeStatus.PENDING)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Lets the engine pick up only the rows changed since its last journal snapshot
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Set on trades the engine expanded from a recurring rule, one per occurrence
+    recurring_rule_id = Column(Integer, ForeignKey("recurring_trade_rules.id"), nullable=True)
+    occurrence_at = Column(DateTime, nullable=True)
     
     user = relationship("User", back_populates="scheduled_trades")
     trades = relationship("Trade", back_populates="scheduled_trade")
+    recurring_rule = relationship("RecurringTradeRule", back_populates="occurrences")
+
+    __table_args__ = (
+        # Range scans behind the engine's loading window
+        Index('ix_scheduled_trades_status_buy_time', 'status', 'buy_time'),
+        Index('ix_scheduled_trades_status_sell_time', 'status', 'sell_time'),
+        # An occurrence is expanded once, whichever engine instance gets there first
+        Index('uq_scheduled_trades_occurrence', 'recurring_rule_id', 'occurrence_at', unique=True),
+    )
+
+class RecurringTradeRule(Base):
+    __tablename__ = "recurring_trade_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    trading_pair = Column(String)
+    amount = Column(Float)
+    schedule = Column(String)  # Crontab expression for the buy time, in UTC
+    hold_seconds = Column(Float)  # Sell this long after each buy
+    end_at = Column(DateTime, nullable=True)
+    # Only the next occurrence exists until the engine's horizon reaches it
+    next_occurrence_at = Column(DateTime, nullable=True)
+    status = Column(Enum(TradeStatus), default=TradeStatus.PENDING)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    occurrences = relationship("ScheduledTrade", back_populates="recurring_rule")
+
+    __table_args__ = (
+        Index('ix_recurring_trade_rules_status_next', 'status', 'next_occurrence_at'),
+    )
 
 class Trade(Base):
     __tablename__ = "trades"
@@ -59,9 +95,40 @@ class Trade(Base):
     price = Column(Float)
     status = Column(Enum(TradeStatus), default=TradeStatus.PENDING)
     executed_at = Column(DateTime, default=datetime.utcnow)
+    ack_latency_ms = Column(Float, nullable=True)  # Scheduled time to exchange acknowledgement
     
     scheduled_trade = relationship("ScheduledTrade", back_populates="trades")
 
+class EngineInstance(Base):
+    __tablename__ = "engine_instances"
+
+    instance_id = Column(String, primary_key=True)
+    heartbeat_at = Column(DateTime)  # Instances heard from within the lease TTL share the shards
+
+class EngineShardLease(Base):
+    __tablename__ = "engine_shard_leases"
+
+    shard = Column(Integer, primary_key=True)
+    owner = Column(String, nullable=True)  # Engine instance holding the lease
+    epoch = Column(Integer, default=0)  # Fencing token, bumped whenever the lease changes hands
+    expires_at = Column(DateTime, nullable=True)
+
+class TradeLegClaim(Base):
+    __tablename__ = "trade_leg_claims"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scheduled_trade_id = Column(Integer, ForeignKey("scheduled_trades.id"))
+    side = Column(String)  # "buy" or "sell"
+    client_order_id = Column(String, index=True)
+    owner = Column(String)
+    epoch = Column(Integer)
+    claimed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Written before an order is sent; a second engine can never claim the same leg
+        UniqueConstraint('scheduled_trade_id', 'side', name='uq_trade_leg_claims_leg'),
+    )
+
 class MarketData(Base):
     __tablename__ = "market_data"
 
@@ -72,6 +139,31 @@ class MarketData(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     technical_indicators = Column(String)  # JSON string of technical indicators
 
+    __table_args__ = (
+        # Per-symbol history reads and the retention job's oldest-first scans
+        Index('ix_market_data_symbol_timestamp', 'symbol', 'timestamp'),
+        Index('ix_market_data_timestamp', 'timestamp'),
+    )
+
+class MarketDataRollup(Base):
+    __tablename__ = "market_data_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String)
+    bucket_start = Column(DateTime)
+    bucket_seconds = Column(Integer)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(Float)  # 24h quote volume at the last sample in the bucket
+    samples = Column(Integer)  # market_data rows rolled into the bucket
+
+    __table_args__ = (
+        # One bucket per symbol and width; also keeps concurrent retention runs from counting a bucket twice
+        Index('uq_market_data_rollups_bucket', 'symbol', 'bucket_seconds', 'bucket_start', unique=True),
+    )
+
 class Strategy(Base):
     __tablename__ = "strategies"
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,197 @@
+"""Write-behind queue that batches inserts and updates into group commits.
+
+On SQLite every commit is an fsync and holds the database write lock, so a transaction per
+trade fill or per cached ticker stalls API writers. Callers submit a unit of work (statements
+with their parameter rows) and a background task commits everything queued in one
+transaction, each distinct statement as a single executemany, once `max_rows` rows are
+waiting or the oldest unit has waited `max_delay` seconds.
+
+A unit is all-or-nothing. If a batch fails, its units are retried one transaction each, so a
+bad row only fails its own unit. Statements are batched by identity: submit the same
+statement object (a module-level constant) for rows that should share an executemany.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.sql import Executable
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+Unit = Sequence[Tuple[Executable, List[Dict]]]
+
+WRITE_BEHIND_BATCH_ROWS = metrics.histogram(
+    'db_write_behind_batch_rows',
+    'Parameter rows committed per write-behind batch',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+WRITE_BEHIND_FLUSH_SECONDS = metrics.histogram(
+    'db_write_behind_flush_seconds',
+    'Time to commit one write-behind batch'
+)
+WRITE_BEHIND_QUEUE_SECONDS = metrics.histogram(
+    'db_write_behind_queue_seconds',
+    'Time from a unit being queued to its batch committing'
+)
+WRITE_BEHIND_ERRORS = metrics.counter(
+    'db_write_behind_errors_total',
+    'Write-behind units that failed to commit'
+)
+
+def _retrieve_exception(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
+class WriteBehindQueue:
+    def __init__(self, session_factory: Callable = AsyncSessionLocal, max_rows: int = 500, max_delay: float = 0.05):
+        """Initialize a queue committing through sessions from `session_factory`."""
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        # (unit, future resolved once it commits, queued at)
+        self._pending: List[Tuple[Unit, asyncio.Future, float]] = []
+        self._rows = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # Statistics
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.last_batch_rows = 0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def queued_rows(self) -> int:
+        return self._rows
+
+    def submit(self, unit: Unit) -> asyncio.Future:
+        """Queue a unit and return a future resolved when it commits (or set to the error if it can't)."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        was_empty = not self._pending
+        self._pending.append((unit, future, time.monotonic()))
+        self._rows += sum(len(rows) for _, rows in unit)
+        # The first unit starts the deadline; a full batch goes straight away
+        if was_empty or self._rows >= self.max_rows:
+            self._wakeup.set()
+        return future
+
+    async def write(self, unit: Unit, wait: bool = True):
+        """Queue a unit; with `wait`, return only once it has committed."""
+        future = self.submit(unit)
+        if wait:
+            await future
+        else:
+            # flush() already logs the failure; retrieving it keeps asyncio from reporting it again
+            future.add_done_callback(_retrieve_exception)
+
+    async def _run(self):
+        while self._pending or not self._closing:
+            self._wakeup.clear()
+            if not self._pending:
+                await self._wakeup.wait()
+                continue
+            delay = self._pending[0][2] + self.max_delay - time.monotonic()
+            if self._rows < self.max_rows and delay > 0 and not self._closing:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.flush()
+
+    async def flush(self):
+        """Commit everything queued so far."""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            batch, self._pending, self._rows = self._pending, [], 0
+            if not batch:
+                return
+            started = time.monotonic()
+            rows = sum(len(params) for unit, _, _ in batch for _, params in unit)
+            try:
+                await self._commit([unit for unit, _, _ in batch])
+                results = [None] * len(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    results = [e]
+                else:
+                    logger.warning(f"Write-behind batch of {len(batch)} units failed, retrying them one by one: {str(e)}")
+                    results = []
+                    for unit, _, _ in batch:
+                        try:
+                            await self._commit([unit])
+                            results.append(None)
+                        except Exception as unit_error:
+                            results.append(unit_error)
+
+            finished = time.monotonic()
+            self.batches += 1
+            self.rows += rows
+            self.last_batch_rows = rows
+            self.last_flush_seconds = finished - started
+            WRITE_BEHIND_BATCH_ROWS.observe(rows)
+            WRITE_BEHIND_FLUSH_SECONDS.observe(finished - started)
+            for (unit, future, queued_at), error in zip(batch, results):
+                WRITE_BEHIND_QUEUE_SECONDS.observe(finished - queued_at)
+                if error is not None:
+                    self.errors += 1
+                    WRITE_BEHIND_ERRORS.inc()
+                    logger.error(f"Error committing a write-behind unit of {len(unit)} statements: {str(error)}")
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    async def _commit(self, units: List[Unit]):
+        # Rows of the same statement share one executemany, in the order their units were queued
+        grouped: Dict[Executable, List[Dict]] = {}
+        for unit in units:
+            for statement, params in unit:
+                if params:
+                    grouped.setdefault(statement, []).extend(params)
+        async with self.session_factory() as db:
+            try:
+                for statement, params in grouped.items():
+                    await db.execute(statement, params)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+    async def close(self):
+        """Commit what is still queued and stop the background task."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def get_stats(self) -> Dict:
+        return {
+            'queued_units': len(self._pending),
+            'queued_rows': self._rows,
+            'batches': self.batches,
+            'rows': self.rows,
+            'errors': self.errors,
+            'last_batch_rows': self.last_batch_rows,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 3),
+        }
+
+write_behind = WriteBehindQueue(max_rows=settings.WRITE_BEHIND_MAX_ROWS, max_delay=settings.WRITE_BEHIND_MAX_DELAY)
+
+metrics.gauge('db_write_behind_queued_rows', 'Rows waiting in the write-behind queue', collect=lambda: {(): write_behind.queued_rows})
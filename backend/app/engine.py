@@ -0,0 +1,47 @@
+"""Scheduled trading engine service.
+
+Runs the engine in its own process so order timing never competes with API requests for the
+event loop. Run it next to the API:
+
+    python -m app.engine
+
+API workers push trade changes to it over a Unix socket (see app.core.engine_channel). Several
+engine processes can run at once; shard leases decide which trades each one executes.
+"""
+import asyncio
+import logging
+import signal
+from app.core.exchange import exchange_instance
+from app.core.markets import markets_catalog
+from app.core.trading_engine import ScheduledTradeEngine
+from app.db.database import async_engine
+from app.db.write_behind import write_behind
+
+logger = logging.getLogger(__name__)
+
+async def main():
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    await markets_catalog.start(exchange_instance)
+    engine = ScheduledTradeEngine(exchange_instance)
+    try:
+        await engine.start()
+        await stopping.wait()
+        logger.info("Stopping the trading engine")
+    finally:
+        await engine.stop()
+        await markets_catalog.stop()
+        await exchange_instance.close()
+        await write_behind.close()
+        # Pooled aiosqlite connections each hold a worker thread that would keep the process alive
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
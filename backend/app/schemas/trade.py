@@ -19,11 +19,40 @@ class ScheduledTradeUpdate(BaseModel):
     sell_time: Optional[datetime] = None
     status: Optional[TradeStatus] = None
 
+class RecurringTradeRuleBase(BaseModel):
+    trading_pair: str = Field(..., description="Trading pair (e.g., 'BTC/USDT')")
+    amount: float = Field(..., gt=0, description="Amount to trade at each occurrence")
+    schedule: str = Field(..., description="Crontab expression for the buy times, in UTC (e.g., '0 9 * * 1-5')")
+    hold_seconds: float = Field(..., gt=0, description="Seconds between each buy and its sell")
+    end_at: Optional[datetime] = Field(None, description="No occurrences after this time")
+
+class RecurringTradeRuleCreate(RecurringTradeRuleBase):
+    pass
+
+class RecurringTradeRuleUpdate(BaseModel):
+    trading_pair: Optional[str] = None
+    amount: Optional[float] = Field(None, gt=0)
+    schedule: Optional[str] = None
+    hold_seconds: Optional[float] = Field(None, gt=0)
+    end_at: Optional[datetime] = None
+
+class RecurringTradeRule(RecurringTradeRuleBase):
+    id: int
+    user_id: int
+    status: TradeStatus
+    next_occurrence_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class TradeBase(BaseModel):
-    order_id: str
+    # None when the leg was fully crossed against opposite legs and no exchange order was sent
+    order_id: Optional[str] = None
     side: str
     amount: float
-    price: float
+    # None when neither the order nor a reference ticker gave a price
+    price: Optional[float] = None
     status: TradeStatus
 
 class TradeCreate(TradeBase):
@@ -34,6 +63,8 @@ class ScheduledTrade(ScheduledTradeBase):
     user_id: int
     status: TradeStatus
     created_at: datetime
+    recurring_rule_id: Optional[int] = None
+    occurrence_at: Optional[datetime] = None
     trades: list[TradeBase] = []
 
     class Config:
@@ -43,6 +74,7 @@ class Trade(TradeBase):
     id: int
     scheduled_trade_id: int
     executed_at: datetime
+    ack_latency_ms: Optional[float] = None
 
     class Config:
         from_attributes = True 
\ No newline at end of file
@@ -0,0 +1,399 @@
+"""Technical indicators over OHLCV candles.
+
+A symbol's history is computed once with vectorised NumPy (optionally in a process pool).
+After that, each new closed candle advances a rolling IndicatorState in constant time, and
+ticks on the forming candle are evaluated against that state without advancing it.
+
+Moving averages follow the usual charting conventions: EMAs are seeded with the simple
+average of their first period, RSI and ATR use Wilder's smoothing, Bollinger bands use the
+population standard deviation, and VWAP is anchored to the UTC day.
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+import ccxt.async_support as ccxt
+import numpy as np
+from app.core.config import settings
+from app.core.ohlcv_store import ohlcv_store
+
+logger = logging.getLogger(__name__)
+
+SMA_PERIOD = 20
+EMA_PERIOD = 20
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_STDDEV = 2.0
+ATR_PERIOD = 14
+
+INDICATORS = (
+    'sma', 'ema', 'rsi', 'macd', 'macd_signal', 'macd_histogram',
+    'bollinger_upper', 'bollinger_middle', 'bollinger_lower', 'vwap', 'atr',
+)
+
+DAY_MS = 86_400_000
+# Values per closed-form EMA block; small enough that decay ** -block can't overflow
+EMA_BLOCK = 64
+
+def _ema(values: np.ndarray, alpha: float, period: int) -> np.ndarray:
+    """EMA seeded with the mean of the first `period` values, NaN before that."""
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    previous = out[period - 1] = values[:period].mean()
+    decay = 1.0 - alpha
+    # ema[k] = decay^k * (previous + alpha * sum(x[j] / decay^j)), evaluated a block at a time
+    for start in range(period, len(values), EMA_BLOCK):
+        block = values[start:start + EMA_BLOCK]
+        powers = decay ** np.arange(1, len(block) + 1)
+        block_ema = powers * (previous + alpha * np.cumsum(block / powers))
+        out[start:start + len(block)] = block_ema
+        previous = block_ema[-1]
+    return out
+
+def _rolling(values: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling mean and population standard deviation, NaN until the window is full."""
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    if len(values) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(values, period)
+        mean[period - 1:] = windows.mean(axis=1)
+        std[period - 1:] = windows.std(axis=1)
+    return mean, std
+
+def _rsi(average_gain, average_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(average_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + average_gain / average_loss))
+
+class _Ema:
+    __slots__ = ('period', 'alpha', 'value', 'count', 'total')
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.value: Optional[float] = None
+        self.count = 0
+        self.total = 0.0
+
+    def seed(self, values: np.ndarray, output: np.ndarray):
+        if len(values) >= self.period:
+            self.value = float(output[-1])
+            self.count = len(values)
+        else:
+            for value in values.tolist():
+                self.step(value, True)
+
+    def step(self, value: float, commit: bool) -> Optional[float]:
+        if self.value is not None:
+            result = self.value + self.alpha * (value - self.value)
+        elif self.count + 1 == self.period:
+            result = (self.total + value) / self.period
+        else:
+            result = None
+        if commit:
+            self.count += 1
+            self.total += value
+            self.value = result
+        return result
+
+class _Window:
+    __slots__ = ('period', 'values', 'total', 'squares')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values: Deque[float] = deque(maxlen=period)
+        self.total = 0.0
+        self.squares = 0.0
+
+    def step(self, value: float, commit: bool) -> Tuple[Optional[float], Optional[float]]:
+        """Mean and standard deviation with `value` as the newest element."""
+        evicted = self.values[0] if len(self.values) == self.period else 0.0
+        total = self.total + value - evicted
+        squares = self.squares + value * value - evicted * evicted
+        count = min(len(self.values) + 1, self.period)
+        if commit:
+            self.values.append(value)
+            self.total, self.squares = total, squares
+        if count < self.period:
+            return None, None
+        mean = total / count
+        return mean, math.sqrt(max(squares / count - mean * mean, 0.0))
+
+class IndicatorState:
+    """Rolling state from which the indicators of the next candle follow in constant time."""
+
+    def __init__(self):
+        self.timestamp: Optional[int] = None
+        self.close: Optional[float] = None
+        self.sma = _Window(SMA_PERIOD)
+        self.ema = _Ema(EMA_PERIOD)
+        self.gain = _Ema(RSI_PERIOD, 1.0 / RSI_PERIOD)
+        self.loss = _Ema(RSI_PERIOD, 1.0 / RSI_PERIOD)
+        self.macd_fast = _Ema(MACD_FAST)
+        self.macd_slow = _Ema(MACD_SLOW)
+        self.macd_signal = _Ema(MACD_SIGNAL)
+        self.bollinger = _Window(BOLLINGER_PERIOD)
+        self.atr = _Ema(ATR_PERIOD, 1.0 / ATR_PERIOD)
+        self.vwap_day: Optional[int] = None
+        self.vwap_value = 0.0
+        self.vwap_volume = 0.0
+
+    def step(self, candle: List, commit: bool = True) -> Dict[str, Optional[float]]:
+        """Indicators of `candle`; only a closed candle (`commit`) advances the state."""
+        timestamp, _, high, low, close, volume = candle[:6]
+        values: Dict[str, Optional[float]] = {}
+        values['sma'] = self.sma.step(close, commit)[0]
+        values['ema'] = self.ema.step(close, commit)
+
+        if self.close is None:
+            values['rsi'] = None
+            true_range = high - low
+        else:
+            change = close - self.close
+            gain = self.gain.step(max(change, 0.0), commit)
+            loss = self.loss.step(max(-change, 0.0), commit)
+            values['rsi'] = None if gain is None else float(_rsi(gain, loss))
+            true_range = max(high - low, abs(high - self.close), abs(low - self.close))
+
+        fast = self.macd_fast.step(close, commit)
+        slow = self.macd_slow.step(close, commit)
+        macd = fast - slow if slow is not None else None
+        signal = self.macd_signal.step(macd, commit) if macd is not None else None
+        values['macd'] = macd
+        values['macd_signal'] = signal
+        values['macd_histogram'] = macd - signal if signal is not None else None
+
+        mean, std = self.bollinger.step(close, commit)
+        values['bollinger_upper'] = mean + BOLLINGER_STDDEV * std if mean is not None else None
+        values['bollinger_middle'] = mean
+        values['bollinger_lower'] = mean - BOLLINGER_STDDEV * std if mean is not None else None
+
+        day = int(timestamp) // DAY_MS
+        traded, traded_volume = (self.vwap_value, self.vwap_volume) if day == self.vwap_day else (0.0, 0.0)
+        typical = (high + low + close) / 3.0
+        traded += typical * volume
+        traded_volume += volume
+        values['vwap'] = traded / traded_volume if traded_volume else typical
+        values['atr'] = self.atr.step(true_range, commit)
+
+        if commit:
+            self.timestamp = int(timestamp)
+            self.close = close
+            self.vwap_day, self.vwap_value, self.vwap_volume = day, traded, traded_volume
+        return values
+
+def compute(candles: np.ndarray) -> Tuple[Dict[str, np.ndarray], IndicatorState]:
+    """Compute every indicator over rows of [timestamp, open, high, low, close, volume].
+
+    Returns one array per indicator (NaN where it is not defined yet) and the state that
+    continues from the last row. Module-level so it can run in a process pool.
+    """
+    candles = np.asarray(candles, dtype='f8').reshape(-1, 6)
+    timestamps, _, high, low, close, volume = candles.T
+    n = len(candles)
+    outputs: Dict[str, np.ndarray] = {}
+    state = IndicatorState()
+
+    outputs['sma'], _ = _rolling(close, SMA_PERIOD)
+    outputs['ema'] = _ema(close, state.ema.alpha, EMA_PERIOD)
+
+    change = np.diff(close)
+    gains, losses = np.clip(change, 0.0, None), np.clip(-change, 0.0, None)
+    average_gain = _ema(gains, state.gain.alpha, RSI_PERIOD)
+    average_loss = _ema(losses, state.loss.alpha, RSI_PERIOD)
+    outputs['rsi'] = np.concatenate(([np.nan], _rsi(average_gain, average_loss)))[:n]
+
+    fast = _ema(close, state.macd_fast.alpha, MACD_FAST)
+    slow = _ema(close, state.macd_slow.alpha, MACD_SLOW)
+    macd = fast - slow
+    defined = macd[MACD_SLOW - 1:]
+    signal = np.full(n, np.nan)
+    signal[MACD_SLOW - 1:] = _ema(defined, state.macd_signal.alpha, MACD_SIGNAL)
+    outputs['macd'] = macd
+    outputs['macd_signal'] = signal
+    outputs['macd_histogram'] = macd - signal
+
+    mean, std = _rolling(close, BOLLINGER_PERIOD)
+    outputs['bollinger_upper'] = mean + BOLLINGER_STDDEV * std
+    outputs['bollinger_middle'] = mean
+    outputs['bollinger_lower'] = mean - BOLLINGER_STDDEV * std
+
+    # VWAP restarts every UTC day: subtract the running totals from before the day began
+    days = timestamps.astype(np.int64) // DAY_MS
+    day_starts = np.zeros(n, dtype=np.int64)
+    boundaries = np.flatnonzero(np.diff(days)) + 1
+    day_starts[boundaries] = boundaries
+    day_starts = np.maximum.accumulate(day_starts) if n else day_starts
+    typical = (high + low + close) / 3.0
+    traded = np.concatenate(([0.0], np.cumsum(typical * volume)))
+    traded_volume = np.concatenate(([0.0], np.cumsum(volume)))
+    day_value = traded[1:] - traded[day_starts]
+    day_volume = traded_volume[1:] - traded_volume[day_starts]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        outputs['vwap'] = np.where(day_volume > 0, day_value / day_volume, typical)
+
+    true_range = high - low
+    if n > 1:
+        previous = close[:-1]
+        true_range[1:] = np.maximum.reduce((true_range[1:], np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    outputs['atr'] = _ema(true_range, state.atr.alpha, ATR_PERIOD)
+
+    if n:
+        state.timestamp = int(timestamps[-1])
+        state.close = float(close[-1])
+        state.sma.values.extend(close[-SMA_PERIOD:].tolist())
+        state.bollinger.values.extend(close[-BOLLINGER_PERIOD:].tolist())
+        for window in (state.sma, state.bollinger):
+            window.total = math.fsum(window.values)
+            window.squares = math.fsum(value * value for value in window.values)
+        state.ema.seed(close, outputs['ema'])
+        state.gain.seed(gains, average_gain)
+        state.loss.seed(losses, average_loss)
+        state.macd_fast.seed(close, fast)
+        state.macd_slow.seed(close, slow)
+        state.macd_signal.seed(defined, signal[MACD_SLOW - 1:])
+        state.atr.seed(true_range, outputs['atr'])
+        state.vwap_day = int(days[-1])
+        state.vwap_value = float(day_value[-1])
+        state.vwap_volume = float(day_volume[-1])
+    return outputs, state
+
+def _clean(value) -> Optional[float]:
+    return None if value is None or math.isnan(value) else float(value)
+
+class IndicatorSeries:
+    def __init__(self, state: IndicatorState, timestamps: List[int], outputs: Dict[str, List], history: int):
+        """Initialize the indicators of one symbol and timeframe, keeping the last `history` closed candles' values."""
+        self.state = state
+        self.timestamps: Deque[int] = deque(timestamps, maxlen=history)
+        self.outputs: Dict[str, Deque] = {name: deque(outputs[name], maxlen=history) for name in INDICATORS}
+        # The forming candle and its provisional values
+        self.forming: Optional[List] = None
+        self.forming_values: Optional[Dict[str, Optional[float]]] = None
+        self.lock = asyncio.Lock()
+
+    def append(self, candle: List):
+        values = self.state.step(candle)
+        self.timestamps.append(int(candle[0]))
+        for name in INDICATORS:
+            self.outputs[name].append(_clean(values[name]))
+
+    def set_forming(self, candle: Optional[List]):
+        self.forming = list(candle) if candle is not None else None
+        self.forming_values = self.state.step(self.forming, commit=False) if candle is not None else None
+
+class IndicatorEngine:
+    def __init__(self, history: int = 500, workers: int = 0):
+        """Initialize an engine keeping `history` candles of indicators per series.
+
+        With `workers`, full-history computations run in a process pool of that size.
+        """
+        self.history = history
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._series: Dict[Tuple[str, str], IndicatorSeries] = {}
+
+        # Statistics
+        self.full_computations = 0
+        self.incremental_updates = 0
+
+    async def _compute(self, candles: List[List]) -> Tuple[Dict[str, np.ndarray], IndicatorState]:
+        rows = np.asarray(candles, dtype='f8').reshape(-1, 6)
+        self.full_computations += 1
+        if not self.workers:
+            return compute(rows)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, compute, rows)
+
+    async def refresh(self, exchange, symbol: str, timeframe: str) -> IndicatorSeries:
+        """Bring a series up to date with the OHLCV store, computing its full history the first time."""
+        key = (symbol, timeframe)
+        series = self._series.get(key)
+        timeframe_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        now_ms = int(time.time() * 1000)
+
+        if series is not None:
+            async with series.lock:
+                since = series.state.timestamp + timeframe_ms
+                candles = await ohlcv_store.get(
+                    exchange, symbol, timeframe, self.history, datetime.fromtimestamp(since / 1000, timezone.utc)
+                )
+                closed = [candle for candle in candles if candle[0] > series.state.timestamp and candle[0] + timeframe_ms <= now_ms]
+                # A gap means the store couldn't cover the missing range; start over from what it has
+                if not closed or closed[0][0] == since:
+                    for candle in closed:
+                        series.append(candle)
+                    self.incremental_updates += len(closed)
+                    series.set_forming(next((candle for candle in candles if candle[0] + timeframe_ms > now_ms), None))
+                    return series
+
+        candles = await ohlcv_store.get(exchange, symbol, timeframe, self.history)
+        closed = [candle for candle in candles if candle[0] + timeframe_ms <= now_ms]
+        outputs, state = await self._compute(closed)
+        series = IndicatorSeries(
+            state,
+            [int(candle[0]) for candle in closed],
+            {name: [_clean(value) for value in values.tolist()] for name, values in outputs.items()},
+            self.history
+        )
+        series.set_forming(candles[-1] if len(candles) > len(closed) else None)
+        if state.timestamp is not None:
+            self._series[key] = series
+        return series
+
+    async def get(self, exchange, symbol: str, timeframe: str, limit: int = 100) -> Dict:
+        """Indicator values for the last `limit` candles, one list per indicator, the forming candle last."""
+        series = await self.refresh(exchange, symbol, timeframe)
+        closed = max(0, min(limit - (series.forming is not None), len(series.timestamps)))
+        first = len(series.timestamps) - closed
+        result = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'forming': series.forming is not None,
+            'timestamp': list(series.timestamps)[first:],
+        }
+        for name in INDICATORS:
+            result[name] = list(series.outputs[name])[first:]
+        if series.forming is not None:
+            result['timestamp'].append(int(series.forming[0]))
+            for name in INDICATORS:
+                result[name].append(_clean(series.forming_values[name]))
+        return result
+
+    async def latest(self, exchange, symbol: str, price: Optional[float] = None, timeframe: Optional[str] = None) -> Dict[str, float]:
+        """Current indicator values, with the forming candle's close moved to `price` if given."""
+        series = await self.refresh(exchange, symbol, timeframe or settings.INDICATOR_TIMEFRAME)
+        if price is not None and series.forming is not None:
+            forming = list(series.forming)
+            forming[2], forming[3], forming[4] = max(forming[2], price), min(forming[3], price), price
+            values = series.state.step(forming, commit=False)
+        elif series.forming_values is not None:
+            values = series.forming_values
+        else:
+            values = {name: series.outputs[name][-1] if series.outputs[name] else None for name in INDICATORS}
+        return {name: value for name, value in ((name, _clean(value)) for name, value in values.items()) if value is not None}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict:
+        return {
+            'series': len(self._series),
+            'full_computations': self.full_computations,
+            'incremental_updates': self.incremental_updates,
+        }
+
+def dumps(values: Dict[str, float]) -> str:
+    """Serialise indicator values for MarketData.technical_indicators."""
+    return json.dumps(values, separators=(',', ':'))
+
+indicator_engine = IndicatorEngine(settings.INDICATOR_HISTORY, settings.INDICATOR_WORKERS)
@@ -1,13 +1,20 @@
+import asyncio
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from app.core.exchange import MEXCExchange
+from app.core.ohlcv_store import ohlcv_store
+from app.core.order_book import order_book_manager
 from app.db.database import get_db
-from app.db.models import MarketData
+from app.db.models import MarketData, MarketDataRollup
+from app.db.write_behind import write_behind
+from app.services.indicators import dumps as dump_indicators, indicator_engine
 from sqlalchemy.orm import Session
 import logging
 
 logger = logging.getLogger(__name__)
 
+INSERT_MARKET_DATA = MarketData.__table__.insert()
+
 class MarketDataService:
     def __init__(self, exchange: MEXCExchange):
         self.exchange = exchange
@@ -16,6 +23,10 @@ class MarketDataService:
         """Get current ticker data for a symbol."""
         return await self.exchange.fetch_ticker(symbol)
 
+    async def get_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get current ticker data for many symbols in one upstream call."""
+        return await self.exchange.fetch_tickers(symbols)
+
     async def get_ohlcv(
         self,
         symbol: str,
@@ -23,75 +34,99 @@ class MarketDataService:
         limit: int = 100,
         since: Optional[datetime] = None
     ) -> List[Dict]:
-        """Get OHLCV data for a symbol."""
-        return await self.exchange.fetch_ohlcv(symbol, timeframe, limit)
+        """Get OHLCV data for a symbol, served from the local store and topped up from MEXC."""
+        return await ohlcv_store.get(self.exchange, symbol, timeframe, limit, since)
 
     async def get_order_book(self, symbol: str, limit: int = 20) -> Dict:
         """Get order book data for a symbol."""
+        book = order_book_manager.get(symbol)
+        if book is not None:
+            return book.to_dict(limit)
         return await self.exchange.fetch_order_book(symbol, limit)
 
-    async def cache_market_data(self, db: Session, symbol: str) -> None:
-        """Cache market data in the database."""
+    async def get_indicators(self, symbol: str, timeframe: str = '1h', limit: int = 100) -> Dict:
+        """Get technical indicator series for a symbol."""
+        return await indicator_engine.get(self.exchange, symbol, timeframe, limit)
+
+    async def _latest_indicators(self, symbol: str, price: Optional[float]) -> Dict[str, float]:
+        # Indicators are an extra; failing to compute them mustn't stop the price being cached
         try:
-            # Fetch current market data
-            ticker = await self.exchange.fetch_ticker(symbol)
-            
-            # Create market data record
-            market_data = MarketData(
-                symbol=symbol,
-                price=ticker['last'],
-                timestamp=datetime.utcnow(),
-                volume=ticker['quoteVolume'],
-                technical_indicators={}  # Can be populated with calculated indicators
-            )
-            
-            # Save to database
-            db.add(market_data)
-            db.commit()
-            
+            return await indicator_engine.latest(self.exchange, symbol, price)
+        except Exception as e:
+            logger.warning(f"Error computing indicators for {symbol}: {str(e)}")
+            return {}
+
+    async def _market_data_row(self, symbol: str, ticker: Dict, indicators: Optional[Dict[str, float]]) -> Dict:
+        if indicators is None:
+            indicators = await self._latest_indicators(symbol, ticker['last'])
+        return {
+            'symbol': symbol,
+            'price': ticker['last'],
+            'timestamp': datetime.utcnow(),
+            'volume': ticker['quoteVolume'],
+            'technical_indicators': dump_indicators(indicators),
+        }
+
+    async def cache_market_data(
+        self,
+        symbol: str,
+        ticker: Optional[Dict] = None,
+        indicators: Optional[Dict[str, float]] = None
+    ) -> None:
+        """Cache market data in the database; the row is committed by the write-behind queue."""
+        try:
+            # Fetch current market data unless the caller already has it
+            if ticker is None:
+                ticker = await self.exchange.fetch_ticker(symbol)
+            row = await self._market_data_row(symbol, ticker, indicators)
+            await write_behind.write([(INSERT_MARKET_DATA, [row])], wait=False)
         except Exception as e:
             logger.error(f"Error caching market data for {symbol}: {str(e)}")
-            db.rollback()
             raise
 
     async def get_cached_market_data(
         self,
         db: Session,
         symbol: str,
-        since: Optional[datetime] = None
+        since: Optional[datetime] = None,
+        limit: int = 1000
     ) -> List[MarketData]:
-        """Get cached market data from the database."""
+        """Get the newest cached market data rows from the database, at most `limit` of them."""
         query = db.query(MarketData).filter(MarketData.symbol == symbol)
         
         if since:
             query = query.filter(MarketData.timestamp >= since)
             
-        return query.order_by(MarketData.timestamp.desc()).all()
+        return query.order_by(MarketData.timestamp.desc()).limit(limit).all()
 
-    async def update_market_data_cache(self, db: Session, symbols: List[str]) -> None:
-        """Update market data cache for multiple symbols."""
-        for symbol in symbols:
-            await self.cache_market_data(db, symbol)
+    async def get_market_data_rollups(
+        self,
+        db: Session,
+        symbol: str,
+        since: Optional[datetime] = None,
+        limit: int = 1000
+    ) -> List[MarketDataRollup]:
+        """Get the newest OHLC buckets that cached market data older than the retention window was rolled into."""
+        query = db.query(MarketDataRollup).filter(MarketDataRollup.symbol == symbol)
+
+        if since:
+            query = query.filter(MarketDataRollup.bucket_start >= since)
+
+        return query.order_by(MarketDataRollup.bucket_start.desc()).limit(limit).all()
+
+    async def update_market_data_cache(self, symbols: List[str]) -> None:
+        """Update market data cache for multiple symbols in one write-behind batch."""
+        tickers = await self.exchange.fetch_tickers(symbols)
+        # Concurrently, so first-time indicator computations can spread over the process pool
+        rows = await asyncio.gather(*(
+            self._market_data_row(symbol, ticker, None) for symbol, ticker in tickers.items()
+        ))
+        await write_behind.write([(INSERT_MARKET_DATA, rows)], wait=False)
 
     async def get_available_trading_pairs(self) -> List[str]:
-        """Get a limited list of available trading pairs from MEXC, prioritizing major pairs."""
+        """Get a limited list of available trading pairs from MEXC, sorted by volume."""
         try:
-            markets = await self.exchange.fetch_markets()
-            filtered = [
-                market['symbol']
-                for market in markets
-                if market.get('active', True)
-                and market.get('type', 'spot') == 'spot'
-                and market['symbol'].endswith('/USDT')
-            ]
-            # Prioritize major pairs if present
-            major_pairs = [
-                "BTC/USDT", "ETH/USDT", "BNB/USDT", "SOL/USDT", "XRP/USDT",
-                "DOGE/USDT", "ADA/USDT", "TRX/USDT", "LTC/USDT", "MATIC/USDT"
-            ]
-            prioritized = [s for s in major_pairs if s in filtered]
-            others = [s for s in filtered if s not in prioritized]
-            return (prioritized + others)[:20]
+            return await self.exchange.get_available_trading_pairs()
         except Exception as e:
             logger.error(f"Error fetching trading pairs: {str(e)}")
             raise
@@ -99,19 +134,7 @@ class MarketDataService:
     async def get_market_summary(self, symbol: str) -> Dict:
         """Get comprehensive market summary for a symbol."""
         try:
-            ticker = await self.exchange.fetch_ticker(symbol)
-            order_book = await self.exchange.fetch_order_book(symbol, limit=5)
-            
-            return {
-                'symbol': symbol,
-                'last_price': ticker['last'],
-                '24h_high': ticker['high'],
-                '24h_low': ticker['low'],
-                '24h_volume': ticker['quoteVolume'],
-                'bid': order_book['bids'][0][0] if order_book['bids'] else None,
-                'ask': order_book['asks'][0][0] if order_book['asks'] else None,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            return await self.exchange.get_market_summary(symbol)
         except Exception as e:
             logger.error(f"Error fetching market summary for {symbol}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
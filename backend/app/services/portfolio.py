@@ -1,53 +1,58 @@
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import Trade, ScheduledTrade, User
 from app.core.exchange import MEXCExchange
 from app.core.config import settings
 
 class PortfolioService:
-    def __init__(self, db: Session, exchange: MEXCExchange):
+    def __init__(self, db: AsyncSession, exchange: MEXCExchange):
         self.db = db
         self.exchange = exchange
 
-    def get_portfolio_value(self, user_id: int) -> Dict:
+    async def get_portfolio_value(self, user_id: int) -> Dict:
         """Calculate total portfolio value and asset allocation."""
-        # Get all executed trades for the user via ScheduledTrade
-        trades = (
-            self.db.query(Trade)
+        # Get all executed trades for the user, with their pair, via ScheduledTrade
+        result = await self.db.execute(
+            select(Trade, ScheduledTrade.trading_pair)
             .join(ScheduledTrade, Trade.scheduled_trade_id == ScheduledTrade.id)
-            .filter(
+            .where(
                 ScheduledTrade.user_id == user_id,
                 Trade.status == 'executed'
             )
-            .all()
         )
 
         # Calculate current holdings
         holdings: Dict[str, float] = {}
-        for trade in trades:
-            symbol = trade.symbol
+        for trade, symbol in result.all():
             if trade.side == 'buy':
                 holdings[symbol] = holdings.get(symbol, 0) + trade.amount
             else:
                 holdings[symbol] = holdings.get(symbol, 0) - trade.amount
 
-        # Get current prices
+        # Get current prices for every held symbol in one request
+        held = [symbol for symbol, amount in holdings.items() if amount > 0]
+        try:
+            tickers = await self.exchange.fetch_tickers(held) if held else {}
+        except Exception as e:
+            print(f"Error fetching prices for {held}: {e}")
+            tickers = {}
+
         total_value = 0
         assets = []
-        for symbol, amount in holdings.items():
-            if amount > 0:
-                try:
-                    ticker = self.exchange.fetch_ticker(symbol)
-                    value = amount * ticker['last']
-                    total_value += value
-                    assets.append({
-                        'symbol': symbol,
-                        'value': value,
-                        'percentage': 0  # Will be calculated after total is known
-                    })
-                except Exception as e:
-                    print(f"Error fetching price for {symbol}: {e}")
+        for symbol in held:
+            ticker = tickers.get(symbol)
+            if ticker is None:
+                print(f"Error fetching price for {symbol}: no ticker returned")
+                continue
+            value = holdings[symbol] * ticker['last']
+            total_value += value
+            assets.append({
+                'symbol': symbol,
+                'value': value,
+                'percentage': 0  # Will be calculated after total is known
+            })
 
         # Calculate percentages
         if total_value > 0:
@@ -59,59 +64,66 @@ class PortfolioService:
             'assets': assets
         }
 
-    def get_portfolio_history(self, user_id: int, days: int = 30) -> List[Dict]:
+    async def get_portfolio_history(self, user_id: int, days: int = 30) -> List[Dict]:
         """Get portfolio value history over time."""
         # Get all executed trades within the time period via ScheduledTrade
         start_date = datetime.utcnow() - timedelta(days=days)
-        trades = (
-            self.db.query(Trade)
+        result = await self.db.execute(
+            select(Trade, ScheduledTrade.trading_pair)
             .join(ScheduledTrade, Trade.scheduled_trade_id == ScheduledTrade.id)
-            .filter(
+            .where(
                 ScheduledTrade.user_id == user_id,
                 Trade.status == 'executed',
                 Trade.executed_at >= start_date  # <-- fix here
             )
             .order_by(Trade.executed_at)  # <-- and here
-            .all()
         )
+        trades = result.all()
+
+        # Fetch prices for every traded symbol up front instead of once per trade
+        symbols = list({symbol for _, symbol in trades})
+        try:
+            tickers = await self.exchange.fetch_tickers(symbols) if symbols else {}
+        except Exception as e:
+            print(f"Error fetching historical prices for {symbols}: {e}")
+            tickers = {}
 
         # Calculate portfolio value at each trade
         history = []
         holdings: Dict[str, float] = {}
         current_value = 0
 
-        for trade in trades:
-            symbol = trade.symbol
+        for trade, symbol in trades:
             if trade.side == 'buy':
                 holdings[symbol] = holdings.get(symbol, 0) + trade.amount
             else:
                 holdings[symbol] = holdings.get(symbol, 0) - trade.amount
 
             # Calculate value at this point
-            try:
-                ticker = self.exchange.fetch_ticker(symbol)
-                value = holdings.get(symbol, 0) * ticker['last']
-                current_value += value
-                history.append({
-                    'timestamp': trade.executed_at.isoformat(),  # <-- and here
-                    'value': current_value
-                })
-            except Exception as e:
-                print(f"Error fetching historical price for {symbol}: {e}")
+            ticker = tickers.get(symbol)
+            if ticker is None:
+                print(f"Error fetching historical price for {symbol}: no ticker returned")
+                continue
+            value = holdings.get(symbol, 0) * ticker['last']
+            current_value += value
+            history.append({
+                'timestamp': trade.executed_at.isoformat(),  # <-- and here
+                'value': current_value
+            })
 
         return history
 
-    def get_trade_metrics(self, user_id: int) -> Dict:
+    async def get_trade_metrics(self, user_id: int) -> Dict:
         """Calculate trading performance metrics."""
-        trades = (
-            self.db.query(Trade)
+        result = await self.db.execute(
+            select(Trade)
             .join(ScheduledTrade, Trade.scheduled_trade_id == ScheduledTrade.id)
-            .filter(
+            .where(
                 ScheduledTrade.user_id == user_id,
                 Trade.status == 'executed'
             )
-            .all()
         )
+        trades = result.scalars().all()
 
         total_trades = len(trades)
         successful_trades = sum(1 for t in trades if t.profit > 0)
@@ -127,23 +139,22 @@ class PortfolioService:
             'totalProfit': total_profit
         }
 
-    def get_recent_trades(self, user_id: int, limit: int = 10) -> List[Dict]:
+    async def get_recent_trades(self, user_id: int, limit: int = 10) -> List[Dict]:
         """Get recent trades for the user."""
-        trades = (
-            self.db.query(Trade)
+        result = await self.db.execute(
+            select(Trade, ScheduledTrade.trading_pair)
             .join(ScheduledTrade, Trade.scheduled_trade_id == ScheduledTrade.id)
-            .filter(ScheduledTrade.user_id == user_id)
+            .where(ScheduledTrade.user_id == user_id)
             .order_by(Trade.executed_at.desc())  # <-- fix here
             .limit(limit)
-            .all()
         )
 
         return [{
             'id': str(trade.id),
-            'symbol': trade.symbol,
+            'symbol': symbol,
             'side': trade.side,
             'amount': trade.amount,
             'price': trade.executed_price,
             'timestamp': trade.executed_at.isoformat(),  # <-- and here
             'status': trade.status
-        } for trade in trades]
\ No newline at end of file
+        } for trade, symbol in result.all()]
\ No newline at end of file
@@ -1,11 +1,13 @@
 from fastapi import WebSocket, WebSocketDisconnect, APIRouter
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 import json
 import logging
 from datetime import datetime
 from jose import jwt, JWTError
 from app.core.config import settings
 from app.core.exchange import MEXCExchange
+from app.core.exchange_stream import ExchangeStreamClient
+from app.core.order_book import order_book_manager
 from app.db.database import get_db, SessionLocal
 from app.db.models import Trade, TradeStatus, User
 
@@ -18,6 +20,7 @@ class WebSocketManager:
             'trade_updates': set()
         }
         self.exchange = None
+        self.stream: Optional[ExchangeStreamClient] = None
 
     def set_exchange(self, exchange: MEXCExchange):
         self.exchange = exchange
@@ -50,30 +53,43 @@ class WebSocketManager:
             except Exception as e:
                 logger.error(f"Error broadcasting trade update: {str(e)}")
 
+    async def handle_stream_update(self, update: Dict):
+        """Forward a normalised exchange stream update to connected clients."""
+        if update['type'] == 'ticker':
+            await self.broadcast_market_data({
+                'type': 'market_data',
+                'symbol': update['symbol'],
+                'data': {
+                    'price': update['price'],
+                    'volume': update['volume'],
+                    'high': update['high'],
+                    'low': update['low'],
+                    'timestamp': datetime.utcfromtimestamp(update['timestamp'] / 1000).isoformat()
+                }
+            })
+        elif update['type'] == 'trade':
+            await self.broadcast_market_data({
+                'type': 'trade',
+                'symbol': update['symbol'],
+                'trades': update['trades']
+            })
+
     async def start_market_data_stream(self, symbols: List[str]):
         """Start streaming market data for specified symbols."""
-        if not self.exchange:
-            raise ValueError("Exchange not initialized")
-
-        while True:
-            try:
-                for symbol in symbols:
-                    ticker = await self.exchange.fetch_ticker(symbol)
-                    data = {
-                        'type': 'market_data',
-                        'symbol': symbol,
-                        'data': {
-                            'price': ticker['last'],
-                            'volume': ticker['quoteVolume'],
-                            'high': ticker['high'],
-                            'low': ticker['low'],
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                    }
-                    await self.broadcast_market_data(data)
-            except Exception as e:
-                logger.error(f"Error in market data stream: {str(e)}")
-                continue
+        if self.exchange:
+            # Depth diffs keep local order books current; the exchange seeds and resyncs them
+            order_book_manager.set_exchange(self.exchange)
+        self.stream = ExchangeStreamClient(symbols)
+        self.stream.add_handler(self.handle_stream_update)
+        self.stream.add_handler(order_book_manager.handle_update)
+        self.stream.add_disconnect_handler(order_book_manager.invalidate)
+        await self.stream.run_forever()
+
+    async def stop_market_data_stream(self):
+        """Stop the exchange stream if it is running."""
+        if self.stream is not None:
+            await self.stream.stop()
+            self.stream = None
 
     async def monitor_trade_status(self, trade_id: int):
         """Monitor and broadcast trade status updates."""
@@ -13,5 +13,11 @@ export MEXC_API_SECRET="your_api_secret"
 export SECRET_KEY="your-very-secret-key"
 export DATABASE_URL="sqlite:///./scheduled_trader.db"
 
+# Start the market data collector; API workers read its shared memory and fall back to MEXC if it is down
+python -m app.collector &
+
+# Start the trading engine service; API workers hand it trade changes over a Unix socket
+python -m app.engine &
+
 # Start the FastAPI application with Gunicorn
 gunicorn main:app --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000 
\ No newline at end of file
@@ -1,8 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from app.core.exchange import exchange_instance
+from app.core.metrics import metrics
+from app.core.resilience import CircuitOpenError
 import logging
+import math
 
 # Configure logging
 logging.basicConfig(
@@ -30,22 +34,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    # Paths without a cached fallback let the open breaker through; tell clients when to come back
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "MEXC is temporarily unavailable"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/exchange")
+async def exchange_health():
+    return exchange_instance.get_stats()
+
+@app.get("/health/engine")
+async def engine_health():
+    from app.core.engine_channel import engine_commands
+    stats = engine_commands.get_stats()
+    # Trades are only executed by an engine listening on the command channel
+    return {"status": "healthy" if stats['engines'] else "no_engine", **stats}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Scheduled Trader API"}
 
 async def initialize_components():
     try:
-        from app.db.database import engine
+        from app.db.database import engine, add_missing_columns
         from app.db.models import Base
         from app.api import auth, trades, portfolio, websocket, market_data, strategy  # Import strategy
 
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        add_missing_columns(Base.metadata)
         logger.info("Database tables created successfully")
 
         # Include routers
@@ -71,17 +100,65 @@ async def initialize_components():
         logger.error(f"Error during initialization: {str(e)}")
         # Don't raise the exception to allow the server to start
 
+# Scheduled trading engine, when this process runs one (see ENGINE_ENABLED)
+trading_engine = None
+
 @app.on_event("startup")
 async def startup_event():
     await initialize_components()
 
+    from app.core.markets import markets_catalog
+    # Reads the snapshot the collector refreshes; only fetches from MEXC when there is none yet
+    await markets_catalog.start(exchange_instance)
+
+    from app.core.config import settings
+    # Normally the collector's job; running it in every worker would only duplicate the work
+    if settings.MARKET_DATA_RETENTION_ENABLED and settings.MARKET_DATA_RETENTION_IN_API:
+        from app.core.retention import market_data_retention
+        market_data_retention.start()
+    if settings.ENGINE_ENABLED:
+        # Safe in every worker: shard leases decide which trades each one schedules
+        global trading_engine
+        try:
+            from app.core.trading_engine import ScheduledTradeEngine
+            trading_engine = ScheduledTradeEngine()
+            await trading_engine.start()
+        except Exception as e:
+            trading_engine = None
+            logger.error(f"Error starting the trading engine: {str(e)}")
+
+    from app.core.engine_channel import engine_commands
+    if not engine_commands.get_stats()['engines']:
+        logger.warning(
+            f"No trading engine is listening in {settings.ENGINE_SOCKET_DIR}; scheduled trades won't execute "
+            f"until one starts (run python -m app.engine, or set ENGINE_ENABLED)"
+        )
+
 @app.on_event("shutdown")
 async def shutdown_event():
     try:
         from app.services.websocket import websocket_manager
+        from app.core.markets import markets_catalog
+        if trading_engine is not None:
+            await trading_engine.stop()
+        await markets_catalog.stop()
+        from app.core.retention import market_data_retention
+        await market_data_retention.stop()
+        from app.core.engine_channel import engine_commands
+        await engine_commands.close()
+        from app.services.indicators import indicator_engine
+        indicator_engine.close()
         await exchange_instance.close()
         logger.info("Exchange connection closed successfully")
 
+        # Commit batched writes before the connections go
+        from app.db.write_behind import write_behind
+        await write_behind.close()
+
+        # Pooled aiosqlite connections each hold a worker thread that would keep the process alive
+        from app.db.database import async_engine
+        await async_engine.dispose()
+
         await websocket_manager.close_all_connections()
         logger.info("All WebSocket connections closed successfully")
     except Exception as e:
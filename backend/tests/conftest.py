@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+# Settings are read when app modules are first imported, so point them at scratch locations first
+_scratch = tempfile.mkdtemp(prefix='scheduled-trader-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_scratch, 'test.db')}")
+os.environ.setdefault('MARKETS_CACHE_PATH', os.path.join(_scratch, 'markets_cache.json'))
+os.environ.setdefault('JOURNAL_DIR', os.path.join(_scratch, 'journal'))
+os.environ.setdefault('ENGINE_SOCKET_DIR', os.path.join(_scratch, 'engine'))
+os.environ.setdefault('OHLCV_STORE_DIR', os.path.join(_scratch, 'ohlcv'))
+os.environ.setdefault('SHARED_MARKET_DATA_PATH', os.path.join(_scratch, 'market_data.shm'))
+
+import pytest
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+@pytest.fixture
+async def db_tables():
+    """Empty tables on a scratch database; disposes the async engine's pool afterwards."""
+    from app.db.database import async_engine, engine
+    from app.db.models import Base
+
+    Base.metadata.create_all(bind=engine)
+    try:
+        async with async_engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(table.delete())
+        yield
+    finally:
+        # Each test runs on its own event loop; pooled connections must not outlive it
+        await async_engine.dispose()
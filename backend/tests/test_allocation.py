@@ -0,0 +1,64 @@
+from decimal import Decimal
+from app.core.allocation import DEFAULT_AMOUNT_STEP, allocate_pro_rata, amount_step, floor_to_step, to_decimal
+
+D = Decimal
+
+def test_to_decimal_keeps_the_float_repr():
+    assert to_decimal(0.1) == D('0.1')
+    assert to_decimal(0.1) + to_decimal(0.2) == D('0.3')
+
+def test_amount_step_reads_market_precision():
+    assert amount_step({'precision': {'amount': 0.001}}) == D('0.001')
+    assert amount_step({'precision': {}}) == DEFAULT_AMOUNT_STEP
+    assert amount_step(None) == DEFAULT_AMOUNT_STEP
+
+def test_floor_to_step():
+    assert floor_to_step(D('1.23456'), D('0.01')) == D('1.23')
+    assert floor_to_step(D('0.009'), D('0.01')) == 0
+
+def test_shares_sum_exactly_to_the_floored_total():
+    weights = [D('0.3'), D('0.3'), D('0.4')]
+    shares = allocate_pro_rata(D('0.5'), weights, D('0.001'))
+    assert shares == [D('0.150'), D('0.150'), D('0.200')]
+    assert sum(shares) == D('0.5')
+
+def test_largest_remainder_gets_the_leftover_units():
+    # 10 units over equal weights: 3.33 each, one unit left for the earliest entry
+    shares = allocate_pro_rata(D('10'), [D('5'), D('5'), D('5')], D('1'))
+    assert shares == [D('4'), D('3'), D('3')]
+
+    # 1 unit over weights 1 and 3 has remainders 0.25 and 0.75; the larger one wins
+    assert allocate_pro_rata(D('1'), [D('2'), D('6')], D('1')) == [D('0'), D('1')]
+
+def test_total_is_floored_to_step_and_capped_at_the_weights():
+    weights = [D('1'), D('2')]
+    shares = allocate_pro_rata(D('1.0059'), weights, D('0.01'))
+    assert sum(shares) == D('1.00')
+
+    capped = allocate_pro_rata(D('10'), weights, D('0.01'))
+    assert capped == weights
+
+def test_no_share_exceeds_its_weight():
+    weights = [D('0.001'), D('5'), D('0.002')]
+    shares = allocate_pro_rata(D('2.5'), weights, D('0.001'))
+    assert all(share <= weight for share, weight in zip(shares, weights))
+    assert sum(shares) == D('2.5')
+
+def test_nothing_to_allocate():
+    weights = [D('1'), D('2')]
+    assert allocate_pro_rata(D('0'), weights, D('0.01')) == [0, 0]
+    assert allocate_pro_rata(D('0.001'), weights, D('0.01')) == [0, 0]
+    assert allocate_pro_rata(D('1'), [], D('0.01')) == []
+
+def test_order_group_nets_opposite_legs():
+    from datetime import datetime
+    from app.core.trading_engine import OrderGroup
+
+    group = OrderGroup('BTC/USDT', datetime(2026, 1, 1))
+    group.add('buy', 1, D('0.3'))
+    group.add('buy', 2, D('0.2'))
+    group.add('sell', 3, D('0.1234'))
+    group.plan(D('0.001'))
+    assert group.side == 'buy'
+    assert group.crossed == D('0.1234')
+    assert group.order_amount == D('0.376')
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from app.core.markets import MarketsCatalog
+from app.core.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+pytestmark = pytest.mark.anyio
+
+async def test_open_breaker_reports_when_to_retry():
+    caller = ResilientCaller()
+    caller.breakers['fetch_markets'] = breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+
+    async def request():
+        raise AssertionError("an open breaker must not call through")
+
+    with pytest.raises(CircuitOpenError) as raised:
+        await caller.call('fetch_markets', request)
+    assert 29.0 < raised.value.retry_after <= 30.0
+
+async def test_api_maps_an_open_breaker_to_503_with_retry_after():
+    from main import circuit_open_handler
+
+    response = await circuit_open_handler(None, CircuitOpenError('fetch_markets', retry_after=12.3))
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '13'
+
+async def test_markets_refresh_keeps_the_last_catalog_while_the_breaker_is_open(tmp_path, caplog):
+    class Unavailable:
+        async def fetch_market_metadata(self):
+            raise CircuitOpenError('fetch_markets', retry_after=30.0)
+
+    catalog = MarketsCatalog(str(tmp_path / 'markets.json'), refresh_interval=0, reload_interval=60)
+    catalog.trading_pairs = ['BTC/USDT']
+    catalog.markets = {'BTC/USDT': {}}
+    await catalog.start(Unavailable(), refresh=True)
+    try:
+        await asyncio.sleep(0.05)
+    finally:
+        await catalog.stop()
+
+    assert catalog.get_trading_pairs() == ['BTC/USDT']
+    assert not [record for record in caplog.records if record.levelname == 'ERROR']
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select, update
+from app.core.leases import ShardLeaseManager
+from app.core.trading_engine import OrderGroup, ScheduledTradeEngine
+from app.db.database import AsyncSessionLocal
+from app.db.models import EngineShardLease, ScheduledTrade, TradeLegClaim
+
+pytestmark = pytest.mark.anyio
+
+async def _add_trades(*trade_ids):
+    async with AsyncSessionLocal() as db:
+        db.add_all(
+            ScheduledTrade(id=trade_id, trading_pair='BTC/USDT', amount=0.1, buy_time=datetime.utcnow(), sell_time=datetime.utcnow())
+            for trade_id in trade_ids
+        )
+        await db.commit()
+
+def _engine(leases: ShardLeaseManager) -> ScheduledTradeEngine:
+    engine = ScheduledTradeEngine()
+    engine.leases = leases
+    return engine
+
+def _group(*legs) -> OrderGroup:
+    group = OrderGroup('BTC/USDT', datetime.utcnow())
+    for side, trade_id in legs:
+        group.add(side, trade_id, 1)
+    return group
+
+async def _claims():
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(TradeLegClaim.scheduled_trade_id, TradeLegClaim.side, TradeLegClaim.owner))
+        return set(result.all())
+
+async def test_instances_split_the_shards(db_tables):
+    first = ShardLeaseManager(shard_count=4, instance_id='a')
+    second = ShardLeaseManager(shard_count=4, instance_id='b')
+    await first.acquire()
+    assert sorted(first.owned) == [0, 1, 2, 3]
+
+    await second.acquire()
+    await first.rebalance()
+    await second.rebalance()
+    assert len(first.owned) == len(second.owned) == 2
+    assert set(first.owned).isdisjoint(second.owned)
+
+async def test_fence_fails_once_the_lease_lapsed_or_changed_hands(db_tables):
+    leases = ShardLeaseManager(shard_count=1, instance_id='a')
+    await leases.acquire()
+    async with AsyncSessionLocal() as db:
+        assert await leases.fence(db, {0})
+        await db.execute(update(EngineShardLease).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        assert not await leases.fence(db, {0})
+        await db.execute(update(EngineShardLease).values(owner='b', expires_at=datetime.utcnow() + timedelta(seconds=60)))
+        assert not await leases.fence(db, {0})
+        await db.rollback()
+
+async def test_claim_records_each_leg_once(db_tables):
+    await _add_trades(1, 2)
+    leases = ShardLeaseManager(shard_count=1, instance_id='a')
+    await leases.acquire()
+    engine = _engine(leases)
+
+    assert await engine._claim(_group(('buy', 1), ('buy', 2)))
+    assert await _claims() == {(1, 'buy', 'a'), (2, 'buy', 'a')}
+
+    # A second group over an already claimed leg only keeps the unclaimed ones
+    group = _group(('buy', 1), ('sell', 1))
+    assert await engine._claim(group)
+    assert group.leg_keys() == [('sell', 1)]
+
+    # Nothing left to send
+    assert not await engine._claim(_group(('buy', 2)))
+    assert len(await _claims()) == 3
+
+async def test_claim_is_refused_without_the_lease(db_tables):
+    await _add_trades(1)
+    owner = ShardLeaseManager(shard_count=1, instance_id='a')
+    await owner.acquire()
+    intruder = ShardLeaseManager(shard_count=1, instance_id='b')
+    # Believes it holds the shard, as an instance paused past its lease would
+    intruder.owned = {0: 1}
+
+    assert not await _engine(intruder)._claim(_group(('buy', 1)))
+    assert await _claims() == set()
+    assert await _engine(owner)._claim(_group(('buy', 1)))
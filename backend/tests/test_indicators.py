@@ -0,0 +1,61 @@
+import math
+import numpy as np
+import pytest
+from app.services.indicators import INDICATORS, SMA_PERIOD, IndicatorState, compute
+
+MINUTE = 60_000
+# Two hours before a UTC midnight, so the run crosses a VWAP reset
+START = 1_700_006_400_000 - 2 * 60 * MINUTE
+
+def _candles(count: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    close = 100.0 + np.cumsum(rng.normal(0.0, 0.5, count))
+    open_ = np.concatenate(([100.0], close[:-1]))
+    high = np.maximum(open_, close) + rng.uniform(0.0, 0.3, count)
+    low = np.minimum(open_, close) - rng.uniform(0.0, 0.3, count)
+    volume = rng.uniform(1.0, 10.0, count)
+    timestamps = START + MINUTE * np.arange(count)
+    return np.column_stack((timestamps, open_, high, low, close, volume))
+
+def _assert_matches(vectorised: float, incremental, name: str, index: int):
+    if math.isnan(vectorised):
+        assert incremental is None, f"{name}[{index}]"
+    else:
+        assert incremental == pytest.approx(vectorised, rel=1e-9, abs=1e-9), f"{name}[{index}]"
+
+def test_incremental_steps_continue_the_vectorised_history():
+    candles = _candles(300)
+    outputs, _ = compute(candles)
+    _, state = compute(candles[:150])
+    for index in range(150, len(candles)):
+        values = state.step(candles[index].tolist())
+        for name in INDICATORS:
+            _assert_matches(outputs[name][index], values[name], name, index)
+
+def test_incremental_from_scratch_matches_vectorised():
+    candles = _candles(200, seed=11)
+    outputs, _ = compute(candles)
+    state = IndicatorState()
+    for index, candle in enumerate(candles.tolist()):
+        values = state.step(candle)
+        for name in INDICATORS:
+            _assert_matches(outputs[name][index], values[name], name, index)
+
+def test_forming_candle_does_not_advance_the_state():
+    candles = _candles(100)
+    _, state = compute(candles[:99])
+    forming = candles[99].tolist()
+    provisional = state.step([forming[0], forming[1], forming[2] + 5.0, forming[3], forming[4] + 5.0, forming[5]], commit=False)
+    closed = state.step(forming)
+    outputs, _ = compute(candles)
+    assert provisional['sma'] != closed['sma']
+    for name in INDICATORS:
+        _assert_matches(outputs[name][99], closed[name], name, 99)
+
+def test_sma_and_bollinger_middle_are_the_window_mean():
+    candles = _candles(60)
+    outputs, _ = compute(candles)
+    expected = candles[-SMA_PERIOD:, 4].mean()
+    assert outputs['sma'][-1] == pytest.approx(expected)
+    assert outputs['bollinger_middle'][-1] == pytest.approx(expected)
+    assert np.isnan(outputs['sma'][SMA_PERIOD - 2])
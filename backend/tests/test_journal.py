@@ -0,0 +1,97 @@
+import os
+import pytest
+from app.core.journal import ExecutionJournal
+
+pytestmark = pytest.mark.anyio
+
+INTENT = {'pair': 'BTC/USDT', 'side': 'buy', 'amount': '0.5', 'legs': [['buy', 1, '0.3'], ['buy', 2, '0.2']]}
+
+def _crash(journal: ExecutionJournal):
+    """Drop the journal the way a killed process would: no final flush, no orderly close."""
+    journal._task.cancel()
+    journal._file.close()
+    os.close(journal._slot_lock)
+
+async def test_intent_without_ack_is_recovered_after_a_crash(tmp_path):
+    journal = ExecutionJournal(str(tmp_path))
+    await journal.open()
+    await journal.commit('intent', 'order-1', **INTENT)
+    # Buffered but never fsynced; the crash loses it
+    journal.record('submitted', 'order-1', order_id='X1')
+    _crash(journal)
+
+    recovered = ExecutionJournal(str(tmp_path))
+    state = await recovered.open()
+    try:
+        assert recovered.directory == journal.directory
+        assert list(state.in_flight) == ['order-1']
+        assert state.in_flight['order-1']['legs'] == INTENT['legs']
+        assert 'order_id' not in state.in_flight['order-1']
+        assert state.seq == 1
+    finally:
+        await recovered.close()
+
+async def test_acknowledged_and_settled_orders_are_not_in_flight(tmp_path):
+    journal = ExecutionJournal(str(tmp_path))
+    await journal.open()
+    await journal.commit('intent', 'order-1', **INTENT)
+    await journal.commit('submitted', 'order-1', order_id='X1')
+    await journal.commit('intent', 'order-2', **INTENT)
+    await journal.commit('filled', 'order-2')
+    _crash(journal)
+
+    recovered = ExecutionJournal(str(tmp_path))
+    state = await recovered.open()
+    try:
+        assert state.in_flight['order-1']['order_id'] == 'X1'
+        assert 'order-2' not in state.in_flight
+        assert state.settled == {('buy', 1), ('buy', 2)}
+    finally:
+        await recovered.close()
+
+async def test_recovery_combines_the_snapshot_with_the_journal_tail(tmp_path):
+    journal = ExecutionJournal(str(tmp_path))
+    await journal.open()
+    await journal.commit('intent', 'order-1', **INTENT)
+    await journal.snapshot(lambda: [['sell', 1, 123.0]], watermark='2026-01-01T00:00:00')
+    await journal.commit('intent', 'order-2', **INTENT)
+    await journal.commit('failed', 'order-1')
+    _crash(journal)
+
+    recovered = ExecutionJournal(str(tmp_path))
+    state = await recovered.open()
+    try:
+        assert state.snapshot_found
+        assert state.armed == [['sell', 1, 123.0]]
+        assert state.watermark == '2026-01-01T00:00:00'
+        assert list(state.in_flight) == ['order-2']
+        assert state.seq == 3
+    finally:
+        await recovered.close()
+
+async def test_torn_final_record_is_ignored(tmp_path):
+    journal = ExecutionJournal(str(tmp_path))
+    await journal.open()
+    await journal.commit('intent', 'order-1', **INTENT)
+    _crash(journal)
+    with open(journal.log_path, 'ab') as f:
+        f.write(b'{"seq":2,"type":"fil')
+
+    recovered = ExecutionJournal(str(tmp_path))
+    state = await recovered.open()
+    try:
+        assert list(state.in_flight) == ['order-1']
+        assert state.seq == 1
+    finally:
+        await recovered.close()
+
+async def test_live_journal_slot_is_not_shared(tmp_path):
+    first = ExecutionJournal(str(tmp_path))
+    second = ExecutionJournal(str(tmp_path))
+    await first.open()
+    await second.open()
+    try:
+        assert first.directory != second.directory
+    finally:
+        await first.close()
+        await second.close()
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import pytest
+from app.core.markets import MarketsCatalog
+
+pytestmark = pytest.mark.anyio
+
+MARKETS = [
+    {'symbol': 'BTC/USDT', 'base': 'BTC', 'quote': 'USDT', 'type': 'spot', 'active': True, 'precision': {'amount': 0.0001}},
+    {'symbol': 'ETH/USDT', 'base': 'ETH', 'quote': 'USDT', 'type': 'spot', 'active': True, 'precision': {'amount': 0.001}},
+    {'symbol': 'DEAD/USDT', 'base': 'DEAD', 'quote': 'USDT', 'type': 'spot', 'active': False},
+    {'symbol': 'ETH/BTC', 'base': 'ETH', 'quote': 'BTC', 'type': 'spot', 'active': True},
+]
+
+class FakeExchange:
+    def __init__(self, volumes):
+        self.volumes = volumes
+        self.refreshes = 0
+
+    async def fetch_market_metadata(self):
+        self.refreshes += 1
+        return MARKETS
+
+    async def fetch_quote_volumes(self):
+        return self.volumes
+
+    async def fetch_tickers(self, symbols):
+        raise AssertionError("the markets index must not go through the ticker cache")
+
+def _catalog(path, reload_interval=0.01):
+    return MarketsCatalog(str(path), refresh_interval=3600, reload_interval=reload_interval)
+
+async def test_refresh_ranks_active_usdt_pairs_by_volume_and_persists(tmp_path):
+    catalog = _catalog(tmp_path / 'markets.json')
+    await catalog.refresh(FakeExchange({'BTC/USDT': 10.0, 'ETH/USDT': 20.0}))
+    assert catalog.get_trading_pairs() == ['ETH/USDT', 'BTC/USDT']
+    assert catalog.get_market('BTC/USDT')['precision'] == {'amount': 0.0001}
+
+    reader = _catalog(tmp_path / 'markets.json')
+    assert reader.load()
+    assert reader.get_trading_pairs() == ['ETH/USDT', 'BTC/USDT']
+
+async def test_readers_pick_up_the_refreshing_process_snapshot(tmp_path):
+    path = tmp_path / 'markets.json'
+    writer = _catalog(path)
+    await writer.refresh(FakeExchange({'BTC/USDT': 10.0, 'ETH/USDT': 20.0}))
+
+    exchange = FakeExchange({})
+    reader = _catalog(path)
+    await reader.start(exchange)
+    try:
+        assert exchange.refreshes == 0
+        await writer.refresh(FakeExchange({'BTC/USDT': 30.0, 'ETH/USDT': 20.0}))
+        # Coarse filesystem timestamps may not change within the same instant
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+        await asyncio.sleep(0.1)
+        assert reader.get_trading_pairs() == ['BTC/USDT', 'ETH/USDT']
+    finally:
+        await reader.stop()
+
+async def test_reader_without_a_snapshot_fetches_once(tmp_path):
+    exchange = FakeExchange({'BTC/USDT': 1.0})
+    reader = _catalog(tmp_path / 'markets.json', reload_interval=3600)
+    await reader.start(exchange)
+    try:
+        assert exchange.refreshes == 1
+        assert reader.get_trading_pairs() == ['BTC/USDT', 'ETH/USDT']
+    finally:
+        await reader.stop()
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.core.order_book import OrderBookManager
+
+pytestmark = pytest.mark.anyio
+
+def _diff(version, bids=(), asks=()):
+    return {'type': 'depth', 'symbol': 'BTC/USDT', 'version': version, 'bids': list(bids), 'asks': list(asks)}
+
+class FakeExchange:
+    def __init__(self, nonce):
+        self.nonce = nonce
+        self.release = asyncio.Event()
+
+    async def fetch_order_book_snapshot(self, symbol, depth):
+        await self.release.wait()
+        return {'bids': [[100.0, 1.0]], 'asks': [[101.0, 1.0]], 'nonce': self.nonce}
+
+async def test_diffs_are_dropped_without_an_exchange_to_resync_from():
+    manager = OrderBookManager()
+    for version in range(1, 50):
+        await manager.handle_update(_diff(version))
+    stats = manager.get_stats()
+    assert stats['pending_diffs'] == 0
+    assert stats['diffs_dropped'] == 49
+    assert manager.get('BTC/USDT') is None
+
+async def test_buffer_is_capped_while_the_snapshot_is_in_flight():
+    manager = OrderBookManager(max_pending=5)
+    # The snapshot lands after the dropped diffs, so the kept ones replay onto it
+    exchange = FakeExchange(nonce=15)
+    manager.set_exchange(exchange)
+    for version in range(1, 21):
+        await manager.handle_update(_diff(version, bids=[[99.0, float(version)]]))
+    assert manager.get_stats()['pending_diffs'] == 5
+    assert manager.get_stats()['diffs_dropped'] == 15
+
+    exchange.release.set()
+    await asyncio.sleep(0.01)
+    book = manager.get('BTC/USDT')
+    assert book is not None
+    assert book.version == 20
+    assert book.size_at('bids', 99.0) == 20.0
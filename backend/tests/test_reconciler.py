@@ -0,0 +1,31 @@
+import pytest
+from app.core.reconciler import FillReconciler
+
+pytestmark = pytest.mark.anyio
+
+class FakeExchange:
+    def __init__(self, orders):
+        self.orders = sorted(orders, key=lambda order: order['timestamp'])
+        self.pages = 0
+
+    async def fetch_closed_orders(self, symbol, since=None, limit=None):
+        self.pages += 1
+        return [order for order in self.orders if order['timestamp'] >= since][:limit]
+
+def _order(order_id, timestamp):
+    return {'id': order_id, 'timestamp': timestamp, 'status': 'closed', 'filled': 1.0, 'amount': 1.0}
+
+async def test_orders_sharing_a_page_boundary_millisecond_are_found():
+    # The first page of three ends partway through the orders at t=2000
+    orders = [_order('a', 1000), _order('b', 2000), _order('c', 2000), _order('d', 2000), _order('e', 3000)]
+    reconciler = FillReconciler(FakeExchange(orders), batch_size=3)
+    found = await reconciler._fetch_finished('BTC/USDT', 60.0, {'d', 'e'})
+    assert set(found) == {'d', 'e'}
+
+async def test_paging_stops_when_a_full_page_adds_nothing_new():
+    orders = [_order(f'o{i}', 1000) for i in range(5)]
+    exchange = FakeExchange(orders)
+    reconciler = FillReconciler(exchange, batch_size=3)
+    found = await reconciler._fetch_finished('BTC/USDT', 60.0, {'missing'})
+    assert found == {}
+    assert exchange.pages == 2
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import select
+from app.api.trades import delete_recurring_rule
+from app.db.database import AsyncSessionLocal
+from app.db.models import RecurringTradeRule, ScheduledTrade, Trade, TradeLegClaim, TradeStatus
+
+pytestmark = pytest.mark.anyio
+
+USER = SimpleNamespace(id=1)
+
+async def _rule_with_occurrences(db, count: int):
+    now = datetime.utcnow()
+    rule = RecurringTradeRule(
+        user_id=USER.id, trading_pair='BTC/USDT', amount=0.1, schedule='* * * * *',
+        hold_seconds=3600, next_occurrence_at=now + timedelta(minutes=count)
+    )
+    db.add(rule)
+    await db.flush()
+    occurrences = [
+        ScheduledTrade(
+            user_id=USER.id, trading_pair='BTC/USDT', amount=0.1, recurring_rule_id=rule.id,
+            buy_time=now + timedelta(minutes=i - 1), sell_time=now + timedelta(minutes=i + 59),
+            occurrence_at=now + timedelta(minutes=i - 1)
+        )
+        for i in range(count)
+    ]
+    db.add_all(occurrences)
+    await db.flush()
+    return rule, occurrences
+
+async def _statuses(rule_id: int):
+    async with AsyncSessionLocal() as db:
+        rule = await db.get(RecurringTradeRule, rule_id)
+        result = await db.execute(
+            select(ScheduledTrade.id, ScheduledTrade.status).where(ScheduledTrade.recurring_rule_id == rule_id)
+        )
+        return rule.status, dict(result.all())
+
+async def test_deleting_a_rule_cancels_only_occurrences_not_yet_bought(db_tables):
+    async with AsyncSessionLocal() as db:
+        rule, (holding, claimed, failed_buy, waiting) = await _rule_with_occurrences(db, 4)
+        # Bought and now in its hold period
+        db.add(Trade(scheduled_trade_id=holding.id, side='buy', order_id='X1', amount=0.1, price=100.0, status=TradeStatus.EXECUTED))
+        # Buy claimed and possibly on the exchange, not recorded yet
+        db.add(TradeLegClaim(scheduled_trade_id=claimed.id, side='buy', client_order_id='c2', owner='a', epoch=1))
+        # A failed buy left nothing to close
+        db.add(Trade(scheduled_trade_id=failed_buy.id, side='buy', amount=0.1, status=TradeStatus.FAILED))
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        await delete_recurring_rule(rule.id, current_user=USER, db=db)
+
+    rule_status, statuses = await _statuses(rule.id)
+    assert rule_status == TradeStatus.CANCELLED
+    assert statuses == {
+        holding.id: TradeStatus.PENDING,
+        claimed.id: TradeStatus.PENDING,
+        failed_buy.id: TradeStatus.CANCELLED,
+        waiting.id: TradeStatus.CANCELLED,
+    }
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from app.core.ohlcv_store import OHLCVSeries, resample
+
+pytestmark = pytest.mark.anyio
+
+MINUTE = 60_000
+HOUR = 60 * MINUTE
+START = 1_700_000_000_000 - 1_700_000_000_000 % HOUR
+
+def _columns(candles):
+    rows = np.array(candles, dtype='f8').reshape(-1, 6)
+    columns = {name: rows[:, i] for i, name in enumerate(('timestamp', 'open', 'high', 'low', 'close', 'volume'))}
+    columns['timestamp'] = rows[:, 0].astype(np.int64)
+    return columns
+
+def _minutes(count, start=START):
+    # Candle i opens at i, closes at i + 0.5, spans [i - 1, i + 2] and trades i + 1
+    return [[start + i * MINUTE, float(i), i + 2.0, i - 1.0, i + 0.5, i + 1.0] for i in range(count)]
+
+def test_one_minute_candles_aggregate_into_five_minute_buckets():
+    candles = resample(_columns(_minutes(10)), 5 * MINUTE)
+    assert candles == [
+        [START, 0.0, 6.0, -1.0, 4.5, 15.0],
+        [START + 5 * MINUTE, 5.0, 11.0, 4.0, 9.5, 40.0],
+    ]
+
+def test_buckets_are_aligned_to_the_epoch():
+    candles = resample(_columns(_minutes(6, START + 3 * MINUTE)), 5 * MINUTE)
+    assert [candle[0] for candle in candles] == [START, START + 5 * MINUTE]
+    assert candles[0][1] == 0.0 and candles[0][4] == 1.5
+
+def test_missing_candles_inside_a_bucket_change_nothing():
+    minutes = _minutes(15)
+    del minutes[6:8]
+    candles = resample(_columns(minutes), 5 * MINUTE)
+    assert candles[1] == [START + 5 * MINUTE, 5.0, 11.0, 4.0, 9.5, 25.0]
+
+def test_missing_first_candle_opens_at_the_previous_close():
+    minutes = _minutes(10)
+    del minutes[5]
+    candles = resample(_columns(minutes), 5 * MINUTE)
+    # Flat at candle 4's close of 4.5, which is above the remaining lows and below the highs
+    assert candles[1] == [START + 5 * MINUTE, 4.5, 11.0, 4.5, 9.5, 34.0]
+
+def test_first_bucket_opens_at_the_close_before_the_columns():
+    candles = resample(_columns(_minutes(7, START + 3 * MINUTE)), 5 * MINUTE, previous_close=-5.0)
+    assert candles[0] == [START, -5.0, 3.0, -5.0, 1.5, 3.0]
+    # Without it the bucket is built from the candles it has
+    candles = resample(_columns(_minutes(7, START + 3 * MINUTE)), 5 * MINUTE)
+    assert candles[0] == [START, 0.0, 3.0, -1.0, 1.5, 3.0]
+
+def test_sparse_series_keeps_every_bucket():
+    # An illiquid pair trading once every 7 minutes over two hours
+    minutes = [candle for candle in _minutes(120) if candle[1] % 7 == 0]
+    candles = resample(_columns(minutes), 5 * MINUTE)
+    assert [candle[0] for candle in candles] == [
+        START + i * 5 * MINUTE for i in range(24) if any(i * 5 <= minute < i * 5 + 5 for minute in range(0, 120, 7))
+    ]
+    hourly = resample(_columns(minutes), HOUR)
+    assert len(hourly) == 2
+    assert hourly[1] == [START + HOUR, 56.5, 121.0, 56.5, 119.5, sum(i + 1.0 for i in range(63, 120, 7))]
+
+def test_hourly_from_minutes():
+    candles = resample(_columns(_minutes(120)), HOUR)
+    assert len(candles) == 2
+    assert candles[1] == [START + HOUR, 60.0, 121.0, 59.0, 119.5, sum(range(61, 121))]
+
+def test_empty_input():
+    assert resample(_columns([]), 5 * MINUTE) == []
+
+async def test_long_idle_series_starts_over(tmp_path):
+    series = OHLCVSeries(str(tmp_path), 'ABC/USDT', '1m')
+    await series.append(_minutes(3))
+    assert not await series.reset(START + MINUTE)
+    assert series.length == 3
+
+    assert await series.reset(START + HOUR)
+    assert series.length == 0
+    await series.append(_minutes(2, START + HOUR))
+    assert series.first_timestamp == START + HOUR
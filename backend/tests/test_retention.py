@@ -0,0 +1,23 @@
+import sqlite3
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.retention import MarketDataRetention
+
+pytestmark = pytest.mark.anyio
+
+async def test_existing_sqlite_database_is_converted_to_incremental_vacuum(tmp_path):
+    path = tmp_path / 'old.db'
+    # Created before auto_vacuum=INCREMENTAL, like an existing deployment's database
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE market_data (id INTEGER PRIMARY KEY, payload TEXT)')
+        conn.executemany('INSERT INTO market_data (payload) VALUES (?)', [('x' * 500,)] * 200)
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.execute(text('PRAGMA auto_vacuum'))).scalar() == 0
+            mode = await MarketDataRetention()._convert_to_incremental(conn)
+            assert mode == 2
+            assert (await conn.execute(text('SELECT count(*) FROM market_data'))).scalar() == 200
+    finally:
+        await engine.dispose()
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from app.core.scheduler import TradeScheduler, to_timestamp
+
+pytestmark = pytest.mark.anyio
+
+def _at(seconds: float) -> datetime:
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+async def test_jobs_fire_in_run_time_order():
+    scheduler = TradeScheduler()
+    fired = []
+
+    async def record(name):
+        fired.append(name)
+
+    scheduler.schedule('c', _at(0.15), record, 'c')
+    scheduler.schedule('a', _at(0.05), record, 'a')
+    scheduler.schedule('b', _at(0.10), record, 'b')
+    scheduler.start()
+    try:
+        await asyncio.sleep(0.3)
+    finally:
+        await scheduler.stop()
+
+    assert fired == ['a', 'b', 'c']
+    assert scheduler.get_stats()['fired'] == 3
+
+async def test_earlier_job_scheduled_while_sleeping_fires_first():
+    scheduler = TradeScheduler()
+    fired = []
+
+    async def record(name):
+        fired.append(name)
+
+    scheduler.schedule('late', _at(0.2), record, 'late')
+    scheduler.start()
+    try:
+        await asyncio.sleep(0.01)
+        scheduler.schedule('early', _at(0.05), record, 'early')
+        await asyncio.sleep(0.3)
+    finally:
+        await scheduler.stop()
+
+    assert fired == ['early', 'late']
+
+async def test_rescheduling_and_cancelling_replace_the_pending_job():
+    scheduler = TradeScheduler()
+    fired = []
+
+    async def record(name):
+        fired.append(name)
+
+    scheduler.schedule('job', _at(0.05), record, 'first')
+    scheduler.schedule('job', _at(0.10), record, 'second')
+    scheduler.schedule('gone', _at(0.05), record, 'gone')
+    assert scheduler.cancel('gone')
+    assert not scheduler.cancel('gone')
+    scheduler.start()
+    try:
+        await asyncio.sleep(0.25)
+    finally:
+        await scheduler.stop()
+
+    assert fired == ['second']
+    assert len(scheduler) == 0
+
+async def test_batched_items_due_together_share_one_call():
+    scheduler = TradeScheduler()
+    calls = []
+
+    async def execute(items):
+        calls.append(sorted(items))
+
+    run_at = _at(0.05)
+    for item in (3, 1, 2):
+        scheduler.schedule_batched(f'leg-{item}', run_at, execute, item)
+    scheduler.schedule_batched('leg-4', run_at + timedelta(seconds=0.05), execute, 4)
+    scheduler.start()
+    try:
+        await asyncio.sleep(0.3)
+    finally:
+        await scheduler.stop()
+
+    assert calls == [[1, 2, 3], [4]]
+
+async def test_misfired_items_go_to_on_misfire_instead_of_the_callback():
+    scheduler = TradeScheduler(misfire_grace_time=1.0)
+    executed, misfired = [], []
+
+    async def execute(items):
+        executed.extend(items)
+
+    async def on_misfire(items):
+        misfired.extend(items)
+
+    scheduler.schedule_batched('stale-1', _at(-5), execute, 1, on_misfire=on_misfire)
+    scheduler.load_batched(execute, [('stale-2', to_timestamp(_at(-5)), 2)], on_misfire=on_misfire)
+    scheduler.schedule_batched('on-time', _at(-0.5), execute, 3, on_misfire=on_misfire)
+    scheduler.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        await scheduler.stop()
+
+    assert executed == [3]
+    assert sorted(misfired) == [1, 2]
+    assert scheduler.get_stats()['misfired'] == 2
@@ -0,0 +1,46 @@
+import asyncio
+import gc
+import pytest
+from app.db.write_behind import WriteBehindQueue
+
+pytestmark = pytest.mark.anyio
+
+class FailingSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params):
+        raise RuntimeError("disk full")
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+async def test_failed_fire_and_forget_unit_is_not_reported_as_unretrieved():
+    loop = asyncio.get_running_loop()
+    unhandled = []
+    previous = loop.get_exception_handler()
+    loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+    queue = WriteBehindQueue(session_factory=FailingSession, max_delay=0.0)
+    try:
+        await queue.write([('statement', [{'value': 1}])], wait=False)
+        await queue.close()
+        gc.collect()
+    finally:
+        loop.set_exception_handler(previous)
+
+    assert queue.errors == 1
+    assert unhandled == []
+
+async def test_waiting_writer_still_gets_the_error():
+    queue = WriteBehindQueue(session_factory=FailingSession, max_delay=0.0)
+    try:
+        with pytest.raises(RuntimeError, match="disk full"):
+            await queue.write([('statement', [{'value': 1}])])
+    finally:
+        await queue.close()